@@ -0,0 +1,211 @@
+"""In-memory stand-in for the Firestore client used by the Dashboard bridge.
+
+Enabled with FIRESTORE_FAKE=1 so the SOS mirror, alert feed and their
+background workers can be exercised without a service account. Only the
+subset of the google-cloud-firestore API that server.py touches is provided.
+"""
+import copy
+import operator
+import threading
+import time
+import uuid
+
+from google.api_core.exceptions import NotFound
+
+
+class FakeDocumentSnapshot:
+    def __init__(self, reference, data):
+        self.reference = reference
+        self.id = reference.id
+        self._data = copy.deepcopy(data) if data is not None else None
+
+    @property
+    def exists(self):
+        return self._data is not None
+
+    def to_dict(self):
+        return copy.deepcopy(self._data) if self._data is not None else None
+
+
+class FakeDocumentReference:
+    def __init__(self, store, collection_name, doc_id):
+        self._store = store
+        self._collection_name = collection_name
+        self.id = doc_id
+
+    @property
+    def path(self):
+        return f"{self._collection_name}/{self.id}"
+
+    def get(self):
+        self._store.simulate_latency()
+        with self._store.lock:
+            data = self._store.docs(self._collection_name).get(self.id)
+            return FakeDocumentSnapshot(self, data)
+
+    def set(self, data, merge=False):
+        self._store.simulate_latency()
+        self._store.apply(self._collection_name, [("set", self.id, data, merge)])
+
+    def update(self, data):
+        self._store.simulate_latency()
+        self._store.apply(self._collection_name, [("update", self.id, data, False)])
+
+    def delete(self):
+        self._store.simulate_latency()
+        self._store.apply(self._collection_name, [("delete", self.id, None, False)])
+
+
+_OPERATORS = {
+    "<": operator.lt,
+    "<=": operator.le,
+    "==": operator.eq,
+    ">=": operator.ge,
+    ">": operator.gt,
+}
+
+
+class FakeQuery:
+    def __init__(self, store, collection_name, order_field=None, descending=False, limit=None, filters=()):
+        self._store = store
+        self._collection_name = collection_name
+        self._order_field = order_field
+        self._descending = descending
+        self._limit = limit
+        self._filters = tuple(filters)
+
+    def _copy(self, **changes):
+        state = {
+            "order_field": self._order_field,
+            "descending": self._descending,
+            "limit": self._limit,
+            "filters": self._filters,
+        }
+        state.update(changes)
+        return FakeQuery(self._store, self._collection_name, **state)
+
+    def where(self, field, op, value):
+        return self._copy(filters=self._filters + ((field, _OPERATORS[op], value),))
+
+    def order_by(self, field, direction="ASCENDING"):
+        return self._copy(order_field=field, descending=direction == "DESCENDING")
+
+    def limit(self, count):
+        return self._copy(limit=count)
+
+    def _snapshots(self):
+        with self._store.lock:
+            items = list(self._store.docs(self._collection_name).items())
+        items = [
+            (doc_id, data) for doc_id, data in items
+            if all(field in data and compare(data[field], value) for field, compare, value in self._filters)
+        ]
+        if self._order_field:
+            # Firestore breaks ties on the document id, in the same direction
+            items.sort(key=lambda item: (item[1].get(self._order_field) or "", item[0]), reverse=self._descending)
+        if self._limit is not None:
+            items = items[:self._limit]
+        return [
+            FakeDocumentSnapshot(FakeDocumentReference(self._store, self._collection_name, doc_id), data)
+            for doc_id, data in items
+        ]
+
+    def stream(self):
+        self._store.simulate_latency()
+        return iter(self._snapshots())
+
+    def on_snapshot(self, callback):
+        return self._store.listen(self, callback)
+
+
+class FakeWatch:
+    def __init__(self, store, listener):
+        self._store = store
+        self._listener = listener
+
+    def unsubscribe(self):
+        with self._store.lock:
+            if self._listener in self._store.listeners:
+                self._store.listeners.remove(self._listener)
+
+
+class FakeCollectionReference(FakeQuery):
+    def document(self, doc_id=None):
+        return FakeDocumentReference(self._store, self._collection_name, doc_id or uuid.uuid4().hex)
+
+
+class FakeWriteBatch:
+    def __init__(self, store):
+        self._store = store
+        self._ops = []
+
+    def set(self, reference, data, merge=False):
+        self._ops.append((reference._collection_name, ("set", reference.id, data, merge)))
+
+    def update(self, reference, data):
+        self._ops.append((reference._collection_name, ("update", reference.id, data, False)))
+
+    def delete(self, reference):
+        self._ops.append((reference._collection_name, ("delete", reference.id, None, False)))
+
+    def commit(self):
+        self._store.simulate_latency()
+        self._store.apply_batch(self._ops)
+        self._ops = []
+
+
+class FakeFirestoreClient:
+    """Thread-safe in-memory document store with Firestore-like semantics."""
+
+    def __init__(self, latency_ms=0.0):
+        self.lock = threading.RLock()
+        self.latency_ms = latency_ms
+        self.write_count = 0
+        self.listeners = []
+        self._collections = {}
+
+    def simulate_latency(self):
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000.0)
+
+    def docs(self, collection_name):
+        return self._collections.setdefault(collection_name, {})
+
+    def collection(self, name):
+        return FakeCollectionReference(self, name)
+
+    def batch(self):
+        return FakeWriteBatch(self)
+
+    def listen(self, query, callback):
+        listener = (query, callback)
+        with self.lock:
+            self.listeners.append(listener)
+        callback(query._snapshots(), [], time.time())
+        return FakeWatch(self, listener)
+
+    def _notify(self, collection_names):
+        with self.lock:
+            listeners = [l for l in self.listeners if l[0]._collection_name in collection_names]
+        for query, callback in listeners:
+            callback(query._snapshots(), [], time.time())
+
+    def apply(self, collection_name, ops):
+        self.apply_batch([(collection_name, op) for op in ops])
+
+    def apply_batch(self, ops):
+        with self.lock:
+            # Validate first so a failing batch leaves no partial writes
+            for collection_name, (kind, doc_id, _, _) in ops:
+                if kind == "update" and doc_id not in self.docs(collection_name):
+                    raise NotFound(f"No document to update: {collection_name}/{doc_id}")
+            for collection_name, (kind, doc_id, data, merge) in ops:
+                docs = self.docs(collection_name)
+                if kind == "delete":
+                    docs.pop(doc_id, None)
+                elif kind == "update" or (kind == "set" and merge and doc_id in docs):
+                    docs[doc_id] = {**docs[doc_id], **copy.deepcopy(data)}
+                else:
+                    docs[doc_id] = copy.deepcopy(data)
+                self.write_count += 1
+        self._notify({collection_name for collection_name, _ in ops})
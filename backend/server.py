@@ -1,8 +1,13 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Depends
+from fastapi import FastAPI, APIRouter, HTTPException, Depends, Header, Request, Query, WebSocket, WebSocketDisconnect
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from fastapi.encoders import jsonable_encoder
+from fastapi.exceptions import RequestValidationError
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ASCENDING, DESCENDING, IndexModel, InsertOne, ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError, OperationFailure
 import os
 import json
 import logging
@@ -10,41 +15,148 @@ from pathlib import Path
 from pydantic import BaseModel, Field, EmailStr
 from typing import List, Optional
 import uuid
+from abc import ABC, abstractmethod
 from datetime import datetime, timedelta
+from collections import OrderedDict
+import time
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
 from passlib.context import CryptContext
 from jose import JWTError, jwt
 import re
+import math
+import heapq
+import numpy as np
+import hashlib
+import hmac
+import base64
+from email.utils import format_datetime, parsedate_to_datetime
+from datetime import timezone
 import firebase_admin
 from firebase_admin import credentials, firestore as firebase_firestore
+from google.api_core.exceptions import NotFound
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
 # ==================== FIREBASE ADMIN (Dashboard bridge) ====================
 
+class CircuitBreaker:
+    """Closed/open/half-open breaker with exponential backoff between probes.
+
+    While open, allow() is a cheap clock comparison. Once the backoff expires
+    a single caller is let through as a probe; its outcome closes the breaker
+    or re-opens it with a doubled backoff. Only callers that report their
+    outcome may take the probe (allow(probe=True)), so read paths that never
+    call record_success/record_failure cannot strand it; a probe that still
+    never reports back is superseded after probe_timeout seconds.
+    """
+
+    def __init__(self, name: str, failure_threshold: int, base_backoff: float,
+                 max_backoff: float, probe_timeout: float):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.probe_timeout = probe_timeout
+        self.state = "closed"
+        self.failures = 0
+        self.trips = 0
+        self.last_error = None
+        self._retry_at = 0.0
+
+    def allow(self, probe: bool = False) -> bool:
+        if self.state == "closed":
+            return True
+        if not probe:
+            return False
+        now = time.monotonic()
+        if now < self._retry_at:
+            return False
+        self.state = "half_open"
+        self._retry_at = now + self.probe_timeout
+        return True
+
+    def record_success(self):
+        if self.state != "closed":
+            logging.getLogger(__name__).info(f"{self.name} circuit closed")
+        self.state = "closed"
+        self.failures = 0
+        self.trips = 0
+        self.last_error = None
+
+    def record_failure(self, error, trip: bool = False):
+        """Count a failure; trip=True opens at once (e.g. for config errors)."""
+        self.failures += 1
+        self.last_error = str(error)
+        if trip or self.state == "half_open" or self.failures >= self.failure_threshold:
+            backoff = min(self.max_backoff, self.base_backoff * (2 ** self.trips))
+            self.trips += 1
+            self.state = "open"
+            self._retry_at = time.monotonic() + backoff
+            logging.getLogger(__name__).warning(
+                f"{self.name} circuit open for {backoff:.0f}s: {self.last_error}"
+            )
+
+    def snapshot(self) -> dict:
+        return {
+            "state": self.state,
+            "failures": self.failures,
+            "trips": self.trips,
+            "retry_in_seconds": max(0.0, round(self._retry_at - time.monotonic(), 1))
+            if self.state != "closed" else 0.0,
+            "last_error": self.last_error,
+        }
+
+dashboard_breaker = CircuitBreaker(
+    "Dashboard bridge",
+    failure_threshold=int(os.environ.get('DASHBOARD_BREAKER_THRESHOLD', '3')),
+    base_backoff=float(os.environ.get('DASHBOARD_BREAKER_BACKOFF_SECONDS', '5')),
+    max_backoff=float(os.environ.get('DASHBOARD_BREAKER_MAX_BACKOFF_SECONDS', '600')),
+    probe_timeout=float(os.environ.get('DASHBOARD_BREAKER_PROBE_TIMEOUT_SECONDS', '30')),
+)
+
 _firebase_app = None
 _firestore_client = None
 
-def get_firestore_client():
-    """Lazy-init Firebase Admin. Returns None gracefully if not configured."""
+def _init_firestore_client():
     global _firebase_app, _firestore_client
-    if _firestore_client is not None:
+    if os.environ.get('FIRESTORE_FAKE') == '1':
+        from fake_firestore import FakeFirestoreClient
+        _firestore_client = FakeFirestoreClient(
+            latency_ms=float(os.environ.get('FIRESTORE_FAKE_LATENCY_MS', '0'))
+        )
+        logging.getLogger(__name__).warning("Using in-memory fake Firestore for Dashboard bridge")
         return _firestore_client
-    try:
-        sa_json = os.environ.get('FIREBASE_SERVICE_ACCOUNT_JSON')
-        if not sa_json or not sa_json.strip():
-            logging.getLogger(__name__).warning(
-                "FIREBASE_SERVICE_ACCOUNT_JSON not set; Dashboard bridge disabled"
-            )
-            return None
+    sa_json = os.environ.get('FIREBASE_SERVICE_ACCOUNT_JSON')
+    if not sa_json or not sa_json.strip():
+        raise RuntimeError("FIREBASE_SERVICE_ACCOUNT_JSON not set; Dashboard bridge disabled")
+    if _firebase_app is None:
         cred = credentials.Certificate(json.loads(sa_json))
         _firebase_app = firebase_admin.initialize_app(cred, name='dashboard_bridge')
-        _firestore_client = firebase_firestore.client(_firebase_app)
-        logging.getLogger(__name__).info("Firebase Admin SDK initialized for Dashboard bridge")
+    _firestore_client = firebase_firestore.client(_firebase_app)
+    logging.getLogger(__name__).info("Firebase Admin SDK initialized for Dashboard bridge")
+    return _firestore_client
+
+def get_firestore_client(probe: bool = False):
+    """Lazy-init Firebase Admin. Returns None gracefully if not configured.
+
+    Init and runtime failures trip dashboard_breaker, so a missing or broken
+    bridge is remembered instead of being re-parsed and re-logged per request.
+    Pass probe=True only from callers that report the outcome to the breaker.
+    """
+    if not dashboard_breaker.allow(probe):
+        return None
+    if _firestore_client is not None:
         return _firestore_client
+    try:
+        fs = _init_firestore_client()
     except Exception as e:
-        logging.getLogger(__name__).error(f"Firebase Admin init failed: {e}")
+        # Configuration errors will not fix themselves; open immediately
+        dashboard_breaker.record_failure(f"Firebase Admin init failed: {e}", trip=True)
         return None
+    dashboard_breaker.record_success()
+    return fs
 
 # MongoDB connection
 mongo_url = os.environ['MONGO_URL']
@@ -54,6 +166,19 @@ db = client[os.environ.get('DB_NAME', 'acadia_safe')]
 # Create the main app
 app = FastAPI(title="Acadia Safe API")
 
+@app.exception_handler(RequestValidationError)
+async def validation_exception_handler(request: Request, exc: RequestValidationError):
+    # Errors echo the rejected input, and a non-finite float such as 1e999
+    # cannot be written as JSON; report those inputs as strings so the
+    # client still gets a 422 rather than a 500 from the encoder
+    errors = jsonable_encoder(exc.errors())
+    for error in errors:
+        try:
+            json.dumps(error.get("input"), allow_nan=False)
+        except ValueError:
+            error["input"] = str(error["input"])
+    return JSONResponse(status_code=422, content={"detail": errors})
+
 # Create a router with the /api prefix
 api_router = APIRouter(prefix="/api")
 
@@ -113,8 +238,8 @@ class TrustedContactCreate(BaseModel):
 
 class IncidentCreate(BaseModel):
     incident_type: str
-    location_lat: float
-    location_lng: float
+    location_lat: float = Field(..., ge=-90, le=90)
+    location_lng: float = Field(..., ge=-180, le=180)
     location_name: Optional[str] = None
     description: str
     photos: Optional[List[str]] = []
@@ -178,6 +303,20 @@ class SOSAlertCreate(BaseModel):
     location_lng: float
     alert_type: Optional[str] = None
 
+class SOSLocationPing(BaseModel):
+    location_lat: float = Field(..., ge=-90, le=90)
+    location_lng: float = Field(..., ge=-180, le=180)
+    accuracy_m: Optional[float] = None
+    recorded_at: Optional[datetime] = None
+
+class SOSPosition(BaseModel):
+    sos_id: str
+    location_lat: float
+    location_lng: float
+    accuracy_m: Optional[float] = None
+    recorded_at: datetime
+    source: str  # memory, stored, initial
+
 class FriendWalkCreate(BaseModel):
     contact_ids: List[str]
     duration_minutes: int
@@ -199,6 +338,17 @@ class FriendWalkUpdate(BaseModel):
     location_lat: float
     location_lng: float
 
+class TrackResponse(BaseModel):
+    id: str
+    points: List[List[float]]
+    polyline: str
+    point_count: int
+    updated_at: Optional[datetime] = None
+
+class WalkShareLink(BaseModel):
+    token: str
+    url: str
+
 class CampusAlert(BaseModel):
     id: str
     alert_type: str  # emergency, advisory, info
@@ -207,6 +357,10 @@ class CampusAlert(BaseModel):
     created_at: datetime
     is_read: bool = False
 
+class AlertReadUpdate(BaseModel):
+    alert_ids: List[str] = []
+    up_to: Optional[str] = None  # alert cursor; everything at or before it is read
+
 class CampusLocation(BaseModel):
     id: str
     name: str
@@ -215,6 +369,40 @@ class CampusLocation(BaseModel):
     lat: float
     lng: float
 
+class NearbyLocation(CampusLocation):
+    distance_m: float
+
+class RoutePoint(BaseModel):
+    lat: float = Field(..., ge=-90, le=90)
+    lng: float = Field(..., ge=-180, le=180)
+
+class RouteSafetyRequest(BaseModel):
+    # Either a full path or a pickup/destination pair (scored as a straight line)
+    path: Optional[List[RoutePoint]] = None
+    start_lat: Optional[float] = Field(None, ge=-90, le=90)
+    start_lng: Optional[float] = Field(None, ge=-180, le=180)
+    end_lat: Optional[float] = Field(None, ge=-90, le=90)
+    end_lng: Optional[float] = Field(None, ge=-180, le=180)
+    sample_spacing_m: float = Field(20.0, ge=5, le=500)
+    segment_length_m: float = Field(100.0, ge=20, le=5000)
+
+class RouteSegmentSafety(BaseModel):
+    start: RoutePoint
+    end: RoutePoint
+    length_m: float
+    score: float
+    min_score: float
+    nearest_phone_m: Optional[float] = None
+    nearest_safe_building_m: Optional[float] = None
+    incidents_nearby: int
+
+class RouteSafety(BaseModel):
+    score: float
+    min_score: float
+    length_m: float
+    samples: int
+    segments: List[RouteSegmentSafety]
+
 # ==================== AUTH HELPERS ====================
 
 def verify_password(plain_password, hashed_password):
@@ -223,30 +411,222 @@ def verify_password(plain_password, hashed_password):
 def get_password_hash(password):
     return pwd_context.hash(password)
 
+class PasswordHasher:
+    """Runs bcrypt work in a dedicated process pool, off the event loop.
+
+    At most ``max_pending`` hash/verify calls may be queued or running at
+    once; beyond that callers get a 503 instead of piling up behind a login
+    storm and starving SOS traffic on the same worker.
+    """
+
+    def __init__(self, workers: int, max_pending: int):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.pending = 0
+        self.rejected = 0
+        self._executor = None
+
+    def _get_executor(self):
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        return self._executor
+
+    async def _run(self, fn, *args):
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=503,
+                detail="Authentication service is busy, please retry shortly",
+                headers={"Retry-After": "1"},
+            )
+        self.pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), fn, *args)
+        finally:
+            self.pending -= 1
+
+    async def hash(self, password: str) -> str:
+        return await self._run(get_password_hash, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._run(verify_password, plain_password, hashed_password)
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "pending": self.pending,
+            "rejected": self.rejected,
+        }
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+_password_workers = int(os.environ.get('PASSWORD_HASH_WORKERS', str(os.cpu_count() or 2)))
+password_hasher = PasswordHasher(
+    workers=_password_workers,
+    max_pending=int(os.environ.get('PASSWORD_HASH_MAX_PENDING', str(_password_workers * 8))),
+)
+
 def create_access_token(data: dict):
     to_encode = data.copy()
     expire = datetime.utcnow() + timedelta(days=ACCESS_TOKEN_EXPIRE_DAYS)
     to_encode.update({"exp": expire})
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
-async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
+class TTLCache:
+    """In-process TTL + LRU cache of per-user values keyed by user id.
+
+    Callers invalidate or replace an entry when they write the underlying
+    document, so the TTL only bounds staleness for writes made by other
+    workers.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, user_id: str):
+        entry = self._entries.get(user_id)
+        if entry is None:
+            self.misses += 1
+            return None
+        value, expires_at = entry
+        if expires_at <= time.monotonic():
+            del self._entries[user_id]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(user_id)
+        self.hits += 1
+        return value
+
+    def put(self, user_id: str, value):
+        self._entries[user_id] = (value, time.monotonic() + self.ttl_seconds)
+        self._entries.move_to_end(user_id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, user_id: str):
+        self._entries.pop(user_id, None)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+# User documents; dropped or refilled by the endpoints that write users
+principal_cache = TTLCache(
+    max_entries=int(os.environ.get('PRINCIPAL_CACHE_MAX_ENTRIES', '10000')),
+    ttl_seconds=float(os.environ.get('PRINCIPAL_CACHE_TTL_SECONDS', '60')),
+)
+
+async def resolve_token_user(token: str, scope: Optional[str] = None) -> dict:
+    """Decode a bearer token and return the (cached) user document.
+
+    Access tokens carry no scope; single-purpose tokens such as stream
+    tickets are only accepted where that scope is asked for.
+    """
     try:
-        token = credentials.credentials
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         user_id = payload.get("sub")
-        if user_id is None:
+        if user_id is None or payload.get("scope") != scope:
             raise HTTPException(status_code=401, detail="Invalid token")
-        user = await db.users.find_one({"id": user_id})
+        user = principal_cache.get(user_id)
         if user is None:
-            raise HTTPException(status_code=401, detail="User not found")
+            user = await db.users.find_one({"id": user_id})
+            if user is None:
+                raise HTTPException(status_code=401, detail="User not found")
+            principal_cache.put(user_id, user)
         return user
     except JWTError:
         raise HTTPException(status_code=401, detail="Invalid token")
 
+async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
+    return await resolve_token_user(credentials.credentials)
+
+optional_security = HTTPBearer(auto_error=False)
+
+STREAM_TICKET_SCOPE = "stream"
+STREAM_TICKET_SECONDS = int(os.environ.get('STREAM_TICKET_SECONDS', '60'))
+
+def create_stream_ticket(user_id: str) -> str:
+    expire = datetime.utcnow() + timedelta(seconds=STREAM_TICKET_SECONDS)
+    return jwt.encode(
+        {"sub": user_id, "scope": STREAM_TICKET_SCOPE, "exp": expire}, SECRET_KEY, algorithm=ALGORITHM
+    )
+
+async def get_stream_user(
+    ticket: Optional[str] = None,
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_security),
+):
+    """Auth for streaming endpoints.
+
+    EventSource cannot set headers, so a short-lived stream ticket from
+    POST /api/events/ticket is accepted as ?ticket=; the access token itself
+    never goes in a URL, where proxies and access logs would keep it.
+    """
+    if credentials is not None:
+        return await resolve_token_user(credentials.credentials)
+    if ticket:
+        return await resolve_token_user(ticket, scope=STREAM_TICKET_SCOPE)
+    raise HTTPException(status_code=401, detail="Not authenticated")
+
+async def get_optional_user(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_security),
+):
+    """Current user when a valid bearer token is sent, None for anonymous reads.
+
+    A bad or expired token falls back to anonymous rather than failing a
+    public read.
+    """
+    if credentials is None:
+        return None
+    try:
+        return await resolve_token_user(credentials.credentials)
+    except HTTPException:
+        return None
+
+RESPONDER_API_KEY = os.environ.get('RESPONDER_API_KEY', '')
+
+def responder_key_valid(key: Optional[str]) -> bool:
+    return bool(RESPONDER_API_KEY) and bool(key) and hmac.compare_digest(key, RESPONDER_API_KEY)
+
+async def require_responder(x_responder_key: Optional[str] = Header(None)):
+    """Gate for dispatcher/security-desk reads, keyed by the shared RESPONDER_API_KEY."""
+    if not RESPONDER_API_KEY:
+        raise HTTPException(status_code=503, detail="Responder access is not configured")
+    if not responder_key_valid(x_responder_key):
+        raise HTTPException(status_code=401, detail="Invalid responder key")
+    return True
+
 def validate_acadia_email(email: str) -> bool:
     """Validate that email is from @acadiau.ca domain"""
     return email.lower().endswith("@acadiau.ca")
 
+async def transition_error(collection: str, doc_id: str, user_id: str, label: str) -> HTTPException:
+    """Explain why a status-guarded find_one_and_update matched nothing.
+
+    Only runs on the failure path, so successful transitions stay a single
+    round trip: 404 when the caller owns no such document, 409 otherwise.
+    """
+    doc = await db[collection].find_one({"id": doc_id, "user_id": user_id}, {"_id": 0, "status": 1})
+    if doc is None:
+        return HTTPException(status_code=404, detail=f"{label} not found")
+    return HTTPException(status_code=409, detail=f"{label} is already {doc['status']}")
+
 # ==================== AUTH ENDPOINTS ====================
 
 @api_router.post("/auth/signup")
@@ -267,7 +647,7 @@ async def signup(user: UserCreate):
         "full_name": user.full_name,
         "email": user.email.lower(),
         "phone": user.phone,
-        "password_hash": get_password_hash(user.password),
+        "password_hash": await password_hasher.hash(user.password),
         "profile_photo": None,
         "emergency_contact_name": None,
         "emergency_contact_phone": None,
@@ -292,7 +672,7 @@ async def signup(user: UserCreate):
 @api_router.post("/auth/login")
 async def login(credentials: UserLogin):
     user = await db.users.find_one({"email": credentials.email.lower()})
-    if not user or not verify_password(credentials.password, user["password_hash"]):
+    if not user or not await password_hasher.verify(credentials.password, user["password_hash"]):
         raise HTTPException(status_code=401, detail="Invalid email or password")
     
     token = create_access_token({"sub": user["id"]})
@@ -325,10 +705,17 @@ async def get_me(current_user: dict = Depends(get_current_user)):
 @api_router.put("/auth/profile")
 async def update_profile(update: UserUpdate, current_user: dict = Depends(get_current_user)):
     update_data = {k: v for k, v in update.dict().items() if v is not None}
+    updated_user = current_user
     if update_data:
-        await db.users.update_one({"id": current_user["id"]}, {"$set": update_data})
-    
-    updated_user = await db.users.find_one({"id": current_user["id"]})
+        updated_user = await db.users.find_one_and_update(
+            {"id": current_user["id"]},
+            {"$set": update_data},
+            return_document=ReturnDocument.AFTER,
+        )
+        if updated_user is None:
+            raise HTTPException(status_code=404, detail="User not found")
+        # The post-image is the full user document, so refill rather than drop
+        principal_cache.put(current_user["id"], updated_user)
     return {
         "id": updated_user["id"],
         "full_name": updated_user["full_name"],
@@ -356,6 +743,7 @@ async def add_trusted_contact(contact: TrustedContactCreate, current_user: dict
         {"id": current_user["id"]},
         {"$push": {"trusted_contacts": new_contact.dict()}}
     )
+    principal_cache.invalidate(current_user["id"])
     return new_contact
 
 @api_router.delete("/contacts/{contact_id}")
@@ -364,12 +752,876 @@ async def delete_trusted_contact(contact_id: str, current_user: dict = Depends(g
         {"id": current_user["id"]},
         {"$pull": {"trusted_contacts": {"id": contact_id}}}
     )
+    principal_cache.invalidate(current_user["id"])
     return {"message": "Contact deleted"}
 
+# ==================== DASHBOARD OUTBOX ====================
+
+def new_mirror_state(payload: dict, now: datetime) -> dict:
+    """Outbox state embedded in an sos_alerts document for the Firestore mirror."""
+    return {
+        "pending": True,
+        "version": 1,
+        "synced_version": 0,
+        "attempts": 0,
+        "next_attempt_at": now,
+        "changed_at": now,
+        "payload": payload,
+    }
+
+def mirror_change_set(fields: dict, now: datetime) -> dict:
+    """$set clause queueing a partial Firestore update for an already-created SOS.
+
+    Pair it with {"$inc": {"mirror.version": 1}}. The fields are folded into the
+    full payload (used if the create has not been mirrored yet) and into the
+    patch (used as a blind update once it has).
+    """
+    update = {
+        "mirror.pending": True,
+        "mirror.attempts": 0,
+        "mirror.next_attempt_at": now,
+        "mirror.changed_at": now,
+    }
+    for key, value in fields.items():
+        update[f"mirror.payload.{key}"] = value
+        update[f"mirror.patch.{key}"] = value
+    return update
+
+class OpLatency:
+    """Running latency stats for one kind of bridge operation."""
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.last_ms = 0.0
+
+    def record(self, elapsed_ms: float, ok: bool = True):
+        self.count += 1
+        if not ok:
+            self.errors += 1
+        self.total_ms += elapsed_ms
+        self.last_ms = elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+
+    def snapshot(self) -> dict:
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "avg_ms": round(self.total_ms / self.count, 2) if self.count else 0.0,
+            "max_ms": round(self.max_ms, 2),
+            "last_ms": round(self.last_ms, 2),
+        }
+
+class BackgroundWorker:
+    """One long-running asyncio task, started at app startup and cancelled at shutdown.
+
+    Subclasses implement ``_run``; loops that poll call ``_sleep`` between
+    passes so that ``wake()`` cuts the wait short. ``_backoff`` is the
+    exponential retry delay for subclasses that set ``base_backoff`` and
+    ``max_backoff``.
+    """
+
+    base_backoff = 0.0
+    max_backoff = 0.0
+
+    def __init__(self):
+        self._wake = asyncio.Event()
+        self._task = None
+
+    def wake(self):
+        self._wake.set()
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        task, self._task = self._task, None
+        # On Python < 3.12 wait_for can swallow a cancel that races the wake
+        # event, so repeat until it lands
+        while task is not None and not task.done():
+            task.cancel()
+            await asyncio.wait({task}, timeout=1)
+
+    async def _run(self):
+        raise NotImplementedError
+
+    async def _sleep(self, timeout: float):
+        try:
+            await asyncio.wait_for(self._wake.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            pass
+        self._wake.clear()
+
+    def _backoff(self, attempts: int) -> timedelta:
+        return timedelta(seconds=min(self.max_backoff, self.base_backoff * (2 ** attempts)))
+
+class DashboardOutbox(BackgroundWorker):
+    """Drains pending SOS mirror jobs from Mongo into Firestore.
+
+    Each SOS document carries its own outbox state, so there is exactly one
+    job per SOS id and later changes supersede earlier ones; a job is only
+    marked synced if its version did not move while the write was in flight.
+    Writes are batched, run off the event loop and retried with exponential
+    backoff. Firestore writes are idempotent, so a job that is retried after
+    a crash mid-commit just rewrites the same state.
+    """
+
+    def __init__(self, batch_size: int, poll_interval: float, base_backoff: float, max_backoff: float):
+        super().__init__()
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.synced = 0
+        self.failed_batches = 0
+        self.latency = {op: OpLatency() for op in ("batch_commit", "document_update", "document_set")}
+        self.lag = {kind: OpLatency() for kind in ("create", "update")}
+
+    async def _run(self):
+        while True:
+            try:
+                drained = await self.drain_once()
+            except Exception as e:
+                logger.error(f"Dashboard outbox drain failed: {e}")
+                drained = 0
+            if drained >= self.batch_size:
+                continue
+            await self._sleep(self.poll_interval)
+
+    async def drain_once(self) -> int:
+        now = datetime.utcnow()
+        jobs = await db.sos_alerts.find(
+            {"mirror.pending": True, "mirror.next_attempt_at": {"$lte": now}},
+            {"_id": 0, "id": 1, "mirror": 1},
+        ).sort("mirror.next_attempt_at", 1).to_list(self.batch_size)
+        if not jobs:
+            return 0
+        # Every path below reports to the breaker, so this may take the probe
+        fs = get_firestore_client(probe=True)
+        if fs is None:
+            return 0
+
+        batch = fs.batch()
+        for job in jobs:
+            ref = fs.collection("alerts").document(job["id"])
+            if self._is_created(job):
+                batch.update(ref, job["mirror"]["patch"])
+            else:
+                batch.set(ref, job["mirror"]["payload"], merge=True)
+        try:
+            await self._timed("batch_commit", batch.commit)
+        except NotFound:
+            # A patch targeted a document the Dashboard already removed;
+            # replay individually and let the missing ones drop
+            await self._write_individually(fs, jobs)
+        except Exception as e:
+            self.failed_batches += 1
+            dashboard_breaker.record_failure(e)
+            logger.error(f"Firestore mirror batch of {len(jobs)} failed: {e}")
+            await db.sos_alerts.bulk_write([
+                UpdateOne(
+                    {"id": job["id"], "mirror.version": job["mirror"]["version"]},
+                    {
+                        "$inc": {"mirror.attempts": 1},
+                        "$set": {"mirror.next_attempt_at": now + self._backoff(job["mirror"]["attempts"])},
+                    },
+                )
+                for job in jobs
+            ], ordered=False)
+            return 0
+
+        await db.sos_alerts.bulk_write([
+            UpdateOne(
+                {"id": job["id"], "mirror.version": job["mirror"]["version"]},
+                {"$set": {
+                    "mirror.pending": False,
+                    "mirror.synced_version": job["mirror"]["version"],
+                    "mirror.attempts": 0,
+                }},
+            )
+            for job in jobs
+        ], ordered=False)
+        dashboard_breaker.record_success()
+        synced_at = datetime.utcnow()
+        for job in jobs:
+            kind = "update" if self._is_created(job) else "create"
+            changed_at = job["mirror"].get("changed_at") or synced_at
+            self.lag[kind].record((synced_at - changed_at).total_seconds() * 1000)
+        self.synced += len(jobs)
+        logger.info(f"Mirrored {len(jobs)} SOS alert(s) to Firestore")
+        return len(jobs)
+
+    @staticmethod
+    def _is_created(job: dict) -> bool:
+        # Documents from before the outbox have no synced_version but were
+        # mirrored inline at creation time
+        return job["mirror"].get("synced_version", 1) > 0 and "patch" in job["mirror"]
+
+    async def _timed(self, op: str, fn, *args):
+        start = time.perf_counter()
+        ok = False
+        try:
+            result = await asyncio.to_thread(fn, *args)
+            ok = True
+            return result
+        finally:
+            self.latency[op].record((time.perf_counter() - start) * 1000, ok)
+
+    async def _write_individually(self, fs, jobs: List[dict]):
+        for job in jobs:
+            ref = fs.collection("alerts").document(job["id"])
+            try:
+                if self._is_created(job):
+                    await self._timed("document_update", ref.update, job["mirror"]["patch"])
+                else:
+                    await self._timed("document_set", ref.set, job["mirror"]["payload"], True)
+            except NotFound:
+                logger.info(f"Firestore alert {job['id']} no longer exists; dropping mirror update")
+
+    def stats(self) -> dict:
+        return {
+            "synced": self.synced,
+            "failed_batches": self.failed_batches,
+            "firestore_latency": {op: stat.snapshot() for op, stat in self.latency.items()},
+            "sync_lag": {kind: stat.snapshot() for kind, stat in self.lag.items()},
+        }
+
+dashboard_outbox = DashboardOutbox(
+    batch_size=int(os.environ.get('DASHBOARD_OUTBOX_BATCH_SIZE', '200')),
+    poll_interval=float(os.environ.get('DASHBOARD_OUTBOX_POLL_SECONDS', '5')),
+    base_backoff=float(os.environ.get('DASHBOARD_OUTBOX_BACKOFF_SECONDS', '1')),
+    max_backoff=float(os.environ.get('DASHBOARD_OUTBOX_MAX_BACKOFF_SECONDS', '300')),
+)
+
+# ==================== PUSH ====================
+
+class PushSubscriber:
+    """One streaming connection: a bounded queue of pre-serialized events."""
+
+    def __init__(self, topics: List[str], queue_size: int):
+        self.topics = topics
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.overflowed = False
+
+    def offer(self, message: str) -> bool:
+        if self.overflowed:
+            return False
+        try:
+            self.queue.put_nowait(message)
+            return True
+        except asyncio.QueueFull:
+            # Slow consumer: stop feeding it and let the stream close so the
+            # client reconnects and resyncs over REST instead of lagging
+            self.overflowed = True
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(None)
+            return False
+
+    def close(self):
+        # None is the end-of-stream marker; offer() degrades to it when full
+        self.offer(None)
+
+class PushHub:
+    """In-process pub/sub fanning events out to WebSocket and SSE streams.
+
+    Topics are ``alerts`` for campus broadcasts, ``user:<id>`` for a
+    student's own SOS/escort/walk state and ``walk:<id>`` for share-link
+    watchers of one Friend Walk. Each event is serialized once per
+    publish regardless of the number of subscribers.
+    """
+
+    def __init__(self, queue_size: int, heartbeat_interval: float):
+        self.queue_size = queue_size
+        self.heartbeat_interval = heartbeat_interval
+        self._topics = {}
+        self.published = 0
+        self.delivered = 0
+        self.overflows = 0
+
+    def subscribe(self, topics: List[str]) -> PushSubscriber:
+        subscriber = PushSubscriber(topics, self.queue_size)
+        for topic in topics:
+            self._topics.setdefault(topic, set()).add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: PushSubscriber):
+        for topic in subscriber.topics:
+            subscribers = self._topics.get(topic)
+            if subscribers is not None:
+                subscribers.discard(subscriber)
+                if not subscribers:
+                    del self._topics[topic]
+
+    def publish(self, topic: str, event_type: str, data: dict):
+        subscribers = self._topics.get(topic)
+        self.published += 1
+        if not subscribers:
+            return
+        message = json.dumps(jsonable_encoder({"type": event_type, "data": data}))
+        for subscriber in list(subscribers):
+            if subscriber.offer(message):
+                self.delivered += 1
+            elif subscriber.overflowed:
+                self.overflows += 1
+                self.unsubscribe(subscriber)
+
+    def publish_user(self, user_id: str, event_type: str, data: dict):
+        self.publish(f"user:{user_id}", event_type, data)
+
+    def has_subscribers(self, topic: str) -> bool:
+        return topic in self._topics
+
+    def close_topic(self, topic: str):
+        """End every stream on ``topic`` once it has drained what is queued."""
+        for subscriber in list(self._topics.get(topic, ())):
+            subscriber.close()
+            self.unsubscribe(subscriber)
+
+    async def next_message(self, subscriber: PushSubscriber, timeout: Optional[float] = None) -> Optional[str]:
+        """Next event, "" on heartbeat timeout, None when the stream must close."""
+        if timeout is None:
+            timeout = self.heartbeat_interval
+        try:
+            return await asyncio.wait_for(subscriber.queue.get(), timeout=timeout)
+        except asyncio.TimeoutError:
+            return ""
+
+    def stats(self) -> dict:
+        connections = set()
+        for subscribers in self._topics.values():
+            connections.update(subscribers)
+        return {
+            "connections": len(connections),
+            "topics": len(self._topics),
+            "published": self.published,
+            "delivered": self.delivered,
+            "overflows": self.overflows,
+        }
+
+push_hub = PushHub(
+    queue_size=int(os.environ.get('PUSH_QUEUE_SIZE', '64')),
+    heartbeat_interval=float(os.environ.get('PUSH_HEARTBEAT_SECONDS', '20')),
+)
+
+def _stream_topics(user: dict) -> List[str]:
+    return ["alerts", f"user:{user['id']}"]
+
+async def _stop_reader(reader: asyncio.Task):
+    """Cancel a WebSocket drain task and retrieve its outcome (usually a disconnect)."""
+    reader.cancel()
+    await asyncio.gather(reader, return_exceptions=True)
+
+@api_router.post("/events/ticket")
+async def create_event_ticket(current_user: dict = Depends(get_current_user)):
+    """Single-purpose ticket for opening /api/events or /api/ws from a URL."""
+    return {"ticket": create_stream_ticket(current_user["id"]), "expires_in": STREAM_TICKET_SECONDS}
+
+@api_router.get("/events")
+async def event_stream(request: Request, current_user: dict = Depends(get_stream_user)):
+    """Server-Sent Events stream of alert broadcasts and the caller's own state changes."""
+    subscriber = push_hub.subscribe(_stream_topics(current_user))
+
+    async def generate():
+        try:
+            yield "retry: 5000\n\n"
+            while True:
+                message = await push_hub.next_message(subscriber)
+                if message is None:
+                    break
+                if message == "":
+                    if await request.is_disconnected():
+                        break
+                    yield ": ping\n\n"
+                    continue
+                yield f"data: {message}\n\n"
+        finally:
+            push_hub.unsubscribe(subscriber)
+
+    return StreamingResponse(
+        generate(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@api_router.websocket("/ws")
+async def websocket_stream(websocket: WebSocket, ticket: Optional[str] = None):
+    """WebSocket variant of /api/events; authenticate with ?ticket=."""
+    try:
+        user = await resolve_token_user(ticket or "", scope=STREAM_TICKET_SCOPE)
+    except HTTPException:
+        await websocket.close(code=4401)
+        return
+    await websocket.accept()
+    subscriber = push_hub.subscribe(_stream_topics(user))
+
+    async def drain_client():
+        # Inbound frames are ignored; this only notices the client leaving
+        while True:
+            await websocket.receive_text()
+
+    reader = asyncio.create_task(drain_client())
+    try:
+        while not reader.done():
+            message = await push_hub.next_message(subscriber)
+            if message is None:
+                await websocket.close(code=1013, reason="slow consumer")
+                break
+            await websocket.send_text(message or '{"type": "ping"}')
+    except (WebSocketDisconnect, RuntimeError):
+        pass
+    finally:
+        await _stop_reader(reader)
+        push_hub.unsubscribe(subscriber)
+
+# ==================== NOTIFICATIONS ====================
+
+class NotificationTransport(ABC):
+    """Delivers a text message on one channel. ``send`` raises on failure."""
+
+    channel = "sms"
+
+    @abstractmethod
+    async def send(self, address: str, message: str):
+        ...
+
+    async def close(self):
+        """Release connections; called once on shutdown."""
+
+class LogTransport(NotificationTransport):
+    """Writes messages to the server log; the default when no gateway is configured."""
+
+    def __init__(self, channel: str = "sms"):
+        self.channel = channel
+
+    async def send(self, address: str, message: str):
+        logger.info(f"[{self.channel} -> {address}] {message}")
+
+class FileTransport(NotificationTransport):
+    """Appends one JSON line per message to a local file."""
+
+    def __init__(self, path: str, channel: str = "sms"):
+        self.path = path
+        self.channel = channel
+
+    def _append(self, line: str):
+        with open(self.path, "a") as f:
+            f.write(line + "\n")
+
+    async def send(self, address: str, message: str):
+        line = json.dumps({
+            "channel": self.channel,
+            "to": address,
+            "message": message,
+            "sent_at": datetime.utcnow().isoformat() + "Z",
+        })
+        await asyncio.to_thread(self._append, line)
+
+class MemoryTransport(NotificationTransport):
+    """Keeps sent messages in a list; addresses in ``fail_addresses`` raise."""
+
+    def __init__(self, channel: str = "sms", latency_ms: float = 0.0):
+        self.channel = channel
+        self.latency_ms = latency_ms
+        self.sent = []
+        self.fail_addresses = set()
+
+    async def send(self, address: str, message: str):
+        if self.latency_ms:
+            await asyncio.sleep(self.latency_ms / 1000.0)
+        if address in self.fail_addresses:
+            raise RuntimeError(f"Delivery to {address} refused")
+        self.sent.append((address, message))
+
+class WebhookTransport(NotificationTransport):
+    """POSTs {"channel", "to", "message"} to an SMS/email/push gateway."""
+
+    def __init__(self, url: str, token: Optional[str] = None, channel: str = "sms", timeout: float = 10.0):
+        import httpx
+        self.url = url
+        self.channel = channel
+        headers = {"Authorization": f"Bearer {token}"} if token else {}
+        self._client = httpx.AsyncClient(timeout=timeout, headers=headers)
+
+    async def send(self, address: str, message: str):
+        response = await self._client.post(self.url, json={"channel": self.channel, "to": address, "message": message})
+        response.raise_for_status()
+
+    async def close(self):
+        await self._client.aclose()
+
+def _init_notification_transports() -> dict:
+    kind = os.environ.get('NOTIFY_TRANSPORT', 'log')
+    if kind == 'webhook':
+        transport = WebhookTransport(os.environ['NOTIFY_WEBHOOK_URL'], os.environ.get('NOTIFY_WEBHOOK_TOKEN'))
+    elif kind == 'file':
+        transport = FileTransport(os.environ.get('NOTIFY_FILE_PATH', str(ROOT_DIR / 'notifications.log')))
+    elif kind == 'memory':
+        transport = MemoryTransport(latency_ms=float(os.environ.get('NOTIFY_MEMORY_LATENCY_MS', '0')))
+    else:
+        transport = LogTransport()
+    return {transport.channel: transport}
+
+def new_notification_state(contacts: List[dict], message: str, now: datetime) -> tuple:
+    """(notify, notifications) fields embedded in the document that triggered them.
+
+    One entry per trusted contact; contacts are reached by SMS on their phone.
+    """
+    notifications = [
+        {
+            "contact_id": contact["id"],
+            "name": contact["name"],
+            "channel": "sms",
+            "address": contact["phone"],
+            "status": "pending",
+            "attempts": 0,
+            "last_error": None,
+            "delivered_at": None,
+        }
+        for contact in contacts
+    ]
+    notify = {"pending": bool(notifications), "next_attempt_at": now, "message": message}
+    return notify, notifications
+
+def sos_notification_message(user_name: str, lat: float, lng: float) -> str:
+    return (
+        f"Acadia Safe: {user_name} triggered an SOS alert at "
+        f"https://maps.google.com/?q={lat:.5f},{lng:.5f} - Campus Security has been notified."
+    )
+
+def walk_overdue_message(user_name: str, end_time: datetime, lat: float, lng: float) -> str:
+    return (
+        f"Acadia Safe: {user_name}'s Friend Walk was due to end at {end_time:%H:%M} UTC and they "
+        f"have not checked in. Last known location: https://maps.google.com/?q={lat:.5f},{lng:.5f}"
+    )
+
+# Collections whose documents carry notify/notifications state, and the
+# prefix used for their push events
+NOTIFICATION_SOURCES = {"sos_alerts": "sos", "friend_walks": "walk"}
+
+class NotificationDispatcher(BackgroundWorker):
+    """Sends SOS and overdue-walk notifications to trusted contacts in the background.
+
+    Recipients are stored on the triggering document, so the request path
+    stays a single write and nothing is lost if the process restarts. The worker
+    claims a document by pushing its ``notify.next_attempt_at`` out by
+    ``lease``, which keeps two workers from messaging the same contacts at
+    once. Sends for all recipients run concurrently, bounded by a shared
+    semaphore; each result is written back to that recipient's entry and
+    failed ones are retried with exponential backoff up to ``max_attempts``.
+    """
+
+    def __init__(self, transports: dict, concurrency: int, max_attempts: int, poll_interval: float,
+                 base_backoff: float, max_backoff: float, lease: float):
+        super().__init__()
+        self.transports = transports
+        self.concurrency = concurrency
+        self.max_attempts = max_attempts
+        self.poll_interval = poll_interval
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.lease = lease
+        self.delivered = 0
+        self.failed = 0
+        self.retried = 0
+        self.latency = {}
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._in_flight = set()
+
+    async def stop(self):
+        await super().stop()
+        for task in list(self._in_flight):
+            task.cancel()
+        await asyncio.gather(*self._in_flight, return_exceptions=True)
+
+    async def _run(self):
+        while True:
+            try:
+                while len(self._in_flight) < self.concurrency:
+                    claimed = await self._claim()
+                    if claimed is None:
+                        break
+                    task = asyncio.create_task(self._deliver(*claimed))
+                    self._in_flight.add(task)
+                    task.add_done_callback(self._finished)
+            except Exception as e:
+                logger.error(f"Notification dispatch failed: {e}")
+            await self._sleep(self.poll_interval)
+
+    def _finished(self, task):
+        self._in_flight.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            # The claim lease expires and the alert is picked up again
+            logger.error(f"Notification delivery failed: {task.exception()}")
+        # A slot opened up; look for more claimable alerts
+        self._wake.set()
+
+    async def _claim(self) -> Optional[tuple]:
+        """(collection name, document) for the next due document, SOS alerts first."""
+        now = datetime.utcnow()
+        for collection_name in NOTIFICATION_SOURCES:
+            doc = await db[collection_name].find_one_and_update(
+                {"notify.pending": True, "notify.next_attempt_at": {"$lte": now}},
+                {"$set": {"notify.next_attempt_at": now + timedelta(seconds=self.lease)}},
+                projection={"_id": 0, "id": 1, "user_id": 1, "notify.message": 1, "notifications": 1},
+                sort=[("notify.next_attempt_at", ASCENDING)],
+            )
+            if doc is not None:
+                return collection_name, doc
+        return None
+
+    async def _deliver(self, collection_name: str, doc: dict):
+        message = doc["notify"]["message"]
+        due = [n for n in doc.get("notifications", []) if n["status"] in ("pending", "retrying")]
+        outcomes = await asyncio.gather(*(self._send_one(collection_name, doc, entry, message) for entry in due))
+        retry_in = [self._backoff(entry["attempts"]) for entry, status in zip(due, outcomes) if status == "retrying"]
+        if retry_in:
+            update = {"notify.next_attempt_at": datetime.utcnow() + min(retry_in)}
+        else:
+            update = {"notify.pending": False}
+        await db[collection_name].update_one({"id": doc["id"]}, {"$set": update})
+
+    async def _send_one(self, collection_name: str, doc: dict, entry: dict, message: str) -> str:
+        transport = self.transports.get(entry["channel"])
+        attempts = entry["attempts"] + 1
+        error = None
+        async with self._semaphore:
+            start = time.perf_counter()
+            try:
+                if transport is None:
+                    raise RuntimeError(f"No transport for channel {entry['channel']}")
+                await transport.send(entry["address"], message)
+            except Exception as e:
+                error = str(e) or e.__class__.__name__
+            self.latency.setdefault(entry["channel"], OpLatency()).record(
+                (time.perf_counter() - start) * 1000, error is None
+            )
+
+        now = datetime.utcnow()
+        if error is None:
+            status = "delivered"
+            self.delivered += 1
+        elif attempts >= self.max_attempts:
+            status = "failed"
+            self.failed += 1
+            logger.error(f"{collection_name} {doc['id']} notification to contact {entry['contact_id']} failed: {error}")
+        else:
+            status = "retrying"
+            self.retried += 1
+        await db[collection_name].update_one(
+            {"id": doc["id"], "notifications.contact_id": entry["contact_id"]},
+            {"$set": {
+                "notifications.$.status": status,
+                "notifications.$.attempts": attempts,
+                "notifications.$.last_error": error,
+                "notifications.$.delivered_at": now if error is None else None,
+            }},
+        )
+        kind = NOTIFICATION_SOURCES[collection_name]
+        push_hub.publish_user(doc["user_id"], f"{kind}.notification", {
+            f"{kind}_id": doc["id"],
+            "contact_id": entry["contact_id"],
+            "status": status,
+            "attempts": attempts,
+        })
+        entry["attempts"] = attempts
+        return status
+
+    def stats(self) -> dict:
+        return {
+            "delivered": self.delivered,
+            "failed": self.failed,
+            "retried": self.retried,
+            "in_flight": len(self._in_flight),
+            "latency": {channel: stat.snapshot() for channel, stat in self.latency.items()},
+        }
+
+notification_dispatcher = NotificationDispatcher(
+    transports=_init_notification_transports(),
+    concurrency=int(os.environ.get('NOTIFY_CONCURRENCY', '16')),
+    max_attempts=int(os.environ.get('NOTIFY_MAX_ATTEMPTS', '5')),
+    poll_interval=float(os.environ.get('NOTIFY_POLL_SECONDS', '5')),
+    base_backoff=float(os.environ.get('NOTIFY_BASE_BACKOFF_SECONDS', '2')),
+    max_backoff=float(os.environ.get('NOTIFY_MAX_BACKOFF_SECONDS', '120')),
+    lease=float(os.environ.get('NOTIFY_LEASE_SECONDS', '60')),
+)
+
+# ==================== IDEMPOTENCY ====================
+
+class IdempotencyStore:
+    """Replays the first response for a repeated Idempotency-Key.
+
+    Keys are scoped to the user and route. Completed responses are kept in
+    an in-process LRU window, so a retry storm against one worker costs no
+    database round trip at all, and in the ``idempotency_keys`` collection
+    (expired by a TTL index) so a retry that lands on another worker or
+    after a restart is still answered from the stored response. Concurrent
+    duplicates in this process wait for the first one; on another worker
+    they get a 409 until it finishes. A request that fails releases its key
+    so the client can retry. A key still in progress ``abandon_after``
+    seconds after it started (its worker crashed, or the final write
+    failed) is taken over by the next retry, so an SOS retry is never
+    locked out until the record expires.
+    """
+
+    def __init__(self, max_entries: int, memory_ttl: float, abandon_after: float):
+        self.max_entries = max_entries
+        self.memory_ttl = memory_ttl
+        self.abandon_after = timedelta(seconds=abandon_after)
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self.replayed_memory = 0
+        self.replayed_stored = 0
+        self.executed = 0
+        self.conflicts = 0
+        self.taken_over = 0
+
+    @staticmethod
+    def fingerprint(body: BaseModel) -> str:
+        return hashlib.sha256(json.dumps(jsonable_encoder(body), sort_keys=True).encode()).hexdigest()
+
+    def _remember(self, scoped_key: str, fingerprint: str, value):
+        self._entries[scoped_key] = (fingerprint, value, time.monotonic() + self.memory_ttl)
+        self._entries.move_to_end(scoped_key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _recall(self, scoped_key: str):
+        entry = self._entries.get(scoped_key)
+        if entry is None:
+            return None
+        if entry[2] <= time.monotonic():
+            del self._entries[scoped_key]
+            return None
+        return entry
+
+    @staticmethod
+    def _check(fingerprint: str, stored: str):
+        if fingerprint != stored:
+            raise HTTPException(status_code=422, detail="Idempotency-Key was already used with a different request")
+
+    @staticmethod
+    def _replay(response: dict) -> JSONResponse:
+        return JSONResponse(content=response, headers={"Idempotent-Replayed": "true"})
+
+    async def _take_over(self, scoped_key: str, now: datetime) -> bool:
+        """Claim an in-progress key whose owner started over ``abandon_after`` ago."""
+        cutoff = now - self.abandon_after
+        result = await db.idempotency_keys.update_one(
+            {"_id": scoped_key, "status": "in_progress", "$or": [
+                {"started_at": {"$lt": cutoff}},
+                # Records written before started_at existed
+                {"started_at": {"$exists": False}, "created_at": {"$lt": cutoff}},
+            ]},
+            {"$set": {"started_at": now}},
+        )
+        return result.modified_count == 1
+
+    async def run(self, user_id: str, route: str, key: Optional[str], body: BaseModel, handler):
+        if key is None:
+            return await handler()
+        if not key or len(key) > 255:
+            raise HTTPException(status_code=400, detail="Idempotency-Key must be 1-255 characters")
+        scoped_key = f"{route}:{user_id}:{key}"
+        fingerprint = self.fingerprint(body)
+
+        entry = self._recall(scoped_key)
+        if entry is not None:
+            self._check(fingerprint, entry[0])
+            if isinstance(entry[1], asyncio.Future):
+                response = await asyncio.shield(entry[1])
+            else:
+                response = entry[1]
+            self.replayed_memory += 1
+            return self._replay(response)
+
+        pending = asyncio.get_running_loop().create_future()
+        self._remember(scoped_key, fingerprint, pending)
+        try:
+            now = datetime.utcnow()
+            try:
+                await db.idempotency_keys.insert_one({
+                    "_id": scoped_key,
+                    "fingerprint": fingerprint,
+                    "status": "in_progress",
+                    "created_at": now,
+                    "started_at": now,
+                })
+            except DuplicateKeyError:
+                stored = await db.idempotency_keys.find_one({"_id": scoped_key})
+                if stored is not None:
+                    self._check(fingerprint, stored["fingerprint"])
+                if stored is not None and stored.get("status") == "done":
+                    self._remember(scoped_key, fingerprint, stored["response"])
+                    pending.set_result(stored["response"])
+                    self.replayed_stored += 1
+                    return self._replay(stored["response"])
+                if stored is None or not await self._take_over(scoped_key, now):
+                    self.conflicts += 1
+                    raise HTTPException(
+                        status_code=409,
+                        detail="A request with this Idempotency-Key is still in progress",
+                        headers={"Retry-After": "1"},
+                    )
+                self.taken_over += 1
+                logger.warning(f"Idempotency-Key {scoped_key} was abandoned in progress; running it again")
+
+            try:
+                result = await handler()
+            except BaseException:
+                await db.idempotency_keys.delete_one({"_id": scoped_key, "status": "in_progress"})
+                raise
+            response = jsonable_encoder(result)
+            await db.idempotency_keys.update_one(
+                {"_id": scoped_key},
+                {"$set": {"status": "done", "response": response}},
+            )
+            self.executed += 1
+            self._remember(scoped_key, fingerprint, response)
+            pending.set_result(response)
+            return result
+        except BaseException as e:
+            if not pending.done():
+                # Waiters see the same failure; the key is free for a fresh attempt
+                self._entries.pop(scoped_key, None)
+                pending.set_exception(e if isinstance(e, Exception) else HTTPException(status_code=503))
+                pending.exception()
+            raise
+
+    def stats(self) -> dict:
+        return {
+            "window_size": len(self._entries),
+            "executed": self.executed,
+            "replayed_memory": self.replayed_memory,
+            "replayed_stored": self.replayed_stored,
+            "conflicts": self.conflicts,
+            "taken_over": self.taken_over,
+        }
+
+idempotency_store = IdempotencyStore(
+    max_entries=int(os.environ.get('IDEMPOTENCY_MEMORY_MAX_ENTRIES', '10000')),
+    memory_ttl=float(os.environ.get('IDEMPOTENCY_MEMORY_SECONDS', '600')),
+    abandon_after=float(os.environ.get('IDEMPOTENCY_ABANDON_SECONDS', '30')),
+)
+
+IDEMPOTENCY_TTL_SECONDS = int(os.environ.get('IDEMPOTENCY_TTL_SECONDS', '86400'))
+
 # ==================== SOS ALERTS ====================
 
 @api_router.post("/sos", response_model=SOSAlert)
-async def create_sos_alert(alert: SOSAlertCreate, current_user: dict = Depends(get_current_user)):
+async def create_sos_alert(
+    alert: SOSAlertCreate,
+    current_user: dict = Depends(get_current_user),
+    idempotency_key: Optional[str] = Header(None),
+):
+    return await idempotency_store.run(
+        current_user["id"], "sos", idempotency_key, alert,
+        lambda: insert_sos_alert(alert, current_user),
+    )
+
+async def insert_sos_alert(alert: SOSAlertCreate, current_user: dict) -> SOSAlert:
     sos_id = str(uuid.uuid4())
     now = datetime.utcnow()
     sos_doc = {
@@ -381,74 +1633,547 @@ async def create_sos_alert(alert: SOSAlertCreate, current_user: dict = Depends(g
         "location_lng": alert.location_lng,
         "alert_type": alert.alert_type,
         "status": "active",
-        "created_at": now
+        "created_at": now,
+        # Outbox entry for the Firestore mirror, drained by dashboard_outbox so
+        # the student path stays a single Mongo insert
+        "mirror": new_mirror_state({
+            "studentName": current_user["full_name"],
+            "studentEmail": current_user.get("email", ""),
+            "studentPhone": current_user["phone"],
+            "location": f"{alert.location_lat:.4f}, {alert.location_lng:.4f}",
+            "latitude": alert.location_lat,
+            "longitude": alert.location_lng,
+            "status": "new",
+            "createdAt": now.isoformat() + "Z",
+            "alertType": alert.alert_type or "sos",
+            "campusSosId": sos_id,
+            "assignedTo": None,
+            "assignedToName": None,
+        }, now),
     }
+    # Trusted contacts are messaged by notification_dispatcher, not inline
+    sos_doc["notify"], sos_doc["notifications"] = new_notification_state(
+        current_user.get("trusted_contacts", []),
+        sos_notification_message(current_user["full_name"], alert.location_lat, alert.location_lng),
+        now,
+    )
     await db.sos_alerts.insert_one(sos_doc)
     logger.info(f"SOS Alert created: {sos_id} by {current_user['full_name']}")
+    dashboard_outbox.wake()
+    notification_dispatcher.wake()
 
-    # Mirror to Firestore so Dashboard sees it in real-time
-    try:
-        fs = get_firestore_client()
-        if fs is not None:
-            firestore_alert = {
-                "studentName": current_user["full_name"],
-                "studentEmail": current_user.get("email", ""),
-                "studentPhone": current_user["phone"],
-                "location": f"{alert.location_lat:.4f}, {alert.location_lng:.4f}",
-                "latitude": alert.location_lat,
-                "longitude": alert.location_lng,
-                "status": "new",
-                "createdAt": now.isoformat() + "Z",
-                "alertType": alert.alert_type or "sos",
-                "campusSosId": sos_id,
-                "assignedTo": None,
-                "assignedToName": None,
-            }
-            fs.collection("alerts").document(sos_id).set(firestore_alert)
-            logger.info(f"SOS {sos_id} mirrored to Firestore")
-    except Exception as e:
-        logger.error(f"Firestore mirror failed for SOS {sos_id}: {e}")
-        # Non-blocking — student still gets success response
-
-    return SOSAlert(**sos_doc)
+    sos_alert = SOSAlert(**sos_doc)
+    push_hub.publish_user(current_user["id"], "sos.created", sos_alert.dict())
+    return sos_alert
 
 @api_router.put("/sos/{sos_id}/cancel")
 async def cancel_sos_alert(sos_id: str, current_user: dict = Depends(get_current_user)):
-    result = await db.sos_alerts.update_one(
-        {"id": sos_id, "user_id": current_user["id"]},
-        {"$set": {"status": "cancelled"}}
+    # Queue the resolved status for the Firestore mirror in the same write; the
+    # outbox coalesces it with a not-yet-mirrored create into one final state.
+    # Clearing notify.pending there too stops contacts being told about an
+    # SOS that no longer stands.
+    now = datetime.utcnow()
+    resolved = {
+        "status": "resolved",
+        "resolvedByCampusApp": True,
+        "updatedAt": now.isoformat() + "Z",
+    }
+    alert = await db.sos_alerts.find_one_and_update(
+        {"id": sos_id, "user_id": current_user["id"], "status": "active"},
+        {
+            "$set": {
+                "status": "cancelled",
+                "notify.pending": False,
+                **mirror_change_set(resolved, now),
+            },
+            "$inc": {"mirror.version": 1},
+        },
+        projection={"_id": 0, "mirror": 0, "notify": 0, "notifications": 0},
+        return_document=ReturnDocument.AFTER,
     )
-    if result.modified_count == 0:
-        raise HTTPException(status_code=404, detail="SOS alert not found")
-
-    # Sync resolved status to Firestore so Dashboard updates in real-time
-    try:
-        fs = get_firestore_client()
-        if fs is not None:
-            doc_ref = fs.collection("alerts").document(sos_id)
-            if doc_ref.get().exists:
-                doc_ref.update({
-                    "status": "resolved",
-                    "resolvedByCampusApp": True,
-                    "updatedAt": datetime.utcnow().isoformat() + "Z"
-                })
-    except Exception as e:
-        logger.error(f"Firestore cancel sync failed for SOS {sos_id}: {e}")
+    if alert is None:
+        raise await transition_error("sos_alerts", sos_id, current_user["id"], "SOS alert")
+    dashboard_outbox.wake()
+    sos_trail.forget(sos_id)
+    push_hub.publish_user(current_user["id"], "sos.cancelled", {"id": sos_id, "status": "cancelled"})
 
-    return {"message": "SOS alert cancelled"}
+    return {"message": "SOS alert cancelled", "alert": SOSAlert(**alert)}
 
 @api_router.get("/sos/active")
 async def get_active_sos(current_user: dict = Depends(get_current_user)):
     sos = await db.sos_alerts.find_one({
         "user_id": current_user["id"],
         "status": "active"
-    }, {"_id": 0})
+    }, {"_id": 0, "mirror": 0, "notify": 0, "last_location": 0})
     return sos
 
-# ==================== INCIDENTS ====================
+@api_router.get("/sos/{sos_id}/notifications")
+async def get_sos_notifications(sos_id: str, current_user: dict = Depends(get_current_user)):
+    """Delivery state of each trusted-contact notification for one SOS alert."""
+    sos = await db.sos_alerts.find_one(
+        {"id": sos_id, "user_id": current_user["id"]},
+        {"_id": 0, "notifications": 1},
+    )
+    if not sos:
+        raise HTTPException(status_code=404, detail="SOS alert not found")
+    return sos.get("notifications", [])
+
+# ==================== SOS LOCATION TRAIL ====================
+
+class SOSTrailBuffer(BackgroundWorker):
+    """Collects SOS location pings in memory and writes them in batches.
+
+    Pings land in a per-alert buffer; one arriving within ``min_interval`` of
+    the previous buffered point replaces it instead of adding a row. Every
+    ``flush_interval`` (or sooner once ``batch_size`` points are waiting) the
+    buffers are written to the ``sos_trail`` time-series collection with one
+    bulk_write, and each moved alert gets one update of ``last_location`` on
+    its sos_alerts document. That update also queues the new position for the
+    Dashboard mirror, at most once per ``mirror_interval``. The newest point
+    per alert is kept in memory for dispatcher reads. Alert ownership is
+    cached for ``owner_ttl`` so steady pings do not each cost a lookup.
+    Points a failed flush could not write go back into the buffer, still
+    within ``max_buffered``. Alerts that stop reporting for ``idle_ttl``
+    (typically resolved from the dashboard) are swept from memory.
+    """
+
+    def __init__(self, flush_interval: float, batch_size: int, max_buffered: int,
+                 min_interval: float, mirror_interval: float, owner_ttl: float, idle_ttl: float):
+        super().__init__()
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.max_buffered = max_buffered
+        self.min_interval = timedelta(seconds=min_interval)
+        self.mirror_interval = timedelta(seconds=mirror_interval)
+        self.owner_ttl = owner_ttl
+        self.idle_ttl = timedelta(seconds=idle_ttl)
+        self.latest = {}
+        self.accepted = 0
+        self.coalesced = 0
+        self.dropped = 0
+        self.written = 0
+        self.flush_latency = OpLatency()
+        self._points = {}
+        self._buffered = 0
+        self._owners = {}
+        self._mirrored_at = {}
+
+    async def owner_of(self, sos_id: str) -> Optional[str]:
+        """user_id of an active alert, or None once it is no longer active."""
+        cached = self._owners.get(sos_id)
+        if cached is not None and cached[1] > time.monotonic():
+            return cached[0]
+        sos = await db.sos_alerts.find_one({"id": sos_id, "status": "active"}, {"_id": 0, "user_id": 1})
+        if sos is None:
+            self._owners.pop(sos_id, None)
+            return None
+        self._owners[sos_id] = (sos["user_id"], time.monotonic() + self.owner_ttl)
+        return sos["user_id"]
+
+    def add(self, sos_id: str, user_id: str, ping: SOSLocationPing):
+        now = datetime.utcnow()
+        recorded_at = ping.recorded_at or now
+        if recorded_at.tzinfo is not None:
+            recorded_at = recorded_at.astimezone(timezone.utc).replace(tzinfo=None)
+        recorded_at = min(recorded_at, now)
+        point = {
+            "ts": recorded_at,
+            "meta": {"sos_id": sos_id, "user_id": user_id},
+            "location_lat": ping.location_lat,
+            "location_lng": ping.location_lng,
+            "accuracy_m": ping.accuracy_m,
+        }
+        self.accepted += 1
+        latest = self.latest.get(sos_id)
+        if latest is None or recorded_at >= latest["ts"]:
+            self.latest[sos_id] = point
+
+        points = self._points.setdefault(sos_id, [])
+        if points and abs(recorded_at - points[-1]["ts"]) < self.min_interval:
+            points[-1] = point
+            self.coalesced += 1
+            return
+        if self._buffered >= self.max_buffered:
+            # Writes are falling behind; keep the latest position but shed trail detail
+            self.dropped += 1
+            return
+        points.append(point)
+        self._buffered += 1
+        if self._buffered >= self.batch_size:
+            self._wake.set()
+
+    def forget(self, sos_id: str):
+        """Stop serving an alert from memory once it is no longer active."""
+        self._owners.pop(sos_id, None)
+        self.latest.pop(sos_id, None)
+        self._mirrored_at.pop(sos_id, None)
+
+    def sweep(self):
+        """Forget alerts with nothing buffered and no ping for ``idle_ttl``."""
+        cutoff = datetime.utcnow() - self.idle_ttl
+        for sos_id in [sos_id for sos_id, point in self.latest.items() if point["ts"] < cutoff]:
+            if sos_id not in self._points:
+                self.forget(sos_id)
+        now = time.monotonic()
+        for sos_id in [sos_id for sos_id, (_, expires) in self._owners.items() if expires <= now]:
+            del self._owners[sos_id]
+
+    def _requeue(self, rows: List[dict]):
+        """Put unwritten points back ahead of newer ones, shedding the oldest past max_buffered."""
+        requeued = {}
+        for row in rows:
+            requeued.setdefault(row["meta"]["sos_id"], []).append(row)
+        for sos_id, group in requeued.items():
+            self._points[sos_id] = group + self._points.get(sos_id, [])
+            self._buffered += len(group)
+        excess = self._buffered - self.max_buffered
+        for group in self._points.values():
+            if excess <= 0:
+                break
+            # Each alert keeps at least its newest point
+            shed = min(excess, len(group) - 1)
+            del group[:shed]
+            excess -= shed
+            self._buffered -= shed
+            self.dropped += shed
+
+    async def stop(self):
+        await super().stop()
+        # Final flush so buffered trail points survive a clean shutdown
+        try:
+            await self.flush()
+        except Exception as e:
+            logger.error(f"Final SOS trail flush failed: {e}")
+
+    async def _run(self):
+        while True:
+            await self._sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"SOS trail flush failed: {e}")
+            self.sweep()
+
+    async def flush(self) -> int:
+        if not self._points:
+            return 0
+        points, self._points, self._buffered = self._points, {}, 0
+        rows = [point for group in points.values() for point in group]
+        now = datetime.utcnow()
+        updates = []
+        mirrored = False
+        for sos_id, group in points.items():
+            last = group[-1]
+            fields = {"last_location": {
+                "location_lat": last["location_lat"],
+                "location_lng": last["location_lng"],
+                "accuracy_m": last["accuracy_m"],
+                "recorded_at": last["ts"],
+            }}
+            update = {"$set": fields}
+            if now - self._mirrored_at.get(sos_id, datetime.min) >= self.mirror_interval:
+                self._mirrored_at[sos_id] = now
+                fields.update(mirror_change_set({
+                    "latitude": last["location_lat"],
+                    "longitude": last["location_lng"],
+                    "location": f"{last['location_lat']:.4f}, {last['location_lng']:.4f}",
+                    "updatedAt": now.isoformat() + "Z",
+                }, now))
+                update["$inc"] = {"mirror.version": 1}
+                mirrored = True
+            updates.append(UpdateOne({"id": sos_id, "status": "active"}, update))
+
+        start = time.perf_counter()
+        ok = False
+        try:
+            try:
+                await db.sos_trail.bulk_write([InsertOne(row) for row in rows], ordered=False)
+            except BulkWriteError as e:
+                self._requeue([rows[error["index"]] for error in e.details.get("writeErrors", [])])
+                raise
+            except Exception:
+                self._requeue(rows)
+                raise
+            await db.sos_alerts.bulk_write(updates, ordered=False)
+            ok = True
+        finally:
+            self.flush_latency.record((time.perf_counter() - start) * 1000, ok)
+        self.written += len(rows)
+        if mirrored:
+            dashboard_outbox.wake()
+        return len(rows)
+
+    def stats(self) -> dict:
+        return {
+            "tracked_alerts": len(self.latest),
+            "buffered": self._buffered,
+            "accepted": self.accepted,
+            "coalesced": self.coalesced,
+            "dropped": self.dropped,
+            "written": self.written,
+            "flush": self.flush_latency.snapshot(),
+        }
+
+sos_trail = SOSTrailBuffer(
+    flush_interval=float(os.environ.get('SOS_TRAIL_FLUSH_SECONDS', '1')),
+    batch_size=int(os.environ.get('SOS_TRAIL_BATCH_SIZE', '1000')),
+    max_buffered=int(os.environ.get('SOS_TRAIL_MAX_BUFFERED', '50000')),
+    min_interval=float(os.environ.get('SOS_TRAIL_MIN_INTERVAL_SECONDS', '0.5')),
+    mirror_interval=float(os.environ.get('SOS_TRAIL_MIRROR_SECONDS', '5')),
+    owner_ttl=float(os.environ.get('SOS_TRAIL_OWNER_TTL_SECONDS', '30')),
+    idle_ttl=float(os.environ.get('SOS_TRAIL_IDLE_SECONDS', '3600')),
+)
+
+SOS_TRAIL_RETENTION_DAYS = int(os.environ.get('SOS_TRAIL_RETENTION_DAYS', '30'))
+
+async def ensure_sos_trail_collection():
+    """Create sos_trail as a time-series collection (MongoDB 5.0+) if it does not exist."""
+    if "sos_trail" in await db.list_collection_names(filter={"name": "sos_trail"}):
+        return
+    try:
+        await db.create_collection(
+            "sos_trail",
+            timeseries={"timeField": "ts", "metaField": "meta", "granularity": "seconds"},
+            expireAfterSeconds=SOS_TRAIL_RETENTION_DAYS * 86400,
+        )
+    except OperationFailure as e:
+        logger.warning(f"Time-series collections unavailable ({e}); sos_trail will be a plain collection")
+
+@api_router.post("/sos/{sos_id}/location", status_code=202)
+async def ping_sos_location(sos_id: str, ping: SOSLocationPing, current_user: dict = Depends(get_current_user)):
+    """Record the student's position while an SOS is active; written in batches."""
+    owner = await sos_trail.owner_of(sos_id)
+    if owner is None or owner != current_user["id"]:
+        raise HTTPException(status_code=404, detail="Active SOS alert not found")
+    sos_trail.add(sos_id, owner, ping)
+    return {"status": "accepted"}
+
+@api_router.get("/sos/{sos_id}/location", response_model=SOSPosition)
+async def get_sos_position(sos_id: str, _: bool = Depends(require_responder)):
+    """Latest known position of an SOS, for dispatchers."""
+    latest = sos_trail.latest.get(sos_id)
+    if latest is not None:
+        return SOSPosition(
+            sos_id=sos_id,
+            location_lat=latest["location_lat"],
+            location_lng=latest["location_lng"],
+            accuracy_m=latest["accuracy_m"],
+            recorded_at=latest["ts"],
+            source="memory",
+        )
+    # Pings may have gone to another worker; fall back to the flushed position
+    sos = await db.sos_alerts.find_one(
+        {"id": sos_id},
+        {"_id": 0, "location_lat": 1, "location_lng": 1, "created_at": 1, "last_location": 1},
+    )
+    if not sos:
+        raise HTTPException(status_code=404, detail="SOS alert not found")
+    if sos.get("last_location"):
+        return SOSPosition(sos_id=sos_id, source="stored", **sos["last_location"])
+    return SOSPosition(
+        sos_id=sos_id,
+        location_lat=sos["location_lat"],
+        location_lng=sos["location_lng"],
+        recorded_at=sos["created_at"],
+        source="initial",
+    )
+
+# ==================== RESPONDER BOARD ====================
+
+class ResponderBoard:
+    """Active SOS alerts for security staff, fed by a change stream on sos_alerts.
+
+    Every board connection follows its own change stream, so a client that
+    reconnects with the last resume token it saw gets exactly the changes it
+    missed replayed from the oplog. Fresh connections (or ones whose token
+    has aged out of the oplog) get a snapshot of the active alerts, taken
+    after the stream is open so nothing falls between the two. Only fields
+    shown on the board are compared, so outbox and notification bookkeeping
+    writes do not turn into deltas.
+    """
+
+    FIELDS = ("id", "user_id", "user_name", "user_phone", "location_lat", "location_lng",
+              "alert_type", "status", "created_at", "last_location")
+    PIPELINE = [{"$match": {"operationType": {"$in": ["insert", "update", "replace", "delete", "invalidate"]}}}]
+
+    def __init__(self, snapshot_limit: int, max_await_ms: int, heartbeat_interval: float):
+        self.snapshot_limit = snapshot_limit
+        self.max_await_ms = max_await_ms
+        self.heartbeat_interval = heartbeat_interval
+        self.connections = 0
+        self.snapshots = 0
+        self.resumed = 0
+        self.resume_failures = 0
+        self.deltas = 0
+
+    @classmethod
+    def view(cls, doc: dict) -> dict:
+        return jsonable_encoder({field: doc.get(field) for field in cls.FIELDS})
+
+    @staticmethod
+    def encode_token(token: Optional[dict]) -> Optional[str]:
+        # Resume tokens are {"_data": "<hex>"}; clients only ever echo the string back
+        return token["_data"] if token else None
+
+    async def active(self) -> List[dict]:
+        docs = await db.sos_alerts.find(
+            {"status": "active"}, {"_id": 1, **{field: 1 for field in self.FIELDS}}
+        ).sort("created_at", ASCENDING).to_list(self.snapshot_limit)
+        return docs
+
+    async def open(self, resume_token: Optional[str] = None) -> tuple:
+        """(stream, first change or None); the stream is live once this returns."""
+        options = {"full_document": "updateLookup", "max_await_time_ms": self.max_await_ms}
+        if resume_token:
+            options["resume_after"] = {"_data": resume_token}
+        stream = db.sos_alerts.watch(self.PIPELINE, **options)
+        try:
+            first = await stream.try_next()
+        except Exception:
+            await stream.close()
+            raise
+        return stream, first
+
+    def delta(self, change: dict, shown: dict, object_ids: dict) -> Optional[dict]:
+        """Board message for one change event, or None if the board is unaffected.
+
+        ``shown`` maps alert id to the view last sent on this connection and
+        ``object_ids`` maps Mongo _id to alert id for resolving deletes.
+        """
+        token = self.encode_token(change["_id"])
+        operation = change["operationType"]
+        if operation == "delete":
+            sos_id = object_ids.pop(change["documentKey"]["_id"], None)
+            if sos_id is None:
+                return None
+            shown.pop(sos_id, None)
+            return {"type": "remove", "id": sos_id, "resume_token": token}
+        doc = change.get("fullDocument")
+        if doc is None:
+            # Deleted before the update could be looked up; the delete follows
+            return None
+        view = self.view(doc)
+        object_ids[doc["_id"]] = view["id"]
+        if view["status"] == "active":
+            if shown.get(view["id"]) == view:
+                return None
+            shown[view["id"]] = view
+            return {"type": "upsert", "alert": view, "resume_token": token}
+        status_changed = "status" in (change.get("updateDescription") or {}).get("updatedFields", {})
+        if shown.pop(view["id"], None) is None and not status_changed and operation != "replace":
+            return None
+        return {"type": "remove", "id": view["id"], "resume_token": token}
+
+    def stats(self) -> dict:
+        return {
+            "connections": self.connections,
+            "snapshots": self.snapshots,
+            "resumed": self.resumed,
+            "resume_failures": self.resume_failures,
+            "deltas": self.deltas,
+        }
+
+responder_board = ResponderBoard(
+    snapshot_limit=int(os.environ.get('RESPONDER_BOARD_LIMIT', '500')),
+    max_await_ms=1000,
+    heartbeat_interval=float(os.environ.get('PUSH_HEARTBEAT_SECONDS', '20')),
+)
+
+@api_router.get("/responders/sos")
+async def get_responder_board(_: bool = Depends(require_responder)):
+    """Active SOS alerts, oldest first."""
+    return [ResponderBoard.view(doc) for doc in await responder_board.active()]
+
+@api_router.websocket("/responders/sos/ws")
+async def responder_board_stream(websocket: WebSocket, resume_token: Optional[str] = None):
+    """Live SOS board: a snapshot (or a replay from ``resume_token``) followed by deltas.
+
+    Every message carries the resume token to reconnect with. Authenticate
+    with the X-Responder-Key header; the key is never read from the URL,
+    where access logs would record it.
+    """
+    if not responder_key_valid(websocket.headers.get("x-responder-key")):
+        await websocket.close(code=4401)
+        return
+    await websocket.accept()
+
+    async def drain_client():
+        while True:
+            await websocket.receive_text()
+
+    async def send(message: dict):
+        await websocket.send_text(json.dumps(jsonable_encoder(message)))
+
+    reader = asyncio.create_task(drain_client())
+    responder_board.connections += 1
+    stream = None
+    try:
+        shown, object_ids = {}, {}
+        first = None
+        if resume_token:
+            try:
+                stream, first = await responder_board.open(resume_token)
+                responder_board.resumed += 1
+                await send({"type": "resumed", "resume_token": resume_token})
+            except OperationFailure as e:
+                # Token is malformed or older than the oplog; start over from a snapshot
+                responder_board.resume_failures += 1
+                logger.info(f"Responder board resume failed ({e}); sending a fresh snapshot")
+        if stream is None:
+            stream, first = await responder_board.open()
+            docs = await responder_board.active()
+            for doc in docs:
+                object_ids[doc["_id"]] = doc["id"]
+            alerts = [ResponderBoard.view(doc) for doc in docs]
+            shown = {alert["id"]: alert for alert in alerts}
+            responder_board.snapshots += 1
+            token = first["_id"] if first is not None else stream.resume_token
+            await send({"type": "snapshot", "alerts": alerts, "resume_token": responder_board.encode_token(token)})
+
+        last_sent = time.monotonic()
+        change = first
+        while not reader.done():
+            if change is None:
+                change = await stream.try_next()
+            if change is not None:
+                if change["operationType"] == "invalidate":
+                    await websocket.close(code=1012, reason="sos_alerts stream invalidated")
+                    break
+                message = responder_board.delta(change, shown, object_ids)
+                change = None
+                if message is not None:
+                    responder_board.deltas += 1
+                    await send(message)
+                    last_sent = time.monotonic()
+            elif time.monotonic() - last_sent >= responder_board.heartbeat_interval:
+                await send({"type": "heartbeat", "resume_token": responder_board.encode_token(stream.resume_token)})
+                last_sent = time.monotonic()
+    except OperationFailure as e:
+        # Standalone mongod without a replica set has no change streams
+        logger.error(f"Responder board change stream failed: {e}")
+        await websocket.close(code=1011, reason="change stream unavailable")
+    except (WebSocketDisconnect, RuntimeError):
+        pass
+    finally:
+        await _stop_reader(reader)
+        responder_board.connections -= 1
+        if stream is not None:
+            await stream.close()
+
+# ==================== INCIDENTS ====================
 
 @api_router.post("/incidents", response_model=Incident)
-async def create_incident(incident: IncidentCreate, current_user: dict = Depends(get_current_user)):
+async def create_incident(
+    incident: IncidentCreate,
+    current_user: dict = Depends(get_current_user),
+    idempotency_key: Optional[str] = Header(None),
+):
+    return await idempotency_store.run(
+        current_user["id"], "incidents", idempotency_key, incident,
+        lambda: insert_incident(incident, current_user),
+    )
+
+async def insert_incident(incident: IncidentCreate, current_user: dict) -> Incident:
     incident_id = str(uuid.uuid4())
     incident_doc = {
         "id": incident_id,
@@ -467,6 +2192,7 @@ async def create_incident(incident: IncidentCreate, current_user: dict = Depends
     }
     await db.incidents.insert_one(incident_doc)
     logger.info(f"Incident reported: {incident_id}")
+    incident_points.add(incident_doc)
     return Incident(**incident_doc)
 
 @api_router.get("/incidents/my", response_model=List[Incident])
@@ -484,7 +2210,17 @@ async def get_incident(incident_id: str, current_user: dict = Depends(get_curren
 # ==================== ESCORT REQUESTS ====================
 
 @api_router.post("/escorts", response_model=EscortRequest)
-async def create_escort_request(request: EscortRequestCreate, current_user: dict = Depends(get_current_user)):
+async def create_escort_request(
+    request: EscortRequestCreate,
+    current_user: dict = Depends(get_current_user),
+    idempotency_key: Optional[str] = Header(None),
+):
+    return await idempotency_store.run(
+        current_user["id"], "escorts", idempotency_key, request,
+        lambda: insert_escort_request(request, current_user),
+    )
+
+async def insert_escort_request(request: EscortRequestCreate, current_user: dict) -> EscortRequest:
     # Check for existing active request
     existing = await db.escort_requests.find_one({
         "user_id": current_user["id"],
@@ -519,35 +2255,654 @@ async def get_active_escort(current_user: dict = Depends(get_current_user)):
     request = await db.escort_requests.find_one({
         "user_id": current_user["id"],
         "status": {"$in": ["pending", "assigned"]}
-    }, {"_id": 0})
-    return request
+    }, {"_id": 0, "track": 0})
+    return location_tracks.overlay("escort_requests", request)
 
 @api_router.put("/escorts/{request_id}/cancel")
 async def cancel_escort_request(request_id: str, current_user: dict = Depends(get_current_user)):
-    result = await db.escort_requests.update_one(
-        {"id": request_id, "user_id": current_user["id"]},
-        {"$set": {"status": "cancelled"}}
+    request = await db.escort_requests.find_one_and_update(
+        {"id": request_id, "user_id": current_user["id"], "status": {"$in": ["pending", "assigned"]}},
+        {"$set": {"status": "cancelled"}},
+        projection={"_id": 0, "track": 0},
+        return_document=ReturnDocument.AFTER,
     )
-    if result.modified_count == 0:
-        raise HTTPException(status_code=404, detail="Escort request not found")
-    return {"message": "Escort request cancelled"}
+    if request is None:
+        raise await transition_error("escort_requests", request_id, current_user["id"], "Escort request")
+    location_tracks.forget("escort_requests", request_id)
+    push_hub.publish_user(current_user["id"], "escort.cancelled", {"id": request_id, "status": "cancelled"})
+    return {"message": "Escort request cancelled", "request": EscortRequest(**request)}
+
+@api_router.put("/escorts/{request_id}/location")
+async def update_escort_location(request_id: str, update: FriendWalkUpdate, current_user: dict = Depends(get_current_user)):
+    # Buffered; written by location_tracks within TRACK_FLUSH_SECONDS
+    location_tracks.put("escort_requests", request_id, current_user["id"], update.location_lat, update.location_lng)
+    return {"message": "Location updated"}
+
+@api_router.get("/escorts/{request_id}/track", response_model=TrackResponse)
+async def get_escort_track(
+    request_id: str,
+    current_user: Optional[dict] = Depends(get_optional_user),
+    x_responder_key: Optional[str] = Header(None),
+):
+    """Decoded escort path; readable by the student or with the responder key."""
+    return await read_track("escort_requests", request_id, current_user, x_responder_key)
 
 # Mock assign officer (for demo)
 @api_router.put("/escorts/{request_id}/assign")
 async def assign_officer(request_id: str):
-    await db.escort_requests.update_one(
+    request = await db.escort_requests.find_one_and_update(
         {"id": request_id},
         {"$set": {
             "status": "assigned",
             "officer_name": "Officer John",
             "officer_photo": None,
             "estimated_wait": 5
-        }}
+        }},
+        projection={"_id": 0, "user_id": 1, "officer_name": 1, "officer_photo": 1, "estimated_wait": 1},
+        return_document=ReturnDocument.AFTER,
     )
+    if request is not None:
+        # Only what changed; the stored track and notification state stay server-side
+        push_hub.publish_user(request.pop("user_id"), "escort.assigned", {
+            "id": request_id,
+            "status": "assigned",
+            **request,
+        })
     return {"message": "Officer assigned"}
 
+# ==================== LOCATION TRACKS ====================
+
+TRACK_PRECISION = 1e5  # 5 decimal places, about 1.1 m
+
+# Tracks only move while their document is open; later pings are discarded at flush
+TRACK_OPEN_FILTERS = {
+    "escort_requests": {"status": {"$in": ["pending", "assigned"]}},
+    "friend_walks": {"status": "active"},
+}
+
+def _encode_polyline_value(value: int, out: List[str]):
+    value = ~(value << 1) if value < 0 else value << 1
+    while value >= 0x20:
+        out.append(chr((0x20 | (value & 0x1f)) + 63))
+        value >>= 5
+    out.append(chr(value + 63))
+
+def encode_polyline(points: List[tuple], previous: tuple = (0, 0)) -> str:
+    """Google encoded-polyline string for quantized (lat, lng) integer points.
+
+    Each point is stored as the delta from ``previous``, so a chunk encoded
+    against the last stored point can be appended to an existing string.
+    """
+    out = []
+    last_lat, last_lng = previous
+    for lat, lng in points:
+        _encode_polyline_value(lat - last_lat, out)
+        _encode_polyline_value(lng - last_lng, out)
+        last_lat, last_lng = lat, lng
+    return "".join(out)
+
+def decode_polyline(encoded: str) -> List[tuple]:
+    points = []
+    index = lat = lng = 0
+    while index < len(encoded):
+        deltas = []
+        for _ in range(2):
+            shift = result = 0
+            while True:
+                byte = ord(encoded[index]) - 63
+                index += 1
+                result |= (byte & 0x1f) << shift
+                shift += 5
+                if byte < 0x20:
+                    break
+            deltas.append(~(result >> 1) if result & 1 else result >> 1)
+        lat += deltas[0]
+        lng += deltas[1]
+        points.append((lat / TRACK_PRECISION, lng / TRACK_PRECISION))
+    return points
+
+def new_track(lat: float, lng: float, now: datetime) -> dict:
+    """``track`` field for a document whose path starts at one point."""
+    start = (round(lat * TRACK_PRECISION), round(lng * TRACK_PRECISION))
+    return {"polyline": encode_polyline([start]), "last": list(start), "points": 1, "updated_at": now}
+
+def simplify_track(points: List[tuple], tolerance_m: float) -> List[tuple]:
+    """Douglas-Peucker simplification of quantized points; the endpoints are always kept."""
+    if len(points) <= 2:
+        return list(points)
+    coords = np.radians(np.array(points, dtype=float) / TRACK_PRECISION)
+    # Local equirectangular projection is accurate to well under a metre here
+    xy = np.column_stack([
+        coords[:, 1] * math.cos(float(coords[:, 0].mean())) * EARTH_RADIUS_M,
+        coords[:, 0] * EARTH_RADIUS_M,
+    ])
+    keep = np.zeros(len(points), dtype=bool)
+    keep[[0, -1]] = True
+    stack = [(0, len(points) - 1)]
+    while stack:
+        first, last = stack.pop()
+        if last - first < 2:
+            continue
+        a, b = xy[first], xy[last]
+        inner = xy[first + 1:last]
+        ab = b - a
+        length = math.hypot(ab[0], ab[1])
+        if length == 0:
+            distances = np.hypot(inner[:, 0] - a[0], inner[:, 1] - a[1])
+        else:
+            distances = np.abs(ab[0] * (inner[:, 1] - a[1]) - ab[1] * (inner[:, 0] - a[0])) / length
+        index = int(distances.argmax())
+        if distances[index] > tolerance_m:
+            split = first + 1 + index
+            keep[split] = True
+            stack.append((first, split))
+            stack.append((split, last))
+    return [point for point, kept in zip(points, keep) if kept]
+
+class LocationTrackBuffer(BackgroundWorker):
+    """Latest positions and path history for friend walks and escorts.
+
+    A location ping replaces the document's pending position and adds to its
+    pending path, so a walk pinging every few seconds costs one write per
+    ``flush_interval`` no matter how often it reports; all dirty documents
+    go out in one unordered bulk_write. Positions in Mongo are therefore at
+    most ``flush_interval`` (plus one flush) old, and reads through this
+    process overlay the pending position.
+
+    The path is kept on the document itself as ``track``: a quantized,
+    delta-encoded polyline plus the last stored point. On flush the pending
+    points are simplified with Douglas-Peucker (anchored at that last point),
+    encoded relative to it and appended with an update pipeline $concat, so
+    a full path is one small string read with the document. The append is
+    conditional on ``track.last`` still being the point it was encoded
+    against; if another worker appended first, the entry goes back in the
+    queue with the anchor reloaded and is re-encoded on the next flush
+    rather than corrupting the deltas. Entries for documents that are gone,
+    closed or owned by someone else are discarded.
+    """
+
+    def __init__(self, flush_interval: float, max_dirty: int, tolerance_m: float, max_pending_points: int):
+        super().__init__()
+        self.flush_interval = flush_interval
+        self.max_dirty = max_dirty
+        self.tolerance_m = tolerance_m
+        self.max_pending_points = max_pending_points
+        self.accepted = 0
+        self.coalesced = 0
+        self.written = 0
+        self.points_in = 0
+        self.points_stored = 0
+        self.conflicts = 0
+        self.failed_flushes = 0
+        self.flush_latency = OpLatency()
+        self._dirty = {}
+        self._flushing = {}
+        # (collection, id) -> last stored (lat, lng) in TRACK_PRECISION units, None if no track yet
+        self._anchors = {}
+
+    def put(self, collection_name: str, doc_id: str, user_id: str, lat: float, lng: float):
+        # Keyed by sender too: a ping from anyone but the owner gets its own
+        # entry (which the owner-filtered write then ignores) instead of
+        # displacing the owner's pending position and path
+        key = (collection_name, doc_id, user_id)
+        entry = self._dirty.get(key)
+        if entry is None:
+            entry = {"user_id": user_id, "path": []}
+            self._dirty[key] = entry
+        else:
+            self.coalesced += 1
+        point = (round(lat * TRACK_PRECISION), round(lng * TRACK_PRECISION))
+        if (not entry["path"] or entry["path"][-1] != point) and len(entry["path"]) < self.max_pending_points:
+            entry["path"].append(point)
+        entry.update(lat=lat, lng=lng, at=datetime.utcnow())
+        self.accepted += 1
+        if len(self._dirty) >= self.max_dirty:
+            self._wake.set()
+
+    def pending(self, collection_name: str, doc_id: str, user_id: str) -> Optional[dict]:
+        key = (collection_name, doc_id, user_id)
+        return self._dirty.get(key) or self._flushing.get(key)
+
+    def overlay(self, collection_name: str, doc: Optional[dict]) -> Optional[dict]:
+        if doc is None:
+            return None
+        entry = self.pending(collection_name, doc["id"], doc["user_id"])
+        if entry is not None:
+            doc = {**doc, "current_lat": entry["lat"], "current_lng": entry["lng"], "location_updated_at": entry["at"]}
+        return doc
+
+    async def stop(self):
+        await super().stop()
+        try:
+            await self.flush()
+        except Exception as e:
+            logger.error(f"Final location track flush failed: {e}")
+
+    async def _run(self):
+        while True:
+            await self._sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Location track flush failed: {e}")
+
+    async def flush(self) -> int:
+        if not self._dirty:
+            return 0
+        batch, self._dirty = self._dirty, {}
+        return await self._write(batch)
+
+    async def flush_one(self, collection_name: str, doc_id: str, user_id: str) -> int:
+        """Write one document's pending position now, e.g. before it is closed."""
+        key = (collection_name, doc_id, user_id)
+        entry = self._dirty.pop(key, None)
+        if entry is None:
+            return 0
+        return await self._write({key: entry})
+
+    async def _load_anchors(self, keys: List[tuple]):
+        by_collection = {}
+        for collection_name, doc_id, _ in keys:
+            if (collection_name, doc_id) not in self._anchors:
+                by_collection.setdefault(collection_name, []).append(doc_id)
+        for collection_name, ids in by_collection.items():
+            for doc_id in ids:
+                self._anchors[(collection_name, doc_id)] = None
+            async for doc in db[collection_name].find({"id": {"$in": ids}}, {"_id": 0, "id": 1, "track.last": 1}):
+                last = (doc.get("track") or {}).get("last")
+                self._anchors[(collection_name, doc["id"])] = tuple(last) if last else None
+
+    def _update(self, key: tuple, entry: dict) -> tuple:
+        """(filter, pipeline, points appended) for one pending entry."""
+        collection_name, doc_id, _ = key
+        anchor = self._anchors.get(key[:2])
+        path = [point for point in entry["path"] if point != anchor]
+        simplified = simplify_track(([anchor] if anchor else []) + path, self.tolerance_m)
+        added = simplified[1:] if anchor else simplified
+        query = {"id": doc_id, "user_id": entry["user_id"], **TRACK_OPEN_FILTERS.get(collection_name, {})}
+        stage = {
+            "current_lat": entry["lat"],
+            "current_lng": entry["lng"],
+            "location_updated_at": entry["at"],
+        }
+        if added:
+            query["track.last"] = list(anchor) if anchor else None
+            stage.update({
+                "track.polyline": {"$concat": [
+                    {"$ifNull": ["$track.polyline", ""]},
+                    {"$literal": encode_polyline(added, anchor or (0, 0))},
+                ]},
+                "track.last": {"$literal": list(added[-1])},
+                "track.points": {"$add": [{"$ifNull": ["$track.points", 0]}, len(added)]},
+                "track.updated_at": entry["at"],
+            })
+        return query, [{"$set": stage}], added
+
+    def _requeue(self, key: tuple, entry: dict):
+        """Queue an unwritten entry again, ahead of any newer pings for it."""
+        newer = self._dirty.get(key)
+        if newer is None:
+            self._dirty[key] = entry
+        else:
+            newer["path"] = (entry["path"] + newer["path"])[:self.max_pending_points]
+
+    async def _settle(self, collection_name: str, ops: List[tuple]) -> set:
+        """Keys in ``ops`` whose update did not apply, with their anchors reloaded.
+
+        Entries whose document is gone, closed or not theirs are not returned;
+        they are simply dropped.
+        """
+        docs = {}
+        cursor = db[collection_name].find(
+            {"id": {"$in": [key[1] for key, _, _ in ops]}, **TRACK_OPEN_FILTERS.get(collection_name, {})},
+            {"_id": 0, "id": 1, "user_id": 1, "track.last": 1},
+        )
+        async for doc in cursor:
+            docs[doc["id"]] = doc
+        retry = set()
+        for key, _, added in ops:
+            doc = docs.get(key[1])
+            if doc is None or doc["user_id"] != key[2]:
+                continue
+            last = (doc.get("track") or {}).get("last")
+            if added and last != list(added[-1]):
+                self._anchors[key[:2]] = tuple(last) if last else None
+                retry.add(key)
+        return retry
+
+    async def _write(self, batch: dict) -> int:
+        self._flushing = batch
+        start = time.perf_counter()
+        settled = set()
+        try:
+            await self._load_anchors(list(batch))
+            operations = {}
+            for key, entry in batch.items():
+                query, pipeline, added = self._update(key, entry)
+                operations.setdefault(key[0], []).append((key, UpdateOne(query, pipeline), added))
+            for collection_name, ops in operations.items():
+                result = await db[collection_name].bulk_write([op for _, op, _ in ops], ordered=False)
+                retry = set()
+                if result.matched_count < len(ops):
+                    # A stale anchor, or a document that is gone, closed or not the sender's
+                    self.conflicts += len(ops) - result.matched_count
+                    retry = await self._settle(collection_name, ops)
+                for key, _, added in ops:
+                    settled.add(key)
+                    if key in retry:
+                        self._requeue(key, batch.pop(key))
+                    elif added:
+                        self._anchors[key[:2]] = added[-1]
+                        self.points_stored += len(added)
+        except Exception:
+            self.failed_flushes += 1
+            self.flush_latency.record((time.perf_counter() - start) * 1000, False)
+            for key, entry in batch.items():
+                if key not in settled:
+                    self._requeue(key, entry)
+            raise
+        finally:
+            self._flushing = {}
+        self.flush_latency.record((time.perf_counter() - start) * 1000)
+        self.written += len(batch)
+        self.points_in += sum(len(entry["path"]) for entry in batch.values())
+        return len(batch)
+
+    def forget(self, collection_name: str, doc_id: str):
+        self._anchors.pop((collection_name, doc_id), None)
+
+    def stats(self) -> dict:
+        return {
+            "dirty": len(self._dirty),
+            "accepted": self.accepted,
+            "coalesced": self.coalesced,
+            "written": self.written,
+            "points_in": self.points_in,
+            "points_stored": self.points_stored,
+            "conflicts": self.conflicts,
+            "failed_flushes": self.failed_flushes,
+            "flush": self.flush_latency.snapshot(),
+        }
+
+location_tracks = LocationTrackBuffer(
+    flush_interval=float(os.environ.get('TRACK_FLUSH_SECONDS', '5')),
+    max_dirty=int(os.environ.get('TRACK_MAX_DIRTY', '5000')),
+    tolerance_m=float(os.environ.get('TRACK_SIMPLIFY_TOLERANCE_M', '5')),
+    max_pending_points=1000,
+)
+
+async def read_track(collection_name: str, doc_id: str, user: Optional[dict], responder_key: Optional[str]) -> TrackResponse:
+    doc = await db[collection_name].find_one({"id": doc_id}, {"_id": 0, "user_id": 1, "track": 1})
+    allowed = responder_key_valid(responder_key) or (user is not None and doc is not None and doc["user_id"] == user["id"])
+    if doc is None or not allowed:
+        raise HTTPException(status_code=404, detail="Track not found")
+    track = doc.get("track") or {}
+    points = decode_polyline(track.get("polyline", ""))
+    entry = location_tracks.pending(collection_name, doc_id, doc["user_id"])
+    if entry is not None:
+        # Not yet flushed; appended unsimplified
+        points.extend(
+            (lat / TRACK_PRECISION, lng / TRACK_PRECISION) for lat, lng in entry["path"]
+            if not points or (round(points[-1][0] * TRACK_PRECISION), round(points[-1][1] * TRACK_PRECISION)) != (lat, lng)
+        )
+    return TrackResponse(
+        id=doc_id,
+        points=[[lat, lng] for lat, lng in points],
+        polyline=track.get("polyline", ""),
+        point_count=len(points),
+        updated_at=track.get("updated_at"),
+    )
+
 # ==================== FRIEND WALK ====================
 
+class OverdueWalkScheduler(BackgroundWorker):
+    """Min-heap of active walk deadlines that escalates walks left running.
+
+    Loaded once from the active walks at startup and then kept current by
+    the walk endpoints, so detecting an overdue walk never scans
+    friend_walks. ``schedule`` pushes a new deadline in O(log n) and
+    ``cancel`` drops it in O(1); superseded heap entries are skipped when
+    they surface. Escalation is a conditional update (still active, past
+    its end_time, not yet escalated), so a deadline moved by another worker
+    or a walk escalated elsewhere is left alone and simply re-read.
+    """
+
+    def __init__(self, grace: float, max_sleep: float, retry_interval: float):
+        super().__init__()
+        self.grace = timedelta(seconds=grace)
+        self.max_sleep = max_sleep
+        self.retry_interval = timedelta(seconds=retry_interval)
+        self.escalated = 0
+        self.superseded = 0
+        self._heap = []
+        self._deadlines = {}
+
+    def schedule(self, walk_id: str, end_time: datetime):
+        due = end_time + self.grace
+        self._deadlines[walk_id] = due
+        heapq.heappush(self._heap, (due, walk_id))
+        if self._heap[0][1] == walk_id:
+            self._wake.set()
+        if len(self._heap) > 2 * len(self._deadlines) + 64:
+            self._heap = [(due, walk_id) for walk_id, due in self._deadlines.items()]
+            heapq.heapify(self._heap)
+
+    def cancel(self, walk_id: str):
+        self._deadlines.pop(walk_id, None)
+
+    async def load(self):
+        loaded = {}
+        async for walk in db.friend_walks.find(
+            {"status": "active", "overdue_at": None}, {"_id": 0, "id": 1, "end_time": 1}
+        ):
+            loaded[walk["id"]] = walk["end_time"] + self.grace
+        # Walks scheduled by requests while the load was running are newer
+        for walk_id, due in loaded.items():
+            if walk_id not in self._deadlines:
+                self._deadlines[walk_id] = due
+                self._heap.append((due, walk_id))
+        heapq.heapify(self._heap)
+        self._wake.set()
+
+    def _pop_due(self, now: datetime) -> List[str]:
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            deadline, walk_id = heapq.heappop(self._heap)
+            if self._deadlines.get(walk_id) == deadline:
+                del self._deadlines[walk_id]
+                due.append(walk_id)
+        return due
+
+    async def _run(self):
+        try:
+            await self.load()
+        except Exception as e:
+            logger.error(f"Loading friend-walk deadlines failed: {e}")
+        while True:
+            for walk_id in self._pop_due(datetime.utcnow()):
+                try:
+                    await self.escalate(walk_id)
+                except Exception as e:
+                    logger.error(f"Escalating overdue walk {walk_id} failed: {e}")
+                    self._deadlines[walk_id] = datetime.utcnow() + self.retry_interval
+                    heapq.heappush(self._heap, (self._deadlines[walk_id], walk_id))
+            delay = self.max_sleep
+            if self._heap:
+                delay = min(delay, max(0.0, (self._heap[0][0] - datetime.utcnow()).total_seconds()))
+            await self._sleep(delay)
+
+    async def escalate(self, walk_id: str) -> bool:
+        now = datetime.utcnow()
+        walk = await db.friend_walks.find_one_and_update(
+            {"id": walk_id, "status": "active", "end_time": {"$lte": now - self.grace}, "overdue_at": None},
+            {"$set": {"overdue_at": now}},
+            projection={"_id": 0, "track": 0},
+        )
+        if walk is None:
+            # Extended, completed or escalated elsewhere; follow the stored deadline
+            current = await db.friend_walks.find_one(
+                {"id": walk_id}, {"_id": 0, "status": 1, "end_time": 1, "overdue_at": 1}
+            )
+            if current and current["status"] == "active" and current.get("overdue_at") is None:
+                self.schedule(walk_id, current["end_time"])
+            self.superseded += 1
+            return False
+
+        walk = location_tracks.overlay("friend_walks", walk)
+        user = await db.users.find_one({"id": walk["user_id"]}, {"_id": 0, "full_name": 1, "trusted_contacts": 1})
+        contacts = [
+            contact for contact in (user or {}).get("trusted_contacts", [])
+            if contact["id"] in walk["contact_ids"]
+        ]
+        notify, notifications = new_notification_state(
+            contacts,
+            walk_overdue_message((user or {}).get("full_name", "A student"), walk["end_time"],
+                                 walk["current_lat"], walk["current_lng"]),
+            now,
+        )
+        await db.friend_walks.update_one(
+            {"id": walk_id},
+            {"$set": {"notify": notify, "notifications": notifications}},
+        )
+        notification_dispatcher.wake()
+        push_hub.publish_user(walk["user_id"], "walk.overdue", {
+            "id": walk_id,
+            "end_time": walk["end_time"],
+            "overdue_at": now,
+        })
+        walk_shares.publish(walk_id, "walk.overdue", walk_shares.view({**walk, "overdue_at": now}))
+        self.escalated += 1
+        logger.warning(f"Friend walk {walk_id} is overdue; notifying {len(contacts)} contact(s)")
+        return True
+
+    def stats(self) -> dict:
+        return {
+            "scheduled": len(self._deadlines),
+            "heap_size": len(self._heap),
+            "escalated": self.escalated,
+            "superseded": self.superseded,
+        }
+
+walk_scheduler = OverdueWalkScheduler(
+    grace=float(os.environ.get('WALK_OVERDUE_GRACE_SECONDS', '60')),
+    max_sleep=60.0,
+    retry_interval=30.0,
+)
+
+class WalkShareFeed:
+    """Live view of a Friend Walk for the contacts holding its share link.
+
+    Watchers subscribe to the walk's ``walk:<id>`` push topic and the
+    walker's location updates are published there straight from the
+    request, so N watchers cost one in-memory fan-out instead of N database
+    polls. The owner is taken from the share token and set before the
+    watcher's first read; updates sent by anyone else for that walk id are
+    never relayed.
+
+    The fan-out is in-process: positions, extensions and the final event
+    only reach watchers connected to the worker that handled the walker's
+    request. Deploy with a single worker (or route /friend-walk/{id} and
+    /share/walks/ to the same worker) while this feed is in use.
+
+    Share tokens are JWTs scoped to one walk with no expiry of their own:
+    a link is open while the walk is active and until ``grace`` after its
+    (possibly extended) end_time, and streams close when either ends. Each
+    token also carries the walk's ``share_nonce``; the walker rotates it to
+    revoke every link handed out so far.
+    """
+
+    SCOPE = "walk_share"
+    FIELDS = ("id", "status", "start_time", "end_time", "current_lat", "current_lng", "overdue_at")
+
+    def __init__(self, grace: float):
+        self.grace = timedelta(seconds=grace)
+        self._owners = {}
+        self.positions = 0
+        self.closed = 0
+
+    @staticmethod
+    def topic(walk_id: str) -> str:
+        return f"walk:{walk_id}"
+
+    @staticmethod
+    def new_nonce() -> str:
+        return uuid.uuid4().hex
+
+    def create_token(self, walk: dict) -> str:
+        return jwt.encode(
+            {
+                "walk": walk["id"],
+                "owner": walk["user_id"],
+                "nonce": walk["share_nonce"],
+                "scope": self.SCOPE,
+                "iat": datetime.utcnow(),
+            },
+            SECRET_KEY, algorithm=ALGORITHM,
+        )
+
+    def decode(self, token: str) -> dict:
+        """Claims of a share token: ``walk``, ``owner`` and ``nonce``."""
+        try:
+            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        except JWTError:
+            raise HTTPException(status_code=401, detail="Invalid share link")
+        if payload.get("scope") != self.SCOPE or not all(payload.get(claim) for claim in ("walk", "owner", "nonce")):
+            raise HTTPException(status_code=401, detail="Invalid share link")
+        return payload
+
+    def closes_at(self, walk: dict) -> datetime:
+        return walk["end_time"] + self.grace
+
+    def is_open(self, walk: Optional[dict], now: datetime) -> bool:
+        return walk is not None and walk["status"] == "active" and now < self.closes_at(walk)
+
+    def view(self, walk: dict) -> dict:
+        return {field: walk.get(field) for field in self.FIELDS}
+
+    def subscribe(self, walk_id: str) -> PushSubscriber:
+        return push_hub.subscribe([self.topic(walk_id)])
+
+    def watch(self, walk_id: str, owner_id: str):
+        self._owners[walk_id] = owner_id
+
+    def unsubscribe(self, walk_id: str, subscriber: PushSubscriber):
+        push_hub.unsubscribe(subscriber)
+        if not push_hub.has_subscribers(self.topic(walk_id)):
+            self._owners.pop(walk_id, None)
+
+    def position(self, walk_id: str, user_id: str, lat: float, lng: float):
+        if self._owners.get(walk_id) != user_id:
+            return
+        self.positions += 1
+        push_hub.publish(self.topic(walk_id), "walk.position", {
+            "current_lat": lat,
+            "current_lng": lng,
+            "recorded_at": datetime.utcnow(),
+        })
+
+    def publish(self, walk_id: str, event_type: str, data: dict):
+        if walk_id in self._owners:
+            push_hub.publish(self.topic(walk_id), event_type, data)
+
+    def close(self, walk_id: str, event_type: str, data: dict):
+        """Send a final event and end every stream watching the walk."""
+        if self._owners.pop(walk_id, None) is None:
+            return
+        push_hub.publish(self.topic(walk_id), event_type, data)
+        push_hub.close_topic(self.topic(walk_id))
+        self.closed += 1
+
+    def stats(self) -> dict:
+        return {
+            "watched_walks": len(self._owners),
+            "positions": self.positions,
+            "closed": self.closed,
+        }
+
+walk_shares = WalkShareFeed(
+    grace=float(os.environ.get('WALK_SHARE_GRACE_SECONDS', '3600')),
+)
+
 @api_router.post("/friend-walk", response_model=FriendWalk)
 async def start_friend_walk(walk: FriendWalkCreate, current_user: dict = Depends(get_current_user)):
     # Check for existing active walk
@@ -569,10 +2924,12 @@ async def start_friend_walk(walk: FriendWalkCreate, current_user: dict = Depends
         "end_time": start_time + timedelta(minutes=walk.duration_minutes),
         "current_lat": walk.location_lat,
         "current_lng": walk.location_lng,
-        "status": "active"
+        "status": "active",
+        "track": new_track(walk.location_lat, walk.location_lng, start_time),
     }
     await db.friend_walks.insert_one(walk_doc)
     logger.info(f"Friend walk started: {walk_id}")
+    walk_scheduler.schedule(walk_id, walk_doc["end_time"])
     return FriendWalk(**walk_doc)
 
 @api_router.get("/friend-walk/active")
@@ -580,99 +2937,1271 @@ async def get_active_friend_walk(current_user: dict = Depends(get_current_user))
     walk = await db.friend_walks.find_one({
         "user_id": current_user["id"],
         "status": "active"
-    }, {"_id": 0})
-    return walk
+    }, {"_id": 0, "track": 0})
+    return location_tracks.overlay("friend_walks", walk)
 
 @api_router.put("/friend-walk/{walk_id}/update")
 async def update_friend_walk_location(walk_id: str, update: FriendWalkUpdate, current_user: dict = Depends(get_current_user)):
-    await db.friend_walks.update_one(
-        {"id": walk_id, "user_id": current_user["id"]},
-        {"$set": {"current_lat": update.location_lat, "current_lng": update.location_lng}}
-    )
+    # Buffered; written by location_tracks within TRACK_FLUSH_SECONDS
+    location_tracks.put("friend_walks", walk_id, current_user["id"], update.location_lat, update.location_lng)
+    walk_shares.position(walk_id, current_user["id"], update.location_lat, update.location_lng)
     return {"message": "Location updated"}
 
+@api_router.get("/friend-walk/{walk_id}/track", response_model=TrackResponse)
+async def get_friend_walk_track(
+    walk_id: str,
+    current_user: Optional[dict] = Depends(get_optional_user),
+    x_responder_key: Optional[str] = Header(None),
+):
+    """Decoded walk path; readable by the walker or with the responder key."""
+    return await read_track("friend_walks", walk_id, current_user, x_responder_key)
+
 @api_router.put("/friend-walk/{walk_id}/extend")
-async def extend_friend_walk(walk_id: str, minutes: int = 15, current_user: dict = Depends(get_current_user)):
-    walk = await db.friend_walks.find_one({"id": walk_id, "user_id": current_user["id"]})
-    if not walk:
-        raise HTTPException(status_code=404, detail="Friend walk not found")
-    
-    new_end = walk["end_time"] + timedelta(minutes=minutes)
-    await db.friend_walks.update_one(
-        {"id": walk_id},
-        {"$set": {"end_time": new_end, "duration_minutes": walk["duration_minutes"] + minutes}}
+async def extend_friend_walk(
+    walk_id: str,
+    minutes: int = Query(15, ge=1, le=240),
+    current_user: dict = Depends(get_current_user),
+):
+    # Pipeline update: the new deadline is computed server-side from the
+    # stored one, so concurrent extensions add up instead of overwriting
+    walk = await db.friend_walks.find_one_and_update(
+        {"id": walk_id, "user_id": current_user["id"], "status": "active"},
+        [{"$set": {
+            "end_time": {"$add": ["$end_time", minutes * 60 * 1000]},
+            "duration_minutes": {"$add": ["$duration_minutes", minutes]},
+            # Extending an overdue walk re-arms it for the new deadline and
+            # stops any "has not checked in" messages still queued
+            "overdue_at": "$$REMOVE",
+            "notify.pending": False,
+        }}],
+        projection={"_id": 0, "track": 0, "notify": 0, "notifications": 0},
+        return_document=ReturnDocument.AFTER,
     )
-    return {"message": "Walk extended", "new_end_time": new_end}
+    if walk is None:
+        raise await transition_error("friend_walks", walk_id, current_user["id"], "Friend walk")
+    walk_scheduler.schedule(walk_id, walk["end_time"])
+    walk_shares.publish(walk_id, "walk.extended", walk_shares.view(walk))
+    return {"message": "Walk extended", "new_end_time": walk["end_time"], "walk": FriendWalk(**walk)}
 
 @api_router.put("/friend-walk/{walk_id}/complete")
 async def complete_friend_walk(walk_id: str, current_user: dict = Depends(get_current_user)):
-    await db.friend_walks.update_one(
+    await location_tracks.flush_one("friend_walks", walk_id, current_user["id"])
+    walk = await db.friend_walks.find_one_and_update(
+        {"id": walk_id, "user_id": current_user["id"], "status": "active"},
+        # Contacts must not be told an arrived walker is overdue
+        {"$set": {"status": "completed", "notify.pending": False}},
+        projection={"_id": 0, "track": 0, "notify": 0, "notifications": 0},
+        return_document=ReturnDocument.AFTER,
+    )
+    if walk is None:
+        raise await transition_error("friend_walks", walk_id, current_user["id"], "Friend walk")
+    location_tracks.forget("friend_walks", walk_id)
+    walk_scheduler.cancel(walk_id)
+    walk_shares.close(walk_id, "walk.completed", walk_shares.view(walk))
+    return {"message": "Friend walk completed", "walk": FriendWalk(**walk)}
+
+@api_router.post("/friend-walk/{walk_id}/share", response_model=WalkShareLink)
+async def share_friend_walk(walk_id: str, current_user: dict = Depends(get_current_user)):
+    """Share link for the walk's contacts; valid until the walk ends or the link is revoked."""
+    projection = {"_id": 0, "id": 1, "user_id": 1, "status": 1, "end_time": 1, "share_nonce": 1}
+    walk = await db.friend_walks.find_one({"id": walk_id, "user_id": current_user["id"]}, projection)
+    if walk is None:
+        raise HTTPException(status_code=404, detail="Friend walk not found")
+    if not walk_shares.is_open(walk, datetime.utcnow()):
+        raise HTTPException(status_code=409, detail="Friend walk is no longer active")
+    if walk.get("share_nonce") is None:
+        # First share of this walk; a concurrent first share may win, so re-read
+        await db.friend_walks.update_one(
+            {"id": walk_id, "share_nonce": None}, {"$set": {"share_nonce": walk_shares.new_nonce()}}
+        )
+        walk = await db.friend_walks.find_one({"id": walk_id}, projection)
+    token = walk_shares.create_token(walk)
+    return WalkShareLink(token=token, url=f"/api/share/walks/{token}/events")
+
+@api_router.delete("/friend-walk/{walk_id}/share")
+async def revoke_friend_walk_shares(walk_id: str, current_user: dict = Depends(get_current_user)):
+    """Invalidate every share link handed out for the walk and end their streams."""
+    result = await db.friend_walks.update_one(
         {"id": walk_id, "user_id": current_user["id"]},
-        {"$set": {"status": "completed"}}
+        {"$set": {"share_nonce": walk_shares.new_nonce()}},
+    )
+    if result.matched_count == 0:
+        raise HTTPException(status_code=404, detail="Friend walk not found")
+    walk_shares.close(walk_id, "walk.share_revoked", {"id": walk_id})
+    return {"message": "Share links revoked"}
+
+@api_router.get("/share/walks/{token}/events")
+async def shared_walk_stream(token: str, request: Request):
+    """Unauthenticated SSE view of one Friend Walk, opened with its share token."""
+    claims = walk_shares.decode(token)
+    walk_id = claims["walk"]
+    # Subscribe and set the owner before the read, so positions and events
+    # published while it is in flight are queued rather than missed
+    subscriber = walk_shares.subscribe(walk_id)
+    walk_shares.watch(walk_id, claims["owner"])
+    walk = await db.friend_walks.find_one(
+        {"id": walk_id}, {"_id": 0, "track": 0, "notify": 0, "notifications": 0}
+    )
+    if walk is not None and (walk["user_id"] != claims["owner"] or walk.get("share_nonce") != claims["nonce"]):
+        walk_shares.unsubscribe(walk_id, subscriber)
+        raise HTTPException(status_code=401, detail="This share link has been revoked")
+    if not walk_shares.is_open(walk, datetime.utcnow()):
+        walk_shares.unsubscribe(walk_id, subscriber)
+        raise HTTPException(status_code=410, detail="This walk is no longer being shared")
+    walk = location_tracks.overlay("friend_walks", walk)
+    snapshot = json.dumps(jsonable_encoder({"type": "snapshot", "data": walk_shares.view(walk)}))
+
+    async def generate():
+        closes_at = walk_shares.closes_at(walk)
+        try:
+            yield "retry: 5000\n\n"
+            yield f"data: {snapshot}\n\n"
+            while True:
+                remaining = (closes_at - datetime.utcnow()).total_seconds()
+                if remaining <= 0:
+                    # Extensions move the deadline; re-read before ending the stream
+                    current = await db.friend_walks.find_one(
+                        {"id": walk_id, "share_nonce": claims["nonce"]}, {"_id": 0, "status": 1, "end_time": 1}
+                    )
+                    if not walk_shares.is_open(current, datetime.utcnow()):
+                        yield f"data: {json.dumps({'type': 'walk.expired', 'data': {'id': walk_id}})}\n\n"
+                        break
+                    closes_at = walk_shares.closes_at(current)
+                    continue
+                message = await push_hub.next_message(
+                    subscriber, timeout=min(remaining, push_hub.heartbeat_interval)
+                )
+                if message is None:
+                    break
+                if message == "":
+                    if await request.is_disconnected():
+                        break
+                    yield ": ping\n\n"
+                    continue
+                yield f"data: {message}\n\n"
+        finally:
+            walk_shares.unsubscribe(walk_id, subscriber)
+
+    return StreamingResponse(
+        generate(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
-    return {"message": "Friend walk completed"}
+
+# ==================== HTTP CACHING ====================
+
+class CachedPayload:
+    """Serialized JSON response with validators computed once per data version."""
+
+    def __init__(self, body: bytes, last_modified: datetime, previous: Optional["CachedPayload"] = None):
+        self.body = body
+        self.etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+        if previous is not None and previous.etag == self.etag:
+            last_modified = previous.last_modified
+        # HTTP dates have one-second resolution
+        self.last_modified = last_modified.replace(microsecond=0)
+        self.last_modified_header = format_datetime(
+            self.last_modified.replace(tzinfo=timezone.utc), usegmt=True
+        )
+
+def _etag_matches(header: str, etag: str) -> bool:
+    candidates = [tag.strip() for tag in header.split(",")]
+    return "*" in candidates or any(
+        (tag[2:] if tag.startswith("W/") else tag) == etag for tag in candidates
+    )
+
+def conditional_response(request: Request, payload: CachedPayload) -> Response:
+    """Answer with 304 when the client's validators still match, else the body."""
+    headers = {
+        "ETag": payload.etag,
+        "Last-Modified": payload.last_modified_header,
+        "Cache-Control": "no-cache",
+    }
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        if _etag_matches(if_none_match, payload.etag):
+            return Response(status_code=304, headers=headers)
+    else:
+        if_modified_since = request.headers.get("if-modified-since")
+        if if_modified_since:
+            try:
+                since = parsedate_to_datetime(if_modified_since).astimezone(timezone.utc).replace(tzinfo=None)
+            except (TypeError, ValueError):
+                since = None
+            if since is not None and payload.last_modified <= since:
+                return Response(status_code=304, headers=headers)
+    return Response(content=payload.body, media_type="application/json", headers=headers)
 
 # ==================== CAMPUS ALERTS ====================
 
-@api_router.get("/alerts", response_model=List[CampusAlert])
-async def get_campus_alerts():
-    # Primary: read broadcasts from Firestore (written by Dashboard)
-    fs = get_firestore_client()
-    if fs is not None:
+CHANGE_DEBOUNCE_SECONDS = float(os.environ.get('CHANGE_DEBOUNCE_SECONDS', '0.25'))
+
+async def coalesced_changes(stream, window: float):
+    """Yield once per burst of change-stream events rather than once per event.
+
+    After the first event, anything else arriving within ``window`` seconds
+    is drained with try_next (open the stream with a matching
+    max_await_time_ms), so seeding N documents costs one reload, not N.
+    """
+    loop = asyncio.get_running_loop()
+    while True:
+        await stream.next()
+        deadline = loop.time() + window
+        while loop.time() < deadline and await stream.try_next() is not None:
+            pass
+        yield
+
+BROADCAST_TYPE_MAP = {
+    "emergency": "emergency",
+    "advisory": "advisory",
+    "information": "info",
+    "all_clear": "info",
+}
+
+def _naive_utc(value: datetime) -> datetime:
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+def broadcast_to_alert(doc_id: str, data: dict) -> CampusAlert:
+    """Convert a Dashboard broadcast document into a CampusAlert."""
+    try:
+        # Naive UTC like campus_alerts, so both sources sort together
+        created_at = _naive_utc(datetime.fromisoformat(
+            data.get("createdAt", "").replace("Z", "+00:00")
+        ))
+    except (ValueError, AttributeError):
+        created_at = datetime.utcnow()
+    return CampusAlert(
+        id=doc_id,
+        alert_type=BROADCAST_TYPE_MAP.get(data.get("type", "information"), "info"),
+        title=data.get("title", "Campus Alert"),
+        message=data.get("message", ""),
+        created_at=created_at,
+        is_read=False,
+    )
+
+def alert_sort_key(alert: CampusAlert) -> tuple:
+    """(created_at, id) ordering key shared by both alert sources."""
+    return (_naive_utc(alert.created_at), alert.id)
+
+def encode_alert_cursor(key: tuple) -> str:
+    raw = f"{key[0].isoformat()}|{key[1]}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_alert_cursor(cursor: str) -> tuple:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, alert_id = raw.split("|", 1)
+        return (_naive_utc(datetime.fromisoformat(created_at)), alert_id)
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="Invalid alert cursor")
+
+class AlertSnapshot:
+    """Immutable view of the current alerts plus their serialized response.
+
+    ``alerts`` is the list served by /api/alerts (Dashboard broadcasts when the
+    bridge is live, campus_alerts otherwise); ``by_id`` indexes every alert
+    known from either source so detail lookups are a dict hit.
+    """
+
+    def __init__(self, alerts: List[CampusAlert], indexed: List[CampusAlert],
+                 source: str, version: int, complete: bool,
+                 previous: Optional["AlertSnapshot"] = None):
+        self.alerts = tuple(alerts)
+        self.by_id = {alert.id: alert for alert in indexed}
+        self.by_id.update((alert.id, alert) for alert in self.alerts)
+        self.keys = [alert_sort_key(alert) for alert in self.alerts]
+        self.head_cursor = encode_alert_cursor(self.keys[0]) if self.keys else None
+        self.source = source
+        self.version = version
+        self.complete = complete
+        self.loaded_at = datetime.utcnow()
+        self.encoded = jsonable_encoder(list(self.alerts))
+        self.payload = CachedPayload(
+            json.dumps(self.encoded).encode(),
+            self.loaded_at,
+            previous.payload if previous is not None else None,
+        )
+
+class AlertFeed(BackgroundWorker):
+    """Process-wide campus alert feed kept current by push sources.
+
+    Firestore broadcasts are followed with a snapshot listener. campus_alerts
+    is followed with a change stream, or re-read periodically when change
+    streams are unavailable (standalone mongod). Both feed one id index, so
+    list and detail reads are served from the same AlertSnapshot.
+    """
+
+    def __init__(self, limit: int, index_limit: int, refresh_interval: float):
+        super().__init__()
+        self.limit = limit
+        self.index_limit = index_limit
+        self.refresh_interval = refresh_interval
+        self.snapshot: Optional[AlertSnapshot] = None
+        self._firestore_alerts: Optional[List[CampusAlert]] = None
+        self._mongo_alerts: Optional[List[CampusAlert]] = None
+        self._mongo_complete = False
+        self._version = 0
+        self._loop = None
+        self._watch = None
+        self._load_lock = asyncio.Lock()
+        self._pending_firestore: Optional[List[CampusAlert]] = None
+        self._firestore_flush = None
+
+    def _publish(self):
+        self._version += 1
+        mongo_alerts = self._mongo_alerts or []
+        if self._firestore_alerts is not None:
+            alerts, source = self._firestore_alerts, "firestore"
+        else:
+            alerts, source = mongo_alerts[:self.limit], "mongo"
+        complete = self._mongo_alerts is not None and self._mongo_complete
+        previous = self.snapshot
+        self.snapshot = AlertSnapshot(alerts, mongo_alerts, source, self._version, complete, previous)
+        if previous is not None and previous.payload.etag != self.snapshot.payload.etag:
+            head = previous.keys[0] if previous.keys else None
+            new_alerts = [
+                alert for alert, key in zip(self.snapshot.alerts, self.snapshot.keys)
+                if head is None or key > head
+            ]
+            push_hub.publish("alerts", "alerts.updated", {
+                "cursor": self.snapshot.head_cursor,
+                "new": new_alerts,
+            })
+
+    def _set_firestore_alerts(self, alerts: List[CampusAlert]):
+        self._firestore_alerts = alerts
+        self._publish()
+
+    def _broadcast_query(self, fs):
+        return (
+            fs.collection("broadcasts")
+            .order_by("createdAt", direction=firebase_firestore.Query.DESCENDING)
+            .limit(self.limit)
+        )
+
+    def _on_firestore_snapshot(self, docs, changes, read_time):
+        # Runs on the Firestore listener thread
+        alerts = [broadcast_to_alert(doc.id, doc.to_dict()) for doc in docs]
+        alerts.sort(key=alert_sort_key, reverse=True)
+        self._loop.call_soon_threadsafe(self._queue_firestore_alerts, alerts)
+
+    def _queue_firestore_alerts(self, alerts: List[CampusAlert]):
+        # Coalesce a burst of listener callbacks into one publish of the last
+        self._pending_firestore = alerts
+        if self._firestore_flush is None:
+            self._firestore_flush = self._loop.call_later(CHANGE_DEBOUNCE_SECONDS, self._flush_firestore_alerts)
+
+    def _flush_firestore_alerts(self):
+        alerts, self._pending_firestore, self._firestore_flush = self._pending_firestore, None, None
+        if alerts is not None:
+            self._set_firestore_alerts(alerts)
+
+    async def _load_mongo(self):
+        alerts = await db.campus_alerts.find().sort([("created_at", -1), ("id", -1)]).to_list(self.index_limit)
+        self._mongo_alerts = [CampusAlert(**alert) for alert in alerts]
+        self._mongo_complete = len(alerts) < self.index_limit
+        self._publish()
+
+    async def _load_firestore(self, fs):
+        docs = await asyncio.to_thread(lambda: list(self._broadcast_query(fs).stream()))
+        alerts = [broadcast_to_alert(doc.id, doc.to_dict()) for doc in docs]
+        self._firestore_alerts = sorted(alerts, key=alert_sort_key, reverse=True)
+
+    async def _run(self):
         try:
-            docs = (
-                fs.collection("broadcasts")
+            async with db.campus_alerts.watch(
+                max_await_time_ms=int(CHANGE_DEBOUNCE_SECONDS * 1000)
+            ) as stream:
+                await self._load_mongo()
+                async for _ in coalesced_changes(stream, CHANGE_DEBOUNCE_SECONDS):
+                    await self._load_mongo()
+        except Exception as e:
+            logger.info(f"campus_alerts change stream unavailable ({e}); refreshing alert feed periodically")
+        while True:
+            try:
+                await self._load_mongo()
+            except Exception as e:
+                logger.error(f"Alert feed refresh failed: {e}")
+            await asyncio.sleep(self.refresh_interval)
+
+    def start(self):
+        if self._task is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        fs = get_firestore_client()
+        if fs is not None:
+            try:
+                self._watch = self._broadcast_query(fs).on_snapshot(self._on_firestore_snapshot)
+            except Exception as e:
+                logger.error(f"Firestore broadcast listener failed, falling back to MongoDB: {e}")
+        super().start()
+
+    async def stop(self):
+        if self._watch is not None:
+            self._watch.unsubscribe()
+            self._watch = None
+        if self._firestore_flush is not None:
+            self._firestore_flush.cancel()
+            self._firestore_flush = None
+        await super().stop()
+
+    async def refresh(self):
+        """Reload campus_alerts immediately, e.g. after this process wrote it."""
+        await self._load_mongo()
+
+    def stats(self) -> dict:
+        snapshot = self.snapshot
+        return {
+            "source": snapshot.source if snapshot else None,
+            "version": snapshot.version if snapshot else 0,
+            "alerts": len(snapshot.alerts) if snapshot else 0,
+            "indexed": len(snapshot.by_id) if snapshot else 0,
+            "loaded_at": snapshot.loaded_at if snapshot else None,
+        }
+
+    async def current(self) -> AlertSnapshot:
+        if self.snapshot is None:
+            async with self._load_lock:
+                if self.snapshot is None:
+                    fs = get_firestore_client()
+                    if fs is not None and self._firestore_alerts is None:
+                        try:
+                            await self._load_firestore(fs)
+                        except Exception as e:
+                            logger.error(f"Firestore broadcast read failed, falling back to MongoDB: {e}")
+                    await self._load_mongo()
+        return self.snapshot
+
+alert_feed = AlertFeed(
+    limit=50,
+    index_limit=int(os.environ.get('ALERT_INDEX_LIMIT', '1000')),
+    refresh_interval=float(os.environ.get('ALERT_FEED_REFRESH_SECONDS', '30')),
+)
+
+async def _alerts_before(snapshot: AlertSnapshot, before: tuple, limit: int) -> List[CampusAlert]:
+    """Keyset page of alerts strictly older than ``before``, newest first."""
+    page = [alert for alert, key in zip(snapshot.alerts, snapshot.keys) if key < before][:limit]
+    if len(page) == limit or len(snapshot.alerts) < alert_feed.limit:
+        return page
+    # The page runs past the in-memory window; continue from the source
+    if page:
+        before = alert_sort_key(page[-1])
+    remaining = limit - len(page)
+    if snapshot.source == "firestore":
+        fs = get_firestore_client()
+        if fs is None:
+            return page
+        boundary = before[0].isoformat(timespec="milliseconds") + "Z"
+        broadcasts = fs.collection("broadcasts")
+
+        def read_older():
+            # Broadcasts sharing the boundary timestamp are split on id, as
+            # in the Mongo path below; strictly older ones come from a page
+            ties = list(broadcasts.where("createdAt", "==", boundary).stream())
+            older = list(
+                broadcasts.where("createdAt", "<", boundary)
                 .order_by("createdAt", direction=firebase_firestore.Query.DESCENDING)
-                .limit(50)
+                .limit(remaining)
                 .stream()
             )
-            type_map = {
-                "emergency": "emergency",
-                "advisory": "advisory",
-                "information": "info",
-                "all_clear": "info",
-            }
-            result = []
-            for doc in docs:
-                data = doc.to_dict()
-                try:
-                    created_at = datetime.fromisoformat(
-                        data.get("createdAt", "").replace("Z", "+00:00")
-                    )
-                except (ValueError, AttributeError):
-                    created_at = datetime.utcnow()
-                result.append(CampusAlert(
-                    id=doc.id,
-                    alert_type=type_map.get(data.get("type", "information"), "info"),
-                    title=data.get("title", "Campus Alert"),
-                    message=data.get("message", ""),
-                    created_at=created_at,
-                    is_read=False,
-                ))
-            return result
-        except Exception as e:
-            logger.error(f"Firestore broadcast read failed, falling back to MongoDB: {e}")
+            return ties + older
+
+        docs = await asyncio.to_thread(read_older)
+        older = [broadcast_to_alert(doc.id, doc.to_dict()) for doc in docs]
+        older = sorted(
+            (alert for alert in older if alert_sort_key(alert) < before), key=alert_sort_key, reverse=True
+        )
+        return page + older[:remaining]
+    docs = await db.campus_alerts.find({"$or": [
+        {"created_at": {"$lt": before[0]}},
+        {"created_at": before[0], "id": {"$lt": before[1]}},
+    ]}).sort([("created_at", -1), ("id", -1)]).to_list(remaining)
+    return page + [CampusAlert(**doc) for doc in docs]
+
+class AlertReadState:
+    """A user's read marks: a (created_at, id) watermark plus ids read above it.
+
+    Stored as one small alert_reads document per user rather than one row per
+    (user, alert). Reading alerts in order just advances the watermark, so the
+    exception set stays near-empty in practice and is capped regardless.
+    """
+
+    MAX_EXCEPTIONS = 200
+
+    def __init__(self, doc: Optional[dict] = None):
+        doc = doc or {}
+        # Stored as watermark + watermark_id; marks from before the id was kept
+        # sort below every alert sharing their created_at
+        self.watermark: Optional[tuple] = None
+        if doc.get("watermark") is not None:
+            self.watermark = (doc["watermark"], doc.get("watermark_id") or "")
+        self.read_ids = set(doc.get("read_ids", []))
+        self.updated_at: Optional[datetime] = doc.get("updated_at")
+
+    @property
+    def empty(self) -> bool:
+        return self.watermark is None and not self.read_ids
+
+    def is_read(self, alert_id: str, key: tuple) -> bool:
+        return (self.watermark is not None and key <= self.watermark) or alert_id in self.read_ids
+
+    def compact(self, snapshot: AlertSnapshot) -> bool:
+        """Fold, prune and cap the exception ids; True if anything changed."""
+        before = (self.watermark, set(self.read_ids))
+        # Fold ids that sit contiguously above the watermark into it, oldest first
+        for alert, key in zip(reversed(snapshot.alerts), reversed(snapshot.keys)):
+            if self.watermark is not None and key <= self.watermark:
+                self.read_ids.discard(alert.id)
+                continue
+            if alert.id not in self.read_ids:
+                break
+            self.watermark = key
+            self.read_ids.discard(alert.id)
+        # Ids unknown to the feed have aged out of it and cannot be shown again
+        self.read_ids = {alert_id for alert_id in self.read_ids if alert_id in snapshot.by_id}
+        if len(self.read_ids) > self.MAX_EXCEPTIONS:
+            newest = sorted(self.read_ids, key=lambda alert_id: alert_sort_key(snapshot.by_id[alert_id]))
+            self.read_ids = set(newest[-self.MAX_EXCEPTIONS:])
+        return (self.watermark, self.read_ids) != before
+
+# Read states change only through POST /alerts/read; entries from marks
+# made on another worker are picked up once the TTL lapses
+alert_read_cache = TTLCache(
+    max_entries=int(os.environ.get('ALERT_READ_CACHE_MAX_ENTRIES', '10000')),
+    ttl_seconds=float(os.environ.get('ALERT_READ_CACHE_TTL_SECONDS', '60')),
+)
+
+async def load_read_state(user: Optional[dict]) -> Optional[AlertReadState]:
+    if user is None:
+        return None
+    state = alert_read_cache.get(user["id"])
+    if state is None:
+        doc = await db.alert_reads.find_one({"user_id": user["id"]}, {"_id": 0})
+        state = AlertReadState(doc)
+        alert_read_cache.put(user["id"], state)
+    return state
+
+def with_read_flags(alerts: List[CampusAlert], state: Optional[AlertReadState]) -> List[CampusAlert]:
+    if state is None or state.empty:
+        return alerts
+    return [
+        CampusAlert(**{**alert.dict(), "is_read": True}) if state.is_read(alert.id, alert_sort_key(alert)) else alert
+        for alert in alerts
+    ]
+
+def personalized_payload(snapshot: AlertSnapshot, state: Optional[AlertReadState]) -> CachedPayload:
+    """Shared payload when nothing in it is read, else a copy with read flags set."""
+    if state is None or state.empty:
+        return snapshot.payload
+    read = [state.is_read(alert.id, key) for alert, key in zip(snapshot.alerts, snapshot.keys)]
+    if not any(read):
+        return snapshot.payload
+    encoded = [
+        {**item, "is_read": True} if is_read else item
+        for item, is_read in zip(snapshot.encoded, read)
+    ]
+    last_modified = max(snapshot.payload.last_modified, state.updated_at or snapshot.payload.last_modified)
+    return CachedPayload(json.dumps(encoded).encode(), last_modified)
+
+@api_router.get("/alerts", response_model=List[CampusAlert])
+async def get_campus_alerts(
+    request: Request,
+    since: Optional[str] = None,
+    before: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=100),
+    current_user: Optional[dict] = Depends(get_optional_user),
+):
+    """Latest alerts, or a delta/history page when a cursor is given.
+
+    ``X-Alerts-Cursor`` always carries the newest cursor to pass as ``since``
+    on the next sync; history pages also carry ``X-Next-Cursor`` to pass as
+    ``before`` while more rows may exist. A ``since`` cursor that has fallen
+    out of the in-memory window gets 409 with ``"reset": true``; reload
+    without a cursor. ``is_read`` reflects the caller's read state when a
+    bearer token is sent.
+    """
+    snapshot = await alert_feed.current()
+    read_state = await load_read_state(current_user)
+    if since is None and before is None:
+        response = conditional_response(request, personalized_payload(snapshot, read_state))
+        response.headers["Vary"] = "Authorization"
+        if snapshot.head_cursor:
+            response.headers["X-Alerts-Cursor"] = snapshot.head_cursor
+        return response
+
+    headers = {"X-Alerts-Cursor": snapshot.head_cursor or since or "", "Vary": "Authorization"}
+    if since is not None:
+        since_key = decode_alert_cursor(since)
+        newer = []
+        for alert, key in zip(snapshot.alerts, snapshot.keys):
+            if key <= since_key:
+                break
+            newer.append(alert)
+        else:
+            if len(snapshot.alerts) >= alert_feed.limit:
+                # Everything in the window is newer than the cursor, so alerts
+                # may have been missed below it; make the client start over
+                return JSONResponse(
+                    status_code=409,
+                    content={"detail": "Cursor is older than the alert window; reload /api/alerts", "reset": True},
+                    headers=headers,
+                )
+        if not newer:
+            headers["X-Alerts-Cursor"] = since
+            return Response(content=b"[]", media_type="application/json", headers=headers)
+        # Oldest-first so clients can append in order, capped at ``limit``
+        newer = newer[::-1][:limit]
+        headers["X-Alerts-Cursor"] = encode_alert_cursor(alert_sort_key(newer[-1]))
+        return JSONResponse(content=jsonable_encoder(with_read_flags(newer, read_state)), headers=headers)
 
-    # Fallback: original MongoDB campus_alerts
-    alerts = await db.campus_alerts.find().sort("created_at", -1).to_list(50)
-    return [CampusAlert(**alert) for alert in alerts]
+    page = await _alerts_before(snapshot, decode_alert_cursor(before), limit)
+    if len(page) == limit:
+        headers["X-Next-Cursor"] = encode_alert_cursor(alert_sort_key(page[-1]))
+    return JSONResponse(content=jsonable_encoder(with_read_flags(page, read_state)), headers=headers)
+
+@api_router.post("/alerts/read")
+async def mark_alerts_read(update: AlertReadUpdate, current_user: dict = Depends(get_current_user)):
+    snapshot = await alert_feed.current()
+    now = datetime.utcnow()
+    # One atomic upsert: the watermark only moves forward and ids only add,
+    # so concurrent marks from several devices merge instead of overwriting
+    changes = {"updated_at": now}
+    if update.up_to:
+        created_at, alert_id = decode_alert_cursor(update.up_to)
+        # $max over the (watermark, watermark_id) pair, compared as a tuple
+        newer = {"$or": [
+            {"$gt": [created_at, {"$ifNull": ["$watermark", None]}]},
+            {"$and": [
+                {"$eq": [created_at, "$watermark"]},
+                {"$gt": [{"$literal": alert_id}, {"$ifNull": ["$watermark_id", ""]}]},
+            ]},
+        ]}
+        changes["watermark"] = {"$cond": [newer, created_at, "$watermark"]}
+        changes["watermark_id"] = {"$cond": [newer, {"$literal": alert_id}, "$watermark_id"]}
+    if update.alert_ids:
+        changes["read_ids"] = {"$setUnion": [{"$ifNull": ["$read_ids", []]}, {"$literal": update.alert_ids}]}
+    doc = await db.alert_reads.find_one_and_update(
+        {"user_id": current_user["id"]},
+        [{"$set": changes}],
+        projection={"_id": 0},
+        upsert=True,
+        return_document=ReturnDocument.AFTER,
+    )
+    state = AlertReadState(doc)
+    if state.compact(snapshot):
+        # Only if no other mark landed since ours; that one compacts itself
+        await db.alert_reads.update_one(
+            {"user_id": current_user["id"], "updated_at": now},
+            {"$set": {
+                "watermark": state.watermark[0] if state.watermark else None,
+                "watermark_id": state.watermark[1] if state.watermark else None,
+                "read_ids": sorted(state.read_ids),
+            }},
+        )
+    alert_read_cache.put(current_user["id"], state)
+    unread = sum(
+        1 for alert, key in zip(snapshot.alerts, snapshot.keys)
+        if not state.is_read(alert.id, key)
+    )
+    watermark = encode_alert_cursor(state.watermark) if state.watermark else None
+    return {"watermark": watermark, "read_ids": len(state.read_ids), "unread": unread}
 
 @api_router.get("/alerts/{alert_id}", response_model=CampusAlert)
-async def get_alert(alert_id: str):
-    alert = await db.campus_alerts.find_one({"id": alert_id})
-    if not alert:
+async def get_alert(alert_id: str, current_user: Optional[dict] = Depends(get_optional_user)):
+    snapshot = await alert_feed.current()
+    alert = snapshot.by_id.get(alert_id)
+    if alert is None and not snapshot.complete:
+        # campus_alerts holds more than ALERT_INDEX_LIMIT rows; the id may be
+        # older than the indexed window
+        doc = await db.campus_alerts.find_one({"id": alert_id})
+        alert = CampusAlert(**doc) if doc else None
+    if alert is None:
         raise HTTPException(status_code=404, detail="Alert not found")
-    return CampusAlert(**alert)
+    return with_read_flags([alert], await load_read_state(current_user))[0]
 
 # ==================== CAMPUS LOCATIONS ====================
 
+EARTH_RADIUS_M = 6371008.8
+
+def haversine_m(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlmb = math.radians(lng2 - lng1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlmb / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(min(1.0, math.sqrt(a)))
+
+class SpatialGrid:
+    """Uniform lat/lng bucket grid answering k-nearest queries by ring search.
+
+    Rings of cells are scanned outwards from the query cell until the k-th
+    best haversine distance is no further than the closest point any
+    unscanned ring could hold. Once the rings cover more cells than are
+    occupied (typically a query far off campus), the remaining work is a
+    linear scan of the points, so no query costs more than O(points).
+    """
+
+    def __init__(self, points: List[tuple], cell_deg: float):
+        # points: (lat, lng, item)
+        self.cell_deg = cell_deg
+        self.points = points
+        self.cells = {}
+        for index, (lat, lng, _) in enumerate(points):
+            self.cells.setdefault(self._cell(lat, lng), []).append(index)
+        if self.cells:
+            rows = [cell[0] for cell in self.cells]
+            cols = [cell[1] for cell in self.cells]
+            self._bounds = (min(rows), max(rows), min(cols), max(cols))
+
+    def _cell(self, lat: float, lng: float) -> tuple:
+        return (math.floor(lat / self.cell_deg), math.floor(lng / self.cell_deg))
+
+    def nearest(self, lat: float, lng: float, k: int) -> List[tuple]:
+        """[(distance_m, item)] for the k closest points, nearest first."""
+        if not self.cells:
+            return []
+        row, col = self._cell(lat, lng)
+        min_row, max_row, min_col, max_col = self._bounds
+        max_ring = max(abs(row - min_row), abs(row - max_row), abs(col - min_col), abs(col - max_col))
+        cell_m = self.cell_deg * math.pi / 180 * EARTH_RADIUS_M
+        ring_m = cell_m * max(0.01, math.cos(math.radians(min(89.0, abs(lat) + self.cell_deg))))
+        best = []
+        for ring in range(max_ring + 1):
+            if (2 * ring + 1) ** 2 > len(self.cells):
+                return self._scan(lat, lng, k)
+            for r in range(row - ring, row + ring + 1):
+                edge = abs(r - row) == ring
+                for c in (range(col - ring, col + ring + 1) if edge else (col - ring, col + ring)):
+                    for index in self.cells.get((r, c), ()):
+                        p_lat, p_lng, item = self.points[index]
+                        best.append((haversine_m(lat, lng, p_lat, p_lng), index, item))
+            if len(best) >= k:
+                best.sort(key=lambda entry: entry[:2])
+                del best[k:]
+                # Anything in ring+1 or beyond is at least ``ring`` whole cells away
+                if best[-1][0] <= ring * ring_m:
+                    break
+        best.sort(key=lambda entry: entry[:2])
+        return [(distance, item) for distance, _, item in best[:k]]
+
+    def _scan(self, lat: float, lng: float, k: int) -> List[tuple]:
+        best = heapq.nsmallest(k, (
+            (haversine_m(lat, lng, p_lat, p_lng), index, item)
+            for index, (p_lat, p_lng, item) in enumerate(self.points)
+        ), key=lambda entry: entry[:2])
+        return [(distance, item) for distance, _, item in best]
+
+class ClusterPyramid:
+    """Grid clusters precomputed for every zoom level, supercluster-style.
+
+    Level z splits the world into ``2**z * cells_per_tile`` columns, so one
+    cell is roughly ``256 / cells_per_tile`` screen pixels wide at that zoom
+    and each cell's parent is its index halved. Adding a point updates one
+    aggregate per level; a viewport query reads whole cells only.
+    """
+
+    def __init__(self, max_zoom: int = 18, cells_per_tile: int = 4):
+        self.max_zoom = max_zoom
+        self.cells_per_tile = cells_per_tile
+        self.sizes = [360.0 / ((1 << z) * cells_per_tile) for z in range(max_zoom + 1)]
+        # cell -> [count, sum_lat, sum_lng, {type: count}, first_item]
+        self.levels = [{} for _ in range(max_zoom + 1)]
+        self.count = 0
+
+    def add(self, lat: float, lng: float, kind: str, item: dict):
+        self.count += 1
+        for size, cells in zip(self.sizes, self.levels):
+            key = (math.floor((lat + 90.0) / size), math.floor((lng + 180.0) / size))
+            cell = cells.get(key)
+            if cell is None:
+                cells[key] = [1, lat, lng, {kind: 1}, item]
+            else:
+                cell[0] += 1
+                cell[1] += lat
+                cell[2] += lng
+                cell[3][kind] = cell[3].get(kind, 0) + 1
+
+    def _cells_in(self, z: int, min_lat: float, min_lng: float, max_lat: float, max_lng: float, cap: int):
+        size, cells = self.sizes[z], self.levels[z]
+        rows = range(math.floor((min_lat + 90.0) / size), math.floor((max_lat + 90.0) / size) + 1)
+        cols = range(math.floor((min_lng + 180.0) / size), math.floor((max_lng + 180.0) / size) + 1)
+        found = []
+        if len(rows) * len(cols) <= len(cells):
+            for r in rows:
+                for c in cols:
+                    cell = cells.get((r, c))
+                    if cell is not None:
+                        found.append(cell)
+                        if len(found) > cap:
+                            return None
+        else:
+            for (r, c), cell in cells.items():
+                if r in rows and c in cols:
+                    found.append(cell)
+                    if len(found) > cap:
+                        return None
+        return found
+
+    def query(self, min_lat: float, min_lng: float, max_lat: float, max_lng: float,
+              zoom: int, max_clusters: int) -> tuple:
+        """(zoom level used, clusters) with at most ``max_clusters`` entries."""
+        z = max(0, min(self.max_zoom, zoom))
+        while True:
+            found = self._cells_in(z, min_lat, min_lng, max_lat, max_lng, max_clusters)
+            if found is not None or z == 0:
+                break
+            # Too many cells in view at this zoom; fall back to coarser cells
+            z -= 1
+        clusters = []
+        for count, sum_lat, sum_lng, kinds, item in (found or [])[:max_clusters]:
+            if count == 1:
+                clusters.append({"count": 1, "lat": sum_lat, "lng": sum_lng, "types": kinds, "item": item})
+            else:
+                clusters.append({
+                    "count": count,
+                    "lat": round(sum_lat / count, 6),
+                    "lng": round(sum_lng / count, 6),
+                    "types": dict(kinds),
+                })
+        return z, clusters
+
+class CatalogSnapshot:
+    """Immutable, pre-grouped view of campus_locations for one data version."""
+
+    def __init__(self, locations: List[CampusLocation], version: int, complete: bool,
+                 cell_deg: float, list_limit: int, previous: Optional["CatalogSnapshot"] = None):
+        self.version = version
+        self.complete = complete
+        self.loaded_at = datetime.utcnow()
+        self.locations = tuple(locations)
+        self.by_type = {}
+        for location in self.locations:
+            self.by_type.setdefault(location.location_type, []).append(location)
+        self.by_type = {key: tuple(group) for key, group in self.by_type.items()}
+
+        groups = {None: self.locations, **self.by_type}
+        previous_payloads = previous.payloads if previous is not None else {}
+        self.payloads = {
+            key: CachedPayload(
+                json.dumps(jsonable_encoder(list(group[:list_limit]))).encode(),
+                self.loaded_at,
+                previous_payloads.get(key),
+            )
+            for key, group in groups.items()
+        }
+        self.empty_payload = CachedPayload(b"[]", self.loaded_at, previous.empty_payload if previous else None)
+        self.grids = {
+            key: SpatialGrid([(loc.lat, loc.lng, loc) for loc in group], cell_deg)
+            for key, group in groups.items()
+        } if complete else {}
+        self.clusters = ClusterPyramid()
+        for location in self.locations:
+            self.clusters.add(location.lat, location.lng, location.location_type, {
+                "id": location.id,
+                "name": location.name,
+                "location_type": location.location_type,
+            })
+
+        self.coordinates = {
+            key: np.array([(loc.lat, loc.lng) for loc in group], dtype=float).reshape(-1, 2)
+            for key, group in self.by_type.items()
+        }
+
+    def payload(self, location_type: Optional[str]) -> CachedPayload:
+        return self.payloads.get(location_type, self.empty_payload)
+
+class LocationCatalog(BackgroundWorker):
+    """Process-wide location catalog, swapped atomically on every reload.
+
+    Reloads follow a change stream on campus_locations (so admin tooling or
+    other workers writing the collection are picked up), coalesce bursts
+    such as seeding into one reload, fall back to a periodic reload without
+    change streams, and run immediately after this process seeds the
+    collection. Requests only read the current snapshot.
+    Catalogs larger than ``max_in_memory`` keep the first rows for listing
+    and answer nearest queries with $geoNear on the 2dsphere index.
+    """
+
+    def __init__(self, cell_deg: float, max_in_memory: int, list_limit: int, refresh_interval: float):
+        super().__init__()
+        self.cell_deg = cell_deg
+        self.max_in_memory = max_in_memory
+        self.list_limit = list_limit
+        self.refresh_interval = refresh_interval
+        self.snapshot: Optional[CatalogSnapshot] = None
+        self._version = 0
+        self._load_lock = asyncio.Lock()
+
+    async def reload(self):
+        async with self._load_lock:
+            docs = await db.campus_locations.find({}, {"_id": 0, "geo": 0}).to_list(self.max_in_memory + 1)
+            complete = len(docs) <= self.max_in_memory
+            self._version += 1
+            self.snapshot = CatalogSnapshot(
+                [CampusLocation(**doc) for doc in docs[:self.max_in_memory]],
+                self._version, complete, self.cell_deg, self.list_limit, self.snapshot,
+            )
+
+    async def _run(self):
+        try:
+            async with db.campus_locations.watch(
+                max_await_time_ms=int(CHANGE_DEBOUNCE_SECONDS * 1000)
+            ) as stream:
+                await self.reload()
+                async for _ in coalesced_changes(stream, CHANGE_DEBOUNCE_SECONDS):
+                    await self.reload()
+        except Exception as e:
+            logger.info(f"campus_locations change stream unavailable ({e}); reloading catalog periodically")
+        while True:
+            try:
+                await self.reload()
+            except Exception as e:
+                logger.error(f"Location catalog reload failed: {e}")
+            await asyncio.sleep(self.refresh_interval)
+
+    async def current(self) -> CatalogSnapshot:
+        if self.snapshot is None:
+            await self.reload()
+        return self.snapshot
+
+    async def nearest(self, lat: float, lng: float, location_type: Optional[str], k: int) -> List[NearbyLocation]:
+        snapshot = await self.current()
+        if snapshot.complete:
+            grid = snapshot.grids.get(location_type)
+            if grid is None:
+                return []
+            return [
+                NearbyLocation(**location.dict(), distance_m=round(distance, 1))
+                for distance, location in grid.nearest(lat, lng, k)
+            ]
+        query = {"location_type": location_type} if location_type else {}
+        docs = await db.campus_locations.aggregate([
+            {"$geoNear": {
+                "near": {"type": "Point", "coordinates": [lng, lat]},
+                "distanceField": "distance_m",
+                "key": "geo",
+                "query": query,
+                "spherical": True,
+            }},
+            {"$limit": k},
+            {"$project": {"_id": 0, "geo": 0}},
+        ]).to_list(k)
+        return [NearbyLocation(**{**doc, "distance_m": round(doc["distance_m"], 1)}) for doc in docs]
+
+    async def coordinates_within(self, location_type: str, min_lat: float, min_lng: float,
+                                 max_lat: float, max_lng: float) -> np.ndarray:
+        """(n, 2) array of [lat, lng] for one location type inside a bounding box."""
+        snapshot = await self.current()
+        if snapshot.complete:
+            points = snapshot.coordinates.get(location_type)
+            if points is None:
+                return np.empty((0, 2))
+            mask = (
+                (points[:, 0] >= min_lat) & (points[:, 0] <= max_lat)
+                & (points[:, 1] >= min_lng) & (points[:, 1] <= max_lng)
+            )
+            return points[mask]
+        docs = await db.campus_locations.find(
+            {
+                "location_type": location_type,
+                "geo": {"$geoWithin": {"$box": [[min_lng, min_lat], [max_lng, max_lat]]}},
+            },
+            {"_id": 0, "lat": 1, "lng": 1},
+        ).to_list(None)
+        return np.array([(doc["lat"], doc["lng"]) for doc in docs], dtype=float).reshape(-1, 2)
+
+    def stats(self) -> dict:
+        snapshot = self.snapshot
+        return {
+            "version": snapshot.version if snapshot else 0,
+            "locations": len(snapshot.locations) if snapshot else 0,
+            "complete": snapshot.complete if snapshot else False,
+            "loaded_at": snapshot.loaded_at if snapshot else None,
+        }
+
+location_catalog = LocationCatalog(
+    cell_deg=float(os.environ.get('LOCATION_GRID_CELL_DEGREES', '0.002')),
+    max_in_memory=int(os.environ.get('LOCATION_MAX_IN_MEMORY', '50000')),
+    list_limit=100,
+    refresh_interval=float(os.environ.get('LOCATION_CATALOG_REFRESH_SECONDS', '60')),
+)
+
 @api_router.get("/locations", response_model=List[CampusLocation])
-async def get_campus_locations(location_type: Optional[str] = None):
-    query = {}
-    if location_type:
-        query["location_type"] = location_type
-    locations = await db.campus_locations.find(query).to_list(100)
-    return [CampusLocation(**loc) for loc in locations]
+async def get_campus_locations(request: Request, location_type: Optional[str] = None):
+    snapshot = await location_catalog.current()
+    return conditional_response(request, snapshot.payload(location_type))
+
+def location_geo_point(lat: float, lng: float) -> dict:
+    """GeoJSON point stored alongside lat/lng for the 2dsphere index."""
+    return {"type": "Point", "coordinates": [lng, lat]}
+
+async def backfill_location_geo():
+    result = await db.campus_locations.update_many(
+        {"geo": {"$exists": False}},
+        [{"$set": {"geo": {"type": "Point", "coordinates": ["$lng", "$lat"]}}}],
+    )
+    if result.modified_count:
+        logger.info(f"Backfilled GeoJSON points on {result.modified_count} campus location(s)")
+
+@api_router.get("/locations/nearest", response_model=List[NearbyLocation])
+async def get_nearest_locations(
+    lat: float = Query(..., ge=-90, le=90),
+    lng: float = Query(..., ge=-180, le=180),
+    type: Optional[str] = None,
+    k: int = Query(3, ge=1, le=25),
+):
+    """Closest campus resources (optionally of one type), sorted by haversine distance."""
+    return await location_catalog.nearest(lat, lng, type, k)
+
+# ==================== MAP ====================
+
+class IncidentPointIndex(BackgroundWorker):
+    """Clustered positions of recently reported incidents for the map.
+
+    Only id, type and coordinates are held. New reports from this process
+    are added incrementally; a periodic rebuild picks up reports made on
+    other workers and drops ones older than ``window_days``.
+    """
+
+    def __init__(self, window_days: int, refresh_interval: float):
+        super().__init__()
+        self.window_days = window_days
+        self.refresh_interval = refresh_interval
+        self.pyramid: Optional[ClusterPyramid] = None
+        self._coordinates = np.empty((0, 2))
+        self._pending = []
+        self._load_lock = asyncio.Lock()
+
+    @staticmethod
+    def _add(pyramid: ClusterPyramid, doc: dict) -> Optional[tuple]:
+        """Index one report; returns its (lat, lng), or None if it cannot be placed."""
+        try:
+            lat, lng = float(doc["location_lat"]), float(doc["location_lng"])
+            if not (-90.0 <= lat <= 90.0 and -180.0 <= lng <= 180.0):
+                raise ValueError(f"coordinates out of range ({lat}, {lng})")
+            # No id: map viewers must not be able to look the report itself up
+            pyramid.add(lat, lng, doc["incident_type"], {"incident_type": doc["incident_type"]})
+        except (KeyError, TypeError, ValueError) as e:
+            logger.warning(f"Skipping incident {doc.get('id')} on the map: {e}")
+            return None
+        return lat, lng
+
+    async def reload(self):
+        async with self._load_lock:
+            cutoff = datetime.utcnow() - timedelta(days=self.window_days)
+            pyramid = ClusterPyramid()
+            coordinates = []
+            cursor = db.incidents.find(
+                {"created_at": {"$gte": cutoff}},
+                {"_id": 0, "id": 1, "incident_type": 1, "location_lat": 1, "location_lng": 1},
+            )
+            async for doc in cursor:
+                point = self._add(pyramid, doc)
+                if point is not None:
+                    coordinates.append(point)
+            self.pyramid = pyramid
+            self._coordinates = np.array(coordinates, dtype=float).reshape(-1, 2)
+            self._pending = []
+
+    def add(self, incident_doc: dict):
+        if self.pyramid is not None:
+            point = self._add(self.pyramid, incident_doc)
+            if point is not None:
+                self._pending.append(point)
+
+    async def coordinates(self) -> np.ndarray:
+        """(n, 2) array of [lat, lng] for every incident in the window."""
+        await self.current()
+        if self._pending:
+            self._coordinates = np.vstack([self._coordinates, np.array(self._pending, dtype=float)])
+            self._pending = []
+        return self._coordinates
+
+    async def _run(self):
+        while True:
+            try:
+                await self.reload()
+            except Exception as e:
+                logger.error(f"Incident map index reload failed: {e}")
+            await asyncio.sleep(self.refresh_interval)
+
+    async def current(self) -> ClusterPyramid:
+        if self.pyramid is None:
+            await self.reload()
+        return self.pyramid
+
+    def stats(self) -> dict:
+        return {
+            "incidents": self.pyramid.count if self.pyramid else 0,
+            "window_days": self.window_days,
+        }
+
+incident_points = IncidentPointIndex(
+    window_days=int(os.environ.get('INCIDENT_MAP_WINDOW_DAYS', '90')),
+    refresh_interval=float(os.environ.get('INCIDENT_MAP_REFRESH_SECONDS', '300')),
+)
+
+MAP_MAX_CLUSTERS = int(os.environ.get('MAP_MAX_CLUSTERS', '256'))
+
+@api_router.get("/map/clusters")
+async def get_map_clusters(
+    min_lat: float = Query(..., ge=-90, le=90),
+    min_lng: float = Query(..., ge=-180, le=180),
+    max_lat: float = Query(..., ge=-90, le=90),
+    max_lng: float = Query(..., ge=-180, le=180),
+    zoom: int = Query(..., ge=0, le=22),
+    layers: str = "locations,incidents",
+    current_user: dict = Depends(get_current_user),
+):
+    """Clustered markers for a viewport; each layer holds at most MAP_MAX_CLUSTERS entries."""
+    if min_lat > max_lat or min_lng > max_lng:
+        raise HTTPException(status_code=400, detail="Invalid bounding box")
+    wanted = {layer.strip() for layer in layers.split(",") if layer.strip()}
+    result = {"zoom": zoom}
+    if "locations" in wanted:
+        snapshot = await location_catalog.current()
+        level, clusters = snapshot.clusters.query(min_lat, min_lng, max_lat, max_lng, zoom, MAP_MAX_CLUSTERS)
+        result["locations"] = {"cluster_zoom": level, "clusters": clusters}
+    if "incidents" in wanted:
+        pyramid = await incident_points.current()
+        level, clusters = pyramid.query(min_lat, min_lng, max_lat, max_lng, zoom, MAP_MAX_CLUSTERS)
+        result["incidents"] = {"cluster_zoom": level, "clusters": clusters}
+    return result
+
+# ==================== ROUTE SAFETY ====================
+
+ROUTE_MAX_SAMPLES = int(os.environ.get('ROUTE_MAX_SAMPLES', '2000'))
+ROUTE_MAX_VERTICES = 1000
+PHONE_RANGE_M = 250.0
+SAFE_BUILDING_RANGE_M = 200.0
+INCIDENT_RADIUS_M = 100.0
+# Caps the (samples x points) distance matrix held in memory at once
+ROUTE_DISTANCE_BLOCK = 1_000_000
+
+def haversine_matrix_m(lats: np.ndarray, lngs: np.ndarray, points: np.ndarray) -> np.ndarray:
+    """(len(lats), len(points)) haversine distances, vectorised."""
+    phi1 = np.radians(lats)[:, None]
+    phi2 = np.radians(points[:, 0])[None, :]
+    dphi = phi2 - phi1
+    dlmb = np.radians(points[:, 1])[None, :] - np.radians(lngs)[:, None]
+    a = np.sin(dphi / 2) ** 2 + np.cos(phi1) * np.cos(phi2) * np.sin(dlmb / 2) ** 2
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.minimum(1.0, a)))
+
+def sample_route(lats: np.ndarray, lngs: np.ndarray, spacing_m: float, max_samples: int) -> tuple:
+    """Evenly spaced samples along a polyline: (lats, lngs, distance along route)."""
+    legs = 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.minimum(1.0,
+        np.sin(np.radians(np.diff(lats)) / 2) ** 2
+        + np.cos(np.radians(lats[:-1])) * np.cos(np.radians(lats[1:]))
+        * np.sin(np.radians(np.diff(lngs)) / 2) ** 2
+    )))
+    # np.interp needs strictly increasing distances, so drop repeated vertices
+    keep = np.concatenate([[True], legs > 0])
+    lats, lngs = lats[keep], lngs[keep]
+    along = np.concatenate([[0.0], np.cumsum(legs[legs > 0])])
+    total = float(along[-1])
+    count = int(min(max_samples, max(2, math.ceil(total / spacing_m) + 1)))
+    distances = np.linspace(0.0, total, count)
+    return np.interp(distances, along, lats), np.interp(distances, along, lngs), distances
+
+def proximity(lats: np.ndarray, lngs: np.ndarray, points: np.ndarray, radius_m: float) -> tuple:
+    """Per sample: distance to the closest point (inf if none) and points within ``radius_m``.
+
+    The second value is a boolean (samples x points) mask so callers can
+    count distinct points per group of samples.
+    """
+    nearest = np.full(len(lats), np.inf)
+    within = np.zeros((len(lats), len(points)), dtype=bool)
+    if not len(points):
+        return nearest, within
+    step = max(1, ROUTE_DISTANCE_BLOCK // len(points))
+    for start in range(0, len(lats), step):
+        block = haversine_matrix_m(lats[start:start + step], lngs[start:start + step], points)
+        nearest[start:start + step] = block.min(axis=1)
+        within[start:start + step] = block <= radius_m
+    return nearest, within
+
+def sample_scores(phone_m: np.ndarray, building_m: np.ndarray, incidents: np.ndarray) -> np.ndarray:
+    """0-100 score per sample.
+
+    Coverage by an emergency phone and a safe building each add up to a
+    quarter of the score, fading linearly to zero at their range; nearby
+    incidents scale the result down by up to half.
+    """
+    phone = np.clip(1 - phone_m / PHONE_RANGE_M, 0, 1)
+    building = np.clip(1 - building_m / SAFE_BUILDING_RANGE_M, 0, 1)
+    risk = 1 - np.exp(-incidents / 2.0)
+    return 100 * (0.5 + 0.25 * phone + 0.25 * building) * (1 - 0.5 * risk)
+
+def _finite_or_none(value: float) -> Optional[float]:
+    return round(float(value), 1) if np.isfinite(value) else None
+
+@api_router.post("/route/safety", response_model=RouteSafety)
+async def score_route_safety(route: RouteSafetyRequest, current_user: dict = Depends(get_current_user)):
+    """Score a walking route against emergency phones, safe buildings and recent incidents."""
+    if route.path:
+        if len(route.path) < 2 or len(route.path) > ROUTE_MAX_VERTICES:
+            raise HTTPException(status_code=400, detail=f"Path must have 2 to {ROUTE_MAX_VERTICES} points")
+        vertices = np.array([(point.lat, point.lng) for point in route.path], dtype=float)
+    elif None not in (route.start_lat, route.start_lng, route.end_lat, route.end_lng):
+        vertices = np.array([(route.start_lat, route.start_lng), (route.end_lat, route.end_lng)], dtype=float)
+    else:
+        raise HTTPException(status_code=400, detail="Provide a path or start and end coordinates")
+
+    lats, lngs, along = sample_route(vertices[:, 0], vertices[:, 1], route.sample_spacing_m, ROUTE_MAX_SAMPLES)
+
+    # Only resources that can influence some sample are worth a distance column
+    margin_m = max(PHONE_RANGE_M, SAFE_BUILDING_RANGE_M, INCIDENT_RADIUS_M)
+    margin_lat = math.degrees(margin_m / EARTH_RADIUS_M)
+    margin_lng = margin_lat / max(0.01, math.cos(math.radians(min(89.0, float(np.abs(lats).max())))))
+    box = (lats.min() - margin_lat, lngs.min() - margin_lng, lats.max() + margin_lat, lngs.max() + margin_lng)
+    phones = await location_catalog.coordinates_within("emergency_phone", *box)
+    buildings = await location_catalog.coordinates_within("safe_building", *box)
+    incidents = await incident_points.coordinates()
+    incidents = incidents[
+        (incidents[:, 0] >= box[0]) & (incidents[:, 1] >= box[1])
+        & (incidents[:, 0] <= box[2]) & (incidents[:, 1] <= box[3])
+    ]
+
+    phone_m, _ = proximity(lats, lngs, phones, PHONE_RANGE_M)
+    building_m, _ = proximity(lats, lngs, buildings, SAFE_BUILDING_RANGE_M)
+    _, incident_mask = proximity(lats, lngs, incidents, INCIDENT_RADIUS_M)
+    scores = sample_scores(phone_m, building_m, incident_mask.sum(axis=1))
+
+    # Group samples into fixed-length segments; the final sample closes the last one
+    last_segment = max(0, math.ceil(along[-1] / route.segment_length_m) - 1)
+    segment_ids = np.minimum((along // route.segment_length_m).astype(int), last_segment)
+    starts = np.flatnonzero(np.concatenate([[True], np.diff(segment_ids) != 0]))
+    ends = np.concatenate([starts[1:], [len(scores)]])
+    segment_score = np.add.reduceat(scores, starts) / (ends - starts)
+    segment_min = np.minimum.reduceat(scores, starts)
+    segment_phone = np.minimum.reduceat(phone_m, starts)
+    segment_building = np.minimum.reduceat(building_m, starts)
+    segment_incidents = (
+        np.logical_or.reduceat(incident_mask, starts, axis=0).sum(axis=1)
+        if incident_mask.shape[1] else np.zeros(len(starts), dtype=int)
+    )
+
+    segments = []
+    for index, (start, end) in enumerate(zip(starts, ends)):
+        last = min(end, len(scores) - 1)
+        segments.append(RouteSegmentSafety(
+            start=RoutePoint(lat=float(lats[start]), lng=float(lngs[start])),
+            end=RoutePoint(lat=float(lats[last]), lng=float(lngs[last])),
+            length_m=round(float(along[last] - along[start]), 1),
+            score=round(float(segment_score[index]), 1),
+            min_score=round(float(segment_min[index]), 1),
+            nearest_phone_m=_finite_or_none(segment_phone[index]),
+            nearest_safe_building_m=_finite_or_none(segment_building[index]),
+            incidents_nearby=int(segment_incidents[index]),
+        ))
+    return RouteSafety(
+        score=round(float(scores.mean()), 1),
+        min_score=round(float(scores.min()), 1),
+        length_m=round(float(along[-1]), 1),
+        samples=len(scores),
+        segments=segments,
+    )
 
 # ==================== SEED DATA ====================
 
@@ -711,6 +4240,7 @@ async def seed_data():
     # Clear existing alerts and add new ones
     await db.campus_alerts.delete_many({})
     await db.campus_alerts.insert_many(alerts)
+    await alert_feed.refresh()
     
     # Seed campus locations
     locations = [
@@ -728,11 +4258,185 @@ async def seed_data():
         {"id": str(uuid.uuid4()), "name": "Residence Parking", "description": "Residence parking lot - Permit required", "location_type": "parking", "lat": 45.0868, "lng": -64.3672}
     ]
     
+    for location in locations:
+        location["geo"] = location_geo_point(location["lat"], location["lng"])
     await db.campus_locations.delete_many({})
     await db.campus_locations.insert_many(locations)
+    await location_catalog.reload()
     
     return {"message": "Data seeded successfully", "alerts": len(alerts), "locations": len(locations)}
 
+# ==================== INDEXES ====================
+
+# Every index the API relies on. Names carry the MANAGED_INDEX_PREFIX so that
+# reconciliation only ever drops indexes this module created.
+MANAGED_INDEX_PREFIX = "acadia_"
+
+REQUIRED_INDEXES = {
+    "users": [
+        IndexModel([("email", ASCENDING)], name="acadia_users_email", unique=True),
+        IndexModel([("id", ASCENDING)], name="acadia_users_id", unique=True),
+    ],
+    "sos_alerts": [
+        IndexModel([("id", ASCENDING)], name="acadia_sos_id", unique=True),
+        IndexModel([("user_id", ASCENDING), ("status", ASCENDING)], name="acadia_sos_user_status"),
+        IndexModel([("status", ASCENDING), ("created_at", ASCENDING)], name="acadia_sos_status_created"),
+        IndexModel(
+            [("mirror.pending", ASCENDING), ("mirror.next_attempt_at", ASCENDING)],
+            name="acadia_sos_mirror_pending",
+            partialFilterExpression={"mirror.pending": True},
+        ),
+        IndexModel(
+            [("notify.pending", ASCENDING), ("notify.next_attempt_at", ASCENDING)],
+            name="acadia_sos_notify_pending",
+            partialFilterExpression={"notify.pending": True},
+        ),
+    ],
+    "escort_requests": [
+        IndexModel([("id", ASCENDING)], name="acadia_escorts_id", unique=True),
+        IndexModel([("user_id", ASCENDING), ("status", ASCENDING)], name="acadia_escorts_user_status"),
+    ],
+    "friend_walks": [
+        IndexModel([("id", ASCENDING)], name="acadia_walks_id", unique=True),
+        IndexModel([("user_id", ASCENDING), ("status", ASCENDING)], name="acadia_walks_user_status"),
+        IndexModel([("status", ASCENDING), ("overdue_at", ASCENDING)], name="acadia_walks_status_overdue"),
+        IndexModel(
+            [("notify.pending", ASCENDING), ("notify.next_attempt_at", ASCENDING)],
+            name="acadia_walks_notify_pending",
+            partialFilterExpression={"notify.pending": True},
+        ),
+    ],
+    "incidents": [
+        IndexModel([("id", ASCENDING)], name="acadia_incidents_id", unique=True),
+        IndexModel([("user_id", ASCENDING), ("created_at", DESCENDING)], name="acadia_incidents_user_created"),
+        IndexModel([("created_at", DESCENDING)], name="acadia_incidents_created"),
+    ],
+    "campus_alerts": [
+        IndexModel([("id", ASCENDING)], name="acadia_alerts_id", unique=True),
+        IndexModel([("created_at", DESCENDING), ("id", DESCENDING)], name="acadia_alerts_created"),
+    ],
+    "campus_locations": [
+        IndexModel([("location_type", ASCENDING)], name="acadia_locations_type"),
+        IndexModel([("geo", "2dsphere"), ("location_type", ASCENDING)], name="acadia_locations_geo"),
+    ],
+    "alert_reads": [
+        IndexModel([("user_id", ASCENDING)], name="acadia_alert_reads_user", unique=True),
+    ],
+    "sos_trail": [
+        IndexModel([("meta.sos_id", ASCENDING), ("ts", ASCENDING)], name="acadia_sos_trail_sos_ts"),
+    ],
+    "idempotency_keys": [
+        IndexModel([("created_at", ASCENDING)], name="acadia_idempotency_ttl",
+                   expireAfterSeconds=IDEMPOTENCY_TTL_SECONDS),
+    ],
+}
+
+# Queries issued on hot request paths: (collection, filter, sort).
+HOT_QUERIES = [
+    ("users", {"email": "probe@acadiau.ca"}, None),
+    ("users", {"id": "probe"}, None),
+    ("sos_alerts", {"id": "probe", "user_id": "probe"}, None),
+    ("sos_alerts", {"user_id": "probe", "status": "active"}, None),
+    ("sos_alerts", {"status": "active"}, [("created_at", 1)]),
+    ("sos_alerts", {"mirror.pending": True, "mirror.next_attempt_at": {"$lte": datetime(2000, 1, 1)}},
+     [("mirror.next_attempt_at", 1)]),
+    ("sos_alerts", {"notify.pending": True, "notify.next_attempt_at": {"$lte": datetime(2000, 1, 1)}},
+     [("notify.next_attempt_at", 1)]),
+    ("escort_requests", {"user_id": "probe", "status": {"$in": ["pending", "assigned"]}}, None),
+    ("friend_walks", {"user_id": "probe", "status": "active"}, None),
+    ("friend_walks", {"status": "active", "overdue_at": None}, None),
+    ("friend_walks", {"notify.pending": True, "notify.next_attempt_at": {"$lte": datetime(2000, 1, 1)}},
+     [("notify.next_attempt_at", 1)]),
+    ("incidents", {"user_id": "probe"}, [("created_at", -1)]),
+    ("incidents", {"id": "probe"}, None),
+    ("incidents", {"created_at": {"$gte": datetime(2000, 1, 1)}}, None),
+    ("campus_alerts", {}, [("created_at", -1), ("id", -1)]),
+    ("campus_alerts", {"id": "probe"}, None),
+    ("campus_locations", {"location_type": "aed"}, None),
+    ("alert_reads", {"user_id": "probe"}, None),
+    ("sos_trail", {"meta.sos_id": "probe"}, [("ts", 1)]),
+]
+
+def _index_signature(key, unique, expire_after=None) -> tuple:
+    return (tuple((field, int(direction) if isinstance(direction, (int, float)) else direction)
+                  for field, direction in key), bool(unique), expire_after)
+
+async def ensure_indexes() -> dict:
+    """Create missing indexes and rebuild or drop stale managed ones."""
+    report = {"created": [], "rebuilt": [], "dropped": [], "errors": []}
+    for collection_name, models in REQUIRED_INDEXES.items():
+        collection = db[collection_name]
+        try:
+            existing = await collection.index_information()
+        except OperationFailure:
+            existing = {}
+        declared = {model.document["name"]: model for model in models}
+
+        for name, info in existing.items():
+            if not name.startswith(MANAGED_INDEX_PREFIX) or name in declared:
+                continue
+            await collection.drop_index(name)
+            report["dropped"].append(f"{collection_name}.{name}")
+
+        for name, model in declared.items():
+            spec = model.document
+            wanted = _index_signature(spec["key"].items(), spec.get("unique"), spec.get("expireAfterSeconds"))
+            current = existing.get(name)
+            try:
+                if current is not None:
+                    if _index_signature(current["key"], current.get("unique"),
+                                        current.get("expireAfterSeconds")) == wanted:
+                        continue
+                    await collection.drop_index(name)
+                    await collection.create_indexes([model])
+                    report["rebuilt"].append(f"{collection_name}.{name}")
+                else:
+                    await collection.create_indexes([model])
+                    report["created"].append(f"{collection_name}.{name}")
+            except OperationFailure as e:
+                logger.error(f"Index {collection_name}.{name} could not be built: {e}")
+                report["errors"].append(f"{collection_name}.{name}: {e}")
+    return report
+
+def _plan_stages(plan) -> List[str]:
+    stages = []
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            stages.append(plan["stage"])
+        for value in plan.values():
+            stages.extend(_plan_stages(value))
+    elif isinstance(plan, list):
+        for item in plan:
+            stages.extend(_plan_stages(item))
+    return stages
+
+async def verify_query_plans() -> List[dict]:
+    """explain() each hot query and flag collection scans and in-memory sorts."""
+    results = []
+    for collection_name, query, sort in HOT_QUERIES:
+        find_cmd = {"find": collection_name, "filter": query, "limit": 1}
+        if sort:
+            find_cmd["sort"] = dict(sort)
+        entry = {"collection": collection_name, "filter": query, "sort": find_cmd.get("sort")}
+        try:
+            explained = await db.command({"explain": find_cmd, "verbosity": "queryPlanner"})
+            stages = _plan_stages(explained.get("queryPlanner", {}).get("winningPlan", {}))
+            entry["stages"] = stages
+            entry["indexed"] = "COLLSCAN" not in stages and "SORT" not in stages
+        except OperationFailure as e:
+            entry["stages"] = []
+            entry["indexed"] = False
+            entry["error"] = str(e)
+        results.append(entry)
+    return results
+
+@api_router.get("/diagnostics/indexes")
+async def index_diagnostics(_: bool = Depends(require_responder)):
+    plans = await verify_query_plans()
+    failing = [plan for plan in plans if not plan["indexed"]]
+    body = {"status": "ok" if not failing else "unindexed_queries", "failing": len(failing), "queries": plans}
+    return JSONResponse(status_code=200 if not failing else 503, content=jsonable_encoder(body))
+
 # ==================== HEALTH CHECK ====================
 
 @api_router.get("/")
@@ -741,7 +4445,25 @@ async def root():
 
 @api_router.get("/health")
 async def health():
-    return {"status": "healthy", "timestamp": datetime.utcnow()}
+    return {
+        "status": "healthy",
+        "timestamp": datetime.utcnow(),
+        "principal_cache": principal_cache.stats(),
+        "password_hasher": password_hasher.stats(),
+        "dashboard_bridge": dashboard_breaker.snapshot(),
+        "dashboard_outbox": dashboard_outbox.stats(),
+        "notifications": notification_dispatcher.stats(),
+        "sos_trail": sos_trail.stats(),
+        "location_tracks": location_tracks.stats(),
+        "walk_scheduler": walk_scheduler.stats(),
+        "walk_shares": walk_shares.stats(),
+        "idempotency": idempotency_store.stats(),
+        "responder_board": responder_board.stats(),
+        "alert_feed": alert_feed.stats(),
+        "push": push_hub.stats(),
+        "location_catalog": location_catalog.stats(),
+        "incident_points": incident_points.stats(),
+    }
 
 # Include the router in the main app
 app.include_router(api_router)
@@ -752,8 +4474,66 @@ app.add_middleware(
     allow_origins=["*"],
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "Last-Modified", "X-Alerts-Cursor", "X-Next-Cursor"],
 )
 
+@app.on_event("startup")
+async def bootstrap_indexes():
+    try:
+        await backfill_location_geo()
+        # Must exist before ensure_indexes would implicitly create a plain collection
+        await ensure_sos_trail_collection()
+        report = await ensure_indexes()
+        logger.info(f"Index bootstrap: {report}")
+        failing = [plan for plan in await verify_query_plans() if not plan["indexed"]]
+        for plan in failing:
+            logger.error(f"Hot query is not index-backed: {plan['collection']} {plan['filter']} -> {plan['stages']}")
+    except Exception as e:
+        logger.error(f"Index bootstrap failed: {e}")
+
+@app.on_event("startup")
+async def start_dashboard_outbox():
+    dashboard_outbox.start()
+
+@app.on_event("startup")
+async def start_notification_dispatcher():
+    notification_dispatcher.start()
+
+@app.on_event("startup")
+async def start_sos_trail():
+    sos_trail.start()
+
+@app.on_event("startup")
+async def start_location_tracks():
+    location_tracks.start()
+
+@app.on_event("startup")
+async def start_walk_scheduler():
+    walk_scheduler.start()
+
+@app.on_event("startup")
+async def start_alert_feed():
+    alert_feed.start()
+
+@app.on_event("startup")
+async def start_location_catalog():
+    location_catalog.start()
+
+@app.on_event("startup")
+async def start_incident_points():
+    incident_points.start()
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
+    await alert_feed.stop()
+    await location_catalog.stop()
+    await incident_points.stop()
+    await sos_trail.stop()
+    await walk_scheduler.stop()
+    await location_tracks.stop()
+    await dashboard_outbox.stop()
+    await notification_dispatcher.stop()
+    for transport in notification_dispatcher.transports.values():
+        await transport.close()
+    password_hasher.shutdown()
     client.close()
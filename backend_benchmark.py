@@ -0,0 +1,270 @@
+import asyncio
+import requests
+import ssl
+import statistics
+import sys
+import threading
+import time
+from datetime import datetime
+from urllib.parse import urlparse
+
+# Base URL for the API
+BASE_URL = "http://localhost:8001/api"
+
+# Test credentials
+TEST_EMAIL = "nitish.sahni@acadiau.ca"
+TEST_PASSWORD = "test123"
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of a list of samples"""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100.0 * len(ordered))) - 1))
+    return ordered[index]
+
+class AcadiaSafeBenchmark:
+    def __init__(self):
+        self.base_url = BASE_URL
+        self.token = None
+        self.results = {}
+
+    def log_result(self, name, samples_ms, extra=""):
+        """Log latency summary for a benchmark"""
+        summary = {
+            "count": len(samples_ms),
+            "p50_ms": round(percentile(samples_ms, 50), 2),
+            "p95_ms": round(percentile(samples_ms, 95), 2),
+            "p99_ms": round(percentile(samples_ms, 99), 2),
+            "max_ms": round(max(samples_ms), 2) if samples_ms else 0.0,
+            "mean_ms": round(statistics.mean(samples_ms), 2) if samples_ms else 0.0,
+            "timestamp": datetime.now().isoformat()
+        }
+        self.results[name] = summary
+        print(f"📊 {name}: n={summary['count']} p50={summary['p50_ms']}ms "
+              f"p95={summary['p95_ms']}ms p99={summary['p99_ms']}ms max={summary['max_ms']}ms {extra}")
+
+    def get_headers(self, include_auth=False):
+        """Get headers for API requests"""
+        headers = {"Content-Type": "application/json"}
+        if include_auth and self.token:
+            headers["Authorization"] = f"Bearer {self.token}"
+        return headers
+
+    def login(self):
+        """Obtain a token for the authenticated probes"""
+        response = requests.post(
+            f"{self.base_url}/auth/login",
+            json={"email": TEST_EMAIL, "password": TEST_PASSWORD},
+            headers=self.get_headers()
+        )
+        response.raise_for_status()
+        self.token = response.json()["token"]
+
+    def probe_sos_latency(self, duration_s, samples_ms, stop_event=None):
+        """Poll the SOS status endpoint and record latency until time runs out"""
+        session = requests.Session()
+        deadline = time.monotonic() + duration_s
+        while time.monotonic() < deadline and not (stop_event and stop_event.is_set()):
+            start = time.perf_counter()
+            session.get(f"{self.base_url}/sos/active", headers=self.get_headers(include_auth=True))
+            samples_ms.append((time.perf_counter() - start) * 1000)
+            time.sleep(0.05)
+
+    def bench_sos_during_login_storm(self, duration_s=10, storm_threads=32):
+        """Measure /api/sos latency at rest and while many logins hash passwords"""
+        print("\n=== SOS latency during login storm ===")
+        self.login()
+
+        idle_samples = []
+        self.probe_sos_latency(duration_s / 2, idle_samples)
+        self.log_result("SOS latency (idle)", idle_samples)
+
+        stop = threading.Event()
+        login_counts = {"ok": 0, "busy": 0, "other": 0}
+        lock = threading.Lock()
+
+        def storm():
+            session = requests.Session()
+            while not stop.is_set():
+                response = session.post(
+                    f"{self.base_url}/auth/login",
+                    json={"email": TEST_EMAIL, "password": TEST_PASSWORD},
+                    headers=self.get_headers()
+                )
+                key = "ok" if response.status_code == 200 else "busy" if response.status_code == 503 else "other"
+                with lock:
+                    login_counts[key] += 1
+
+        workers = [threading.Thread(target=storm, daemon=True) for _ in range(storm_threads)]
+        for worker in workers:
+            worker.start()
+
+        storm_samples = []
+        self.probe_sos_latency(duration_s, storm_samples)
+        stop.set()
+        for worker in workers:
+            worker.join(timeout=5)
+
+        self.log_result(
+            "SOS latency (login storm)",
+            storm_samples,
+            f"logins ok={login_counts['ok']} 503={login_counts['busy']} other={login_counts['other']}"
+        )
+
+    async def _hold_sse_connection(self, host, port, use_ssl, path, hold_s, counters):
+        """Open one SSE stream and keep reading heartbeats until time runs out"""
+        try:
+            reader, writer = await asyncio.wait_for(
+                asyncio.open_connection(host, port, ssl=ssl.create_default_context() if use_ssl else None),
+                timeout=30
+            )
+            writer.write(
+                f"GET {path} HTTP/1.1\r\nHost: {host}\r\nAccept: text/event-stream\r\n"
+                f"Authorization: Bearer {self.token}\r\n\r\n".encode()
+            )
+            await writer.drain()
+            status_line = await asyncio.wait_for(reader.readline(), timeout=30)
+            if b" 200 " not in status_line:
+                counters["failed"] += 1
+                writer.close()
+                return
+            counters["open"] += 1
+            deadline = time.monotonic() + hold_s
+            while time.monotonic() < deadline:
+                try:
+                    line = await asyncio.wait_for(reader.readline(), timeout=max(0.1, deadline - time.monotonic()))
+                except asyncio.TimeoutError:
+                    break
+                if not line:
+                    counters["dropped"] += 1
+                    break
+                if line.startswith(b": ping"):
+                    counters["heartbeats"] += 1
+            counters["open"] -= 1
+            writer.close()
+        except Exception:
+            counters["failed"] += 1
+
+    def bench_idle_push_connections(self, connections=2000, hold_s=60, ramp_per_s=500):
+        """Hold thousands of idle SSE streams on one worker and probe latency meanwhile"""
+        print("\n=== Idle push connections ===")
+        if not self.token:
+            self.login()
+        parsed = urlparse(self.base_url)
+        use_ssl = parsed.scheme == "https"
+        port = parsed.port or (443 if use_ssl else 80)
+        path = f"{parsed.path.rstrip('/')}/events"
+        counters = {"open": 0, "failed": 0, "dropped": 0, "heartbeats": 0}
+        peak = {"open": 0}
+
+        async def run():
+            tasks = []
+            for i in range(connections):
+                tasks.append(asyncio.create_task(
+                    self._hold_sse_connection(parsed.hostname, port, use_ssl, path, hold_s, counters)
+                ))
+                if (i + 1) % ramp_per_s == 0:
+                    await asyncio.sleep(1)
+                    peak["open"] = max(peak["open"], counters["open"])
+
+            samples = []
+            probe_deadline = time.monotonic() + hold_s / 2
+            while time.monotonic() < probe_deadline:
+                start = time.perf_counter()
+                await asyncio.to_thread(
+                    requests.get, f"{self.base_url}/sos/active", headers=self.get_headers(include_auth=True)
+                )
+                samples.append((time.perf_counter() - start) * 1000)
+                peak["open"] = max(peak["open"], counters["open"])
+                await asyncio.sleep(0.2)
+            await asyncio.gather(*tasks)
+            return samples
+
+        samples = asyncio.run(run())
+        self.log_result(
+            "SOS latency with idle push connections",
+            samples,
+            f"peak_open={peak['open']} failed={counters['failed']} dropped={counters['dropped']} "
+            f"heartbeats={counters['heartbeats']}"
+        )
+
+    def bench_state_transitions(self, iterations=200):
+        """Latency of the status-guarded single-document mutations.
+
+        Run against the build before and after a change to compare. This
+        writes real data: ``iterations`` escort requests (each cancelled at
+        once, but visible to dispatch meanwhile), a friend walk and profile
+        edits on the test account. Only run it against a local or staging
+        deployment; run_all_benchmarks skips it unless asked.
+        """
+        print("\n=== State transition latency ===")
+        if not self.token:
+            self.login()
+        session = requests.Session()
+        headers = self.get_headers(include_auth=True)
+
+        # Start from a clean slate so the walk and escort creations succeed
+        walk = session.get(f"{self.base_url}/friend-walk/active", headers=headers).json()
+        if walk:
+            session.put(f"{self.base_url}/friend-walk/{walk['id']}/complete", headers=headers)
+        escort = session.get(f"{self.base_url}/escorts/active", headers=headers).json()
+        if escort:
+            session.put(f"{self.base_url}/escorts/{escort['id']}/cancel", headers=headers)
+        profile = session.get(f"{self.base_url}/auth/me", headers=headers).json()
+
+        walk = session.post(
+            f"{self.base_url}/friend-walk",
+            json={"contact_ids": [], "duration_minutes": 30, "location_lat": 45.0875, "location_lng": -64.3665},
+            headers=headers
+        ).json()
+        escort_body = {
+            "pickup_lat": 45.0875, "pickup_lng": -64.3665, "pickup_name": "Benchmark pickup",
+            "destination_lat": 45.0890, "destination_lng": -64.3680, "destination_name": "Benchmark destination",
+            "notes": "Automated latency benchmark - not a real request",
+        }
+
+        samples = {"extend": [], "profile": [], "escort cancel": []}
+        statuses = {"ok": 0, "other": 0}
+
+        def timed(name, method, url, **kwargs):
+            start = time.perf_counter()
+            response = method(url, headers=headers, **kwargs)
+            samples[name].append((time.perf_counter() - start) * 1000)
+            statuses["ok" if response.status_code == 200 else "other"] += 1
+
+        for i in range(iterations):
+            timed("extend", session.put, f"{self.base_url}/friend-walk/{walk['id']}/extend?minutes=1")
+            timed("profile", session.put, f"{self.base_url}/auth/profile",
+                  json={"emergency_contact_name": f"Benchmark {i}"})
+            escort = session.post(f"{self.base_url}/escorts", json=escort_body, headers=headers).json()
+            timed("escort cancel", session.put, f"{self.base_url}/escorts/{escort['id']}/cancel")
+
+        session.put(f"{self.base_url}/friend-walk/{walk['id']}/complete", headers=headers)
+        session.put(
+            f"{self.base_url}/auth/profile",
+            json={"emergency_contact_name": profile.get("emergency_contact_name") or ""},
+            headers=headers
+        )
+
+        for name, values in samples.items():
+            self.log_result(f"{name} latency", values)
+        print(f"   responses ok={statuses['ok']} other={statuses['other']}")
+
+    def run_all_benchmarks(self, include_writes=False):
+        """Run all benchmarks; the state-transition one only with include_writes"""
+        print("🚀 Starting Acadia Safe API Benchmarks")
+        print(f"Base URL: {self.base_url}")
+
+        self.bench_sos_during_login_storm()
+        self.bench_idle_push_connections()
+        if include_writes:
+            self.bench_state_transitions()
+        else:
+            print("\n(Skipping state transition latency; pass --include-writes to create escorts and walks)")
+
+        return self.results
+
+if __name__ == "__main__":
+    benchmark = AcadiaSafeBenchmark()
+    benchmark.run_all_benchmarks(include_writes="--include-writes" in sys.argv)
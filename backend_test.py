@@ -676,6 +676,83 @@ class AcadiaSafeAPITester:
         except Exception as e:
             self.log_result("Campus Locations", False, f"Error: {str(e)}")
     
+    def test_conditional_get(self):
+        """Test ETag revalidation on alerts and locations"""
+        print("\n=== Testing Conditional GET ===")
+        
+        for path in ["alerts", "locations"]:
+            try:
+                response = requests.get(f"{self.base_url}/{path}", headers=self.get_headers())
+                etag = response.headers.get("ETag")
+                if response.status_code != 200 or not etag:
+                    self.log_result(f"ETag {path}", False, f"Status {response.status_code}, ETag {etag}", response.text)
+                    continue
+                
+                headers = self.get_headers()
+                headers["If-None-Match"] = etag
+                revalidate = requests.get(f"{self.base_url}/{path}", headers=headers)
+                if revalidate.status_code == 304 and not revalidate.content:
+                    self.log_result(f"ETag {path}", True, "Unchanged payload answered with 304")
+                else:
+                    self.log_result(f"ETag {path}", False, f"Status {revalidate.status_code}", revalidate.text)
+            except Exception as e:
+                self.log_result(f"ETag {path}", False, f"Error: {str(e)}")
+    
+    def test_alert_delta_feed(self):
+        """Test cursor-based alert sync"""
+        print("\n=== Testing Alert Delta Feed ===")
+        
+        try:
+            response = requests.get(f"{self.base_url}/alerts", headers=self.get_headers())
+            cursor = response.headers.get("X-Alerts-Cursor")
+            if response.status_code != 200 or not cursor:
+                self.log_result("Alert Cursor", False, f"Status {response.status_code}, cursor {cursor}", response.text)
+                return
+            self.log_result("Alert Cursor", True, "Latest alerts carry a sync cursor")
+            
+            delta = requests.get(f"{self.base_url}/alerts", params={"since": cursor}, headers=self.get_headers())
+            if delta.status_code == 200 and delta.json() == []:
+                self.log_result("Alert Delta Since Cursor", True, "No new alerts since latest cursor")
+            else:
+                self.log_result("Alert Delta Since Cursor", False, f"Status {delta.status_code}", delta.text)
+            
+            history = requests.get(f"{self.base_url}/alerts", params={"before": cursor, "limit": 1}, headers=self.get_headers())
+            if history.status_code == 200 and isinstance(history.json(), list) and len(history.json()) <= 1:
+                self.log_result("Alert History Page", True, f"Retrieved {len(history.json())} older alert(s)")
+            else:
+                self.log_result("Alert History Page", False, f"Status {history.status_code}", history.text)
+        except Exception as e:
+            self.log_result("Alert Delta Feed", False, f"Error: {str(e)}")
+    
+    def test_alert_read_state(self):
+        """Test server-side alert read tracking"""
+        print("\n=== Testing Alert Read State ===")
+        
+        try:
+            alerts = requests.get(f"{self.base_url}/alerts", headers=self.get_headers(include_auth=True)).json()
+            if not alerts:
+                self.log_result("Mark Alert Read", False, "No alerts to mark")
+                return
+            
+            alert_id = alerts[-1]["id"]
+            response = requests.post(
+                f"{self.base_url}/alerts/read",
+                json={"alert_ids": [alert_id]},
+                headers=self.get_headers(include_auth=True)
+            )
+            if response.status_code != 200:
+                self.log_result("Mark Alert Read", False, f"Status {response.status_code}", response.text)
+                return
+            
+            alerts = requests.get(f"{self.base_url}/alerts", headers=self.get_headers(include_auth=True)).json()
+            marked = next((a for a in alerts if a["id"] == alert_id), None)
+            if marked and marked["is_read"]:
+                self.log_result("Mark Alert Read", True, f"Alert read; {response.json().get('unread')} unread left")
+            else:
+                self.log_result("Mark Alert Read", False, "Read flag not reflected in alert list", marked)
+        except Exception as e:
+            self.log_result("Alert Read State", False, f"Error: {str(e)}")
+    
     def run_all_tests(self):
         """Run all API tests"""
         print("🚀 Starting Acadia Safe API Testing")
@@ -694,6 +771,9 @@ class AcadiaSafeAPITester:
         self.test_friend_walk()
         self.test_campus_alerts()
         self.test_campus_locations()
+        self.test_conditional_get()
+        self.test_alert_delta_feed()
+        self.test_alert_read_state()
         
         # Print summary
         print("\n" + "="*60)
@@ -0,0 +1,105 @@
+import os
+import sys
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "acadia_safe_test")
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+def _find_and_modify_by_id(original):
+    """mongomock re-reads find_one_and_update results with the caller's filter
+    unless the projection keeps _id, so documents the update moved out of
+    that filter come back as None. Keep _id internally and strip it after."""
+
+    def find_and_modify(self, query, projection=None, *args, **kwargs):
+        if not isinstance(projection, dict) or projection.get("_id") not in (0, False):
+            return original(self, query, projection, *args, **kwargs)
+        projection = {key: value for key, value in projection.items() if key != "_id"} or None
+        doc = original(self, query, projection, *args, **kwargs)
+        if doc is not None:
+            doc.pop("_id", None)
+        return doc
+
+    return find_and_modify
+
+
+def _add_to_dates(original):
+    """mongomock's $add only sums numbers; MongoDB also adds milliseconds to a date."""
+
+    def handle_arithmetic_operator(self, operator, values):
+        if operator == "$add" and isinstance(values, (list, tuple)):
+            parsed = list(self.parse_many(values))
+            dates = [value for value in parsed if isinstance(value, datetime)]
+            if len(dates) == 1 and None not in parsed:
+                milliseconds = sum(value for value in parsed if not isinstance(value, datetime))
+                return dates[0] + timedelta(milliseconds=milliseconds)
+        return original(self, operator, values)
+
+    return handle_arithmetic_operator
+
+
+@pytest.fixture
+def db(monkeypatch):
+    """Fresh in-memory database swapped in for server.db."""
+    import mongomock.aggregate
+    import mongomock.collection
+    import server
+    from mongomock_motor import AsyncMongoMockClient
+
+    monkeypatch.setattr(
+        mongomock.collection.Collection, "_find_and_modify",
+        _find_and_modify_by_id(mongomock.collection.Collection._find_and_modify),
+    )
+    monkeypatch.setattr(
+        mongomock.aggregate._Parser, "_handle_arithmetic_operator",
+        _add_to_dates(mongomock.aggregate._Parser._handle_arithmetic_operator),
+    )
+    database = AsyncMongoMockClient()["acadia_safe_test"]
+    monkeypatch.setattr(server, "db", database)
+    return database
+
+
+@pytest.fixture
+async def client(db):
+    import httpx
+    import server
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=server.app), base_url="http://test") as c:
+        yield c
+
+
+@pytest.fixture
+def make_user(db):
+    """Insert a student directly (no bcrypt round trip) and return (user, auth headers)."""
+    import server
+
+    async def create(**fields):
+        user_id = str(uuid.uuid4())
+        user = {
+            "id": user_id,
+            "email": f"{user_id[:8]}@acadiau.ca",
+            "full_name": "Test Student",
+            "phone": "9025550100",
+            "password_hash": "",
+            "profile_photo": None,
+            "emergency_contact_name": None,
+            "emergency_contact_phone": None,
+            "trusted_contacts": [],
+            "created_at": datetime.utcnow(),
+            **fields,
+        }
+        await db.users.insert_one(dict(user))
+        token = server.create_access_token({"sub": user_id})
+        return user, {"Authorization": f"Bearer {token}"}
+
+    return create
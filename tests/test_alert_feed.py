@@ -0,0 +1,180 @@
+import asyncio
+import contextlib
+
+import server
+from fake_firestore import FakeFirestoreClient
+
+
+class FakeChangeStream:
+    """Motor change-stream stand-in fed from a queue."""
+
+    def __init__(self, max_await: float):
+        self.queue = asyncio.Queue()
+        self.max_await = max_await
+
+    async def next(self):
+        return await self.queue.get()
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        return await self.next()
+
+    async def try_next(self):
+        try:
+            return await asyncio.wait_for(self.queue.get(), self.max_await)
+        except asyncio.TimeoutError:
+            return None
+
+
+def test_broadcast_timestamps_are_naive_utc():
+    zulu = server.broadcast_to_alert("a", {"createdAt": "2024-01-01T12:00:00.000Z"})
+    offset = server.broadcast_to_alert("b", {"createdAt": "2024-01-01T13:30:00+02:00"})
+    naive = server.broadcast_to_alert("c", {"createdAt": "2024-01-01T11:45:00"})
+    for alert in (zulu, offset, naive):
+        assert alert.created_at.tzinfo is None
+    ordered = sorted([zulu, offset, naive], key=server.alert_sort_key, reverse=True)
+    assert [alert.id for alert in ordered] == ["a", "c", "b"]
+
+
+def test_coalesced_changes_yields_once_per_burst():
+    async def run():
+        stream = FakeChangeStream(max_await=0.05)
+        reloads = []
+
+        async def follow():
+            async for _ in server.coalesced_changes(stream, 0.05):
+                reloads.append(stream.queue.qsize())
+
+        task = asyncio.create_task(follow())
+        for i in range(24):
+            stream.queue.put_nowait({"seq": i})
+        await asyncio.sleep(0.2)
+        assert reloads == [0]
+        stream.queue.put_nowait({"seq": 24})
+        await asyncio.sleep(0.2)
+        assert reloads == [0, 0]
+        task.cancel()
+
+    asyncio.run(run())
+
+
+def test_firestore_listener_publishes_once_per_burst_of_mixed_timestamps(monkeypatch):
+    monkeypatch.setattr(server, "CHANGE_DEBOUNCE_SECONDS", 0.05)
+
+    async def run():
+        feed = server.AlertFeed(limit=50, index_limit=1000, refresh_interval=30)
+        feed._loop = asyncio.get_running_loop()
+        fs = FakeFirestoreClient()
+        watch = feed._broadcast_query(fs).on_snapshot(feed._on_firestore_snapshot)
+        broadcasts = fs.collection("broadcasts")
+        broadcasts.document("a").set({"title": "A", "createdAt": "2024-01-01T12:00:00.000Z"})
+        broadcasts.document("b").set({"title": "B", "createdAt": "2024-01-01T13:30:00+02:00"})
+        broadcasts.document("c").set({"title": "C", "createdAt": "2024-01-01T11:45:00"})
+        await asyncio.sleep(0.2)
+        watch.unsubscribe()
+        await feed.stop()
+        return feed
+
+    feed = asyncio.run(run())
+    assert feed.stats()["version"] == 1
+    assert [alert.id for alert in feed.snapshot.alerts] == ["a", "c", "b"]
+
+
+def firestore_feed(monkeypatch, count, per_timestamp):
+    fs = FakeFirestoreClient()
+    for i in range(count):
+        second = i // per_timestamp
+        fs.collection("broadcasts").document(f"b{i:03d}").set({
+            "title": f"Alert {i}",
+            "createdAt": f"2024-01-01T10:{second // 60:02d}:{second % 60:02d}.000Z",
+        })
+    monkeypatch.setattr(server, "get_firestore_client", lambda probe=False: fs)
+    feed = server.AlertFeed(limit=50, index_limit=1000, refresh_interval=30)
+    monkeypatch.setattr(server, "alert_feed", feed)
+
+    async def load():
+        await feed._load_firestore(fs)
+        feed._publish()
+        return feed.snapshot
+
+    return fs, load
+
+
+def test_firestore_history_pages_split_timestamp_ties_on_id(monkeypatch):
+    _, load = firestore_feed(monkeypatch, count=90, per_timestamp=7)
+
+    async def run():
+        snapshot = await load()
+        seen = [alert.id for alert in snapshot.alerts]
+        before = snapshot.keys[-1]
+        while True:
+            page = await server._alerts_before(snapshot, before, 8)
+            seen.extend(alert.id for alert in page)
+            if len(page) < 8:
+                return seen
+            before = server.alert_sort_key(page[-1])
+
+    seen = asyncio.run(run())
+    assert seen == [f"b{i:03d}" for i in reversed(range(90))]
+
+
+def test_since_delta_past_the_window_asks_for_a_reset(monkeypatch):
+    import httpx
+
+    fs, load = firestore_feed(monkeypatch, count=10, per_timestamp=1)
+
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=server.app), base_url="http://t") as c:
+            await load()
+            cursor = (await c.get("/api/alerts")).headers["X-Alerts-Cursor"]
+            for i in range(10, 70):
+                fs.collection("broadcasts").document(f"b{i:03d}").set({
+                    "title": f"Alert {i}", "createdAt": f"2024-01-01T11:00:{i - 10:02d}.000Z",
+                })
+            await load()
+            gap = await c.get("/api/alerts", params={"since": cursor})
+            head = gap.headers["X-Alerts-Cursor"]
+            caught_up = await c.get("/api/alerts", params={"since": head})
+            return gap, caught_up
+
+    gap, caught_up = asyncio.run(run())
+    assert gap.status_code == 409
+    assert gap.json()["reset"] is True
+    assert caught_up.status_code == 200 and caught_up.json() == []
+
+
+def test_catalog_reloads_once_per_burst_of_changes(monkeypatch):
+    monkeypatch.setattr(server, "CHANGE_DEBOUNCE_SECONDS", 0.05)
+
+    async def run():
+        stream = FakeChangeStream(max_await=0.05)
+
+        @contextlib.asynccontextmanager
+        async def watch(**kwargs):
+            yield stream
+
+        class Collection:
+            pass
+
+        collection = Collection()
+        collection.watch = watch
+        monkeypatch.setattr(server, "db", type("DB", (), {"campus_locations": collection})())
+
+        catalog = server.LocationCatalog(cell_deg=0.002, max_in_memory=100, list_limit=10, refresh_interval=60)
+        reloads = []
+
+        async def reload():
+            reloads.append(stream.queue.qsize())
+
+        catalog.reload = reload
+        catalog.start()
+        await asyncio.sleep(0.01)
+        for i in range(24):
+            stream.queue.put_nowait({"seq": i})
+        await asyncio.sleep(0.2)
+        await catalog.stop()
+        assert reloads == [0, 0]
+
+    asyncio.run(run())
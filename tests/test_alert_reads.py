@@ -0,0 +1,99 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+import server
+
+pytestmark = pytest.mark.anyio
+
+BASE = datetime(2024, 3, 1, 12, 0, 0)
+
+
+@pytest.fixture
+async def feed(db, monkeypatch):
+    monkeypatch.setattr(server, "get_firestore_client", lambda probe=False: None)
+    await db.campus_alerts.insert_many([
+        {"id": f"a{i}", "alert_type": "info", "title": f"Alert {i}", "message": "", "created_at": BASE + timedelta(minutes=i)}
+        for i in range(5)
+    ])
+    alert_feed = server.AlertFeed(limit=50, index_limit=1000, refresh_interval=30)
+    monkeypatch.setattr(server, "alert_feed", alert_feed)
+    await alert_feed.current()
+    return alert_feed
+
+
+def cursor(minute, alert_id):
+    return server.encode_alert_cursor((BASE + timedelta(minutes=minute), alert_id))
+
+
+def read_flags(response):
+    return {alert["id"]: alert["is_read"] for alert in response.json()}
+
+
+async def test_invalid_token_on_public_reads_falls_back_to_anonymous(client, feed):
+    headers = {"Authorization": "Bearer not-a-token"}
+    listing = await client.get("/api/alerts", headers=headers)
+    detail = await client.get("/api/alerts/a1", headers=headers)
+    assert listing.status_code == 200 and len(listing.json()) == 5
+    assert detail.status_code == 200
+
+
+async def test_read_state_is_served_from_the_cache(client, feed, make_user, db):
+    _, headers = await make_user()
+    reads = []
+    original = type(db.alert_reads).find_one
+
+    async def counting_find_one(self, *args, **kwargs):
+        if self.name == "alert_reads":
+            reads.append(args)
+        return await original(self, *args, **kwargs)
+
+    type(db.alert_reads).find_one = counting_find_one
+    try:
+        for _ in range(3):
+            assert (await client.get("/api/alerts", headers=headers)).status_code == 200
+        assert (await client.get("/api/alerts/a2", headers=headers)).status_code == 200
+    finally:
+        type(db.alert_reads).find_one = original
+    assert len(reads) == 1
+
+
+async def test_marks_merge_and_the_watermark_never_moves_back(client, feed, make_user):
+    user, headers = await make_user()
+    await client.post("/api/alerts/read", json={"up_to": cursor(2, "a2")}, headers=headers)
+    # A second device, seen by a worker whose cache is empty
+    server.alert_read_cache.invalidate(user["id"])
+    await client.post("/api/alerts/read", json={"up_to": cursor(0, "a0"), "alert_ids": ["a4"]}, headers=headers)
+    flags = read_flags(await client.get("/api/alerts", headers=headers))
+    assert flags == {"a4": True, "a3": False, "a2": True, "a1": True, "a0": True}
+
+    server.alert_read_cache.invalidate(user["id"])
+    result = await client.post("/api/alerts/read", json={"alert_ids": ["a3"]}, headers=headers)
+    assert result.json() == {"watermark": cursor(4, "a4"), "read_ids": 0, "unread": 0}
+    doc = await server.db.alert_reads.find_one({"user_id": user["id"]})
+    assert doc["read_ids"] == []
+    assert (doc["watermark"], doc["watermark_id"]) == (BASE + timedelta(minutes=4), "a4")
+
+
+async def test_watermark_splits_alerts_sharing_a_created_at(client, feed, make_user, db):
+    _, headers = await make_user()
+    await db.campus_alerts.insert_one(
+        {"id": "a2b", "alert_type": "info", "title": "Twin", "message": "", "created_at": BASE + timedelta(minutes=2)}
+    )
+    await feed.refresh()
+    await client.post("/api/alerts/read", json={"up_to": cursor(2, "a2")}, headers=headers)
+    flags = read_flags(await client.get("/api/alerts", headers=headers))
+    assert flags == {"a4": False, "a3": False, "a2b": False, "a2": True, "a1": True, "a0": True}
+
+    # An earlier tie never moves the watermark back; a later one advances it
+    await client.post("/api/alerts/read", json={"up_to": cursor(2, "a1")}, headers=headers)
+    result = await client.post("/api/alerts/read", json={"up_to": cursor(2, "a2b")}, headers=headers)
+    assert result.json()["watermark"] == cursor(2, "a2b")
+    assert result.json()["unread"] == 2
+
+
+async def test_read_flags_keep_the_model_type(feed):
+    state = server.AlertReadState({"read_ids": ["a1"]})
+    flagged = server.with_read_flags(list(feed.snapshot.alerts), state)
+    assert all(isinstance(alert, server.CampusAlert) for alert in flagged)
+    assert [alert.id for alert in flagged if alert.is_read] == ["a1"]
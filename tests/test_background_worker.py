@@ -0,0 +1,40 @@
+import asyncio
+
+import pytest
+
+import server
+
+pytestmark = pytest.mark.anyio
+
+
+class Counter(server.BackgroundWorker):
+    def __init__(self):
+        super().__init__()
+        self.passes = 0
+
+    async def _run(self):
+        while True:
+            self.passes += 1
+            await self._sleep(3600)
+
+
+async def test_wake_cuts_the_sleep_short_and_stop_is_idempotent():
+    worker = Counter()
+    worker.start()
+    task = worker._task
+    worker.start()
+    assert worker._task is task
+    await asyncio.sleep(0)
+    assert worker.passes == 1
+    worker.wake()
+    await asyncio.sleep(0.01)
+    assert worker.passes == 2
+    await worker.stop()
+    assert task.cancelled() and worker._task is None
+    await worker.stop()
+
+
+def test_backoff_doubles_up_to_the_cap():
+    worker = Counter()
+    worker.base_backoff, worker.max_backoff = 1, 10
+    assert [worker._backoff(n).total_seconds() for n in range(5)] == [1, 2, 4, 8, 10]
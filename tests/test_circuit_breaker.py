@@ -0,0 +1,66 @@
+import server
+
+
+def make_breaker(**overrides):
+    options = {"failure_threshold": 2, "base_backoff": 5, "max_backoff": 60, "probe_timeout": 30}
+    options.update(overrides)
+    return server.CircuitBreaker("test", **options)
+
+
+def test_opens_after_threshold_and_rejects_until_backoff(monkeypatch):
+    clock = [100.0]
+    monkeypatch.setattr(server.time, "monotonic", lambda: clock[0])
+    breaker = make_breaker()
+    breaker.record_failure("boom")
+    assert breaker.allow()
+    breaker.record_failure("boom")
+    assert breaker.state == "open"
+    assert not breaker.allow(probe=True)
+    clock[0] += 5
+    assert breaker.allow(probe=True)
+    assert breaker.state == "half_open"
+
+
+def test_non_reporting_callers_cannot_take_the_probe(monkeypatch):
+    clock = [100.0]
+    monkeypatch.setattr(server.time, "monotonic", lambda: clock[0])
+    breaker = make_breaker()
+    breaker.record_failure("boom", trip=True)
+    clock[0] += 5
+    # Read paths check allow() without reporting; they must not use up the probe
+    for _ in range(10):
+        assert not breaker.allow()
+    assert breaker.state == "open"
+    assert breaker.allow(probe=True)
+    assert not breaker.allow(probe=True)
+    breaker.record_success()
+    assert breaker.state == "closed"
+    assert breaker.allow()
+
+
+def test_failed_probe_reopens_with_doubled_backoff(monkeypatch):
+    clock = [100.0]
+    monkeypatch.setattr(server.time, "monotonic", lambda: clock[0])
+    breaker = make_breaker()
+    breaker.record_failure("boom", trip=True)
+    clock[0] += 5
+    assert breaker.allow(probe=True)
+    breaker.record_failure("still down")
+    assert breaker.state == "open"
+    clock[0] += 9
+    assert not breaker.allow(probe=True)
+    clock[0] += 1
+    assert breaker.allow(probe=True)
+
+
+def test_unreported_probe_expires(monkeypatch):
+    clock = [100.0]
+    monkeypatch.setattr(server.time, "monotonic", lambda: clock[0])
+    breaker = make_breaker()
+    breaker.record_failure("boom", trip=True)
+    clock[0] += 5
+    assert breaker.allow(probe=True)
+    clock[0] += 29
+    assert not breaker.allow(probe=True)
+    clock[0] += 1
+    assert breaker.allow(probe=True)
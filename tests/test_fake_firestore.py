@@ -0,0 +1,110 @@
+import pytest
+from google.api_core.exceptions import NotFound
+
+from fake_firestore import FakeFirestoreClient
+
+
+@pytest.fixture
+def fs():
+    client = FakeFirestoreClient()
+    broadcasts = client.collection("broadcasts")
+    for doc_id, created_at in [
+        ("a", "2024-01-01T10:00:00.000Z"),
+        ("b", "2024-01-01T11:00:00.000Z"),
+        ("c", "2024-01-01T12:00:00.000Z"),
+        ("d", "2024-01-01T13:00:00.000Z"),
+    ]:
+        broadcasts.document(doc_id).set({"title": doc_id.upper(), "createdAt": created_at})
+    return client
+
+
+def ids(query):
+    return [doc.id for doc in query.stream()]
+
+
+def test_order_by_descending_with_limit(fs):
+    query = fs.collection("broadcasts").order_by("createdAt", direction="DESCENDING").limit(2)
+    assert ids(query) == ["d", "c"]
+
+
+def test_order_by_defaults_to_ascending(fs):
+    assert ids(fs.collection("broadcasts").order_by("createdAt")) == ["a", "b", "c", "d"]
+
+
+def test_where_cursor_pages_through_older_documents(fs):
+    # The keyset paging /alerts uses past its in-memory window
+    def page(boundary):
+        return ids(
+            fs.collection("broadcasts")
+            .where("createdAt", "<", boundary)
+            .order_by("createdAt", direction="DESCENDING")
+            .limit(2)
+        )
+
+    assert page("2024-01-01T13:00:00.000Z") == ["c", "b"]
+    assert page("2024-01-01T11:00:00.000Z") == ["a"]
+    assert page("2024-01-01T10:00:00.000Z") == []
+
+
+def test_where_skips_documents_missing_the_field(fs):
+    fs.collection("broadcasts").document("x").set({"title": "no timestamp"})
+    assert "x" not in ids(fs.collection("broadcasts").where("createdAt", ">=", ""))
+    assert "x" in ids(fs.collection("broadcasts"))
+
+
+def test_queries_are_immutable(fs):
+    base = fs.collection("broadcasts").order_by("createdAt", direction="DESCENDING")
+    base.limit(1)
+    assert len(ids(base)) == 4
+
+
+def test_set_merge_and_update(fs):
+    ref = fs.collection("alerts").document("sos-1")
+    ref.set({"status": "active", "lat": 1})
+    ref.set({"status": "resolved"}, merge=True)
+    assert ref.get().to_dict() == {"status": "resolved", "lat": 1}
+    ref.set({"status": "active"})
+    assert ref.get().to_dict() == {"status": "active"}
+    ref.update({"lat": 2})
+    assert ref.get().to_dict() == {"status": "active", "lat": 2}
+
+
+def test_update_of_missing_document_raises_not_found(fs):
+    with pytest.raises(NotFound):
+        fs.collection("alerts").document("missing").update({"status": "resolved"})
+    assert not fs.collection("alerts").document("missing").get().exists
+
+
+def test_failing_batch_leaves_no_partial_writes(fs):
+    alerts = fs.collection("alerts")
+    batch = fs.batch()
+    batch.set(alerts.document("new"), {"status": "active"})
+    batch.update(alerts.document("missing"), {"status": "resolved"})
+    with pytest.raises(NotFound):
+        batch.commit()
+    assert not alerts.document("new").get().exists
+    assert fs.write_count == 4
+
+
+def test_snapshots_are_copies(fs):
+    snapshot = fs.collection("broadcasts").document("a").get()
+    snapshot.to_dict()["title"] = "changed"
+    assert fs.collection("broadcasts").document("a").get().to_dict()["title"] == "A"
+
+
+def test_on_snapshot_delivers_initial_and_subsequent_results(fs):
+    received = []
+    query = fs.collection("broadcasts").order_by("createdAt", direction="DESCENDING").limit(2)
+    watch = query.on_snapshot(lambda docs, changes, read_time: received.append([doc.id for doc in docs]))
+    fs.collection("broadcasts").document("e").set({"createdAt": "2024-01-01T14:00:00.000Z"})
+    fs.collection("other").document("z").set({"createdAt": "2024-01-01T15:00:00.000Z"})
+    watch.unsubscribe()
+    fs.collection("broadcasts").document("f").set({"createdAt": "2024-01-01T15:00:00.000Z"})
+    assert received == [["d", "c"], ["e", "d"]]
+
+
+def test_order_by_breaks_ties_on_document_id(fs):
+    for doc_id in ("t2", "t1", "t3"):
+        fs.collection("broadcasts").document(doc_id).set({"createdAt": "2024-01-01T14:00:00.000Z"})
+    query = fs.collection("broadcasts").order_by("createdAt", direction="DESCENDING").limit(4)
+    assert ids(query) == ["t3", "t2", "t1", "d"]
@@ -0,0 +1,67 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+import server
+
+pytestmark = pytest.mark.anyio
+
+SOS = {"location_lat": 45.0875, "location_lng": -64.3665}
+
+
+async def stuck_key(db, user_id: str, age: timedelta, legacy: bool = False) -> str:
+    scoped_key = f"sos:{user_id}:retry-1"
+    started = datetime.utcnow() - age
+    record = {
+        "_id": scoped_key,
+        "fingerprint": server.IdempotencyStore.fingerprint(server.SOSAlertCreate(**SOS)),
+        "status": "in_progress",
+        "created_at": started,
+    }
+    if not legacy:
+        record["started_at"] = started
+    await db.idempotency_keys.insert_one(record)
+    return scoped_key
+
+
+@pytest.fixture(autouse=True)
+def fresh_store(monkeypatch):
+    store = server.IdempotencyStore(max_entries=100, memory_ttl=60, abandon_after=30)
+    monkeypatch.setattr(server, "idempotency_store", store)
+    return store
+
+
+async def test_recent_in_progress_key_conflicts(client, db, make_user):
+    user, headers = await make_user()
+    await stuck_key(db, user["id"], timedelta(seconds=5))
+    response = await client.post("/api/sos", json=SOS, headers={**headers, "Idempotency-Key": "retry-1"})
+    assert response.status_code == 409
+    assert await db.sos_alerts.count_documents({}) == 0
+
+
+@pytest.mark.parametrize("legacy", [False, True])
+async def test_abandoned_in_progress_key_is_taken_over(client, db, make_user, fresh_store, legacy):
+    user, headers = await make_user()
+    scoped_key = await stuck_key(db, user["id"], timedelta(minutes=5), legacy=legacy)
+
+    response = await client.post("/api/sos", json=SOS, headers={**headers, "Idempotency-Key": "retry-1"})
+    assert response.status_code == 200
+    assert fresh_store.taken_over == 1
+    stored = await db.idempotency_keys.find_one({"_id": scoped_key})
+    assert stored["status"] == "done"
+    assert stored["response"]["id"] == response.json()["id"]
+
+    # The next retry from another worker replays rather than running again
+    fresh_store._entries.clear()
+    replay = await client.post("/api/sos", json=SOS, headers={**headers, "Idempotency-Key": "retry-1"})
+    assert replay.headers["Idempotent-Replayed"] == "true"
+    assert await db.sos_alerts.count_documents({}) == 1
+
+
+async def test_abandoned_key_still_rejects_a_different_body(client, db, make_user):
+    user, headers = await make_user()
+    await stuck_key(db, user["id"], timedelta(minutes=5))
+    response = await client.post(
+        "/api/sos", json={**SOS, "location_lat": 45.0}, headers={**headers, "Idempotency-Key": "retry-1"},
+    )
+    assert response.status_code == 422
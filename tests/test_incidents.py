@@ -0,0 +1,72 @@
+from datetime import datetime
+
+import pytest
+
+import server
+
+pytestmark = pytest.mark.anyio
+
+REPORT = {
+    "incident_type": "suspicious_activity",
+    "location_lat": 45.0875,
+    "location_lng": -64.3665,
+    "description": "Someone trying car doors",
+    "wants_contact": True,
+    "contact_phone": "9025550199",
+}
+
+
+@pytest.fixture
+def incident_points(monkeypatch):
+    index = server.IncidentPointIndex(window_days=90, refresh_interval=300)
+    monkeypatch.setattr(server, "incident_points", index)
+    return index
+
+
+@pytest.mark.parametrize("field, value", [
+    ("location_lat", "1e999"),
+    ("location_lat", "91"),
+    ("location_lng", "-1e999"),
+    ("location_lng", "180.5"),
+])
+async def test_report_rejects_coordinates_off_the_globe(client, make_user, incident_points, field, value):
+    _, headers = await make_user()
+    body = {**REPORT, field: "__value__"}
+    content = server.json.dumps(body).replace('"__value__"', value)
+    response = await client.post(
+        "/api/incidents", content=content,
+        headers={**headers, "Content-Type": "application/json"},
+    )
+    assert response.status_code == 422
+    assert await server.db.incidents.count_documents({}) == 0
+
+
+async def test_map_index_skips_rows_it_cannot_place(db, incident_points):
+    now = datetime.utcnow()
+    await db.incidents.insert_many([
+        {"id": "good", "incident_type": "theft", "location_lat": 45.0875, "location_lng": -64.3665, "created_at": now},
+        {"id": "inf", "incident_type": "theft", "location_lat": float("inf"), "location_lng": -64.3665, "created_at": now},
+        {"id": "missing", "incident_type": "theft", "location_lat": None, "location_lng": -64.3665, "created_at": now},
+    ])
+    await incident_points.reload()
+    assert incident_points.pyramid.count == 1
+    assert (await incident_points.coordinates()).tolist() == [[45.0875, -64.3665]]
+
+    incident_points.add({"id": "nan", "incident_type": "theft", "location_lat": float("nan"), "location_lng": 0.0})
+    assert incident_points.pyramid.count == 1
+
+
+async def test_map_clusters_do_not_expose_incident_ids(client, make_user, incident_points):
+    _, reporter = await make_user()
+    _, viewer = await make_user()
+    created = await client.post("/api/incidents", json=REPORT, headers=reporter)
+    assert created.status_code == 200
+    await incident_points.reload()
+
+    response = await client.get("/api/map/clusters", params={
+        "min_lat": 45.0, "min_lng": -64.5, "max_lat": 45.2, "max_lng": -64.2, "zoom": 18, "layers": "incidents",
+    }, headers=viewer)
+    assert response.status_code == 200
+    clusters = response.json()["incidents"]["clusters"]
+    assert [cluster["item"] for cluster in clusters] == [{"incident_type": "suspicious_activity"}]
+    assert created.json()["id"] not in response.text
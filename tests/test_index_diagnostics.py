@@ -0,0 +1,27 @@
+import pytest
+
+import server
+
+pytestmark = pytest.mark.anyio
+
+KEY = "desk-key"
+
+
+@pytest.fixture
+def plans(monkeypatch):
+    async def verify_query_plans():
+        return [{"name": "sos_by_user", "indexed": True}]
+
+    monkeypatch.setattr(server, "verify_query_plans", verify_query_plans)
+    monkeypatch.setattr(server, "RESPONDER_API_KEY", KEY)
+
+
+async def test_index_diagnostics_require_the_responder_key(client, plans):
+    assert (await client.get("/api/diagnostics/indexes")).status_code == 401
+    assert (await client.get("/api/diagnostics/indexes", headers={"X-Responder-Key": "guess"})).status_code == 401
+
+
+async def test_index_diagnostics_report_plans_to_responders(client, plans):
+    response = await client.get("/api/diagnostics/indexes", headers={"X-Responder-Key": KEY})
+    assert response.status_code == 200
+    assert response.json()["status"] == "ok"
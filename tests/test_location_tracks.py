@@ -0,0 +1,93 @@
+from datetime import datetime
+
+import pytest
+
+import server
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def tracks(db):
+    return server.LocationTrackBuffer(flush_interval=60, max_dirty=1000, tolerance_m=1, max_pending_points=100)
+
+
+async def insert_walk(db, walk_id: str, user_id: str):
+    await db.friend_walks.insert_one({
+        "id": walk_id, "user_id": user_id, "status": "active",
+        "current_lat": 45.0, "current_lng": -64.0, "created_at": datetime.utcnow(),
+    })
+
+
+async def test_ping_from_another_user_does_not_displace_the_owner(db, tracks):
+    await insert_walk(db, "w1", "owner")
+    tracks.put("friend_walks", "w1", "owner", 45.0875, -64.3665)
+    tracks.put("friend_walks", "w1", "intruder", 10.0, 10.0)
+    tracks.put("friend_walks", "w1", "owner", 45.0876, -64.3666)
+
+    entry = tracks.pending("friend_walks", "w1", "owner")
+    assert len(entry["path"]) == 2
+    walk = tracks.overlay("friend_walks", await db.friend_walks.find_one({"id": "w1"}, {"_id": 0}))
+    assert (walk["current_lat"], walk["current_lng"]) == (45.0876, -64.3666)
+
+    await tracks.flush()
+    stored = await db.friend_walks.find_one({"id": "w1"}, {"_id": 0})
+    assert (stored["current_lat"], stored["current_lng"]) == (45.0876, -64.3666)
+    assert tracks.stats()["conflicts"] == 1
+
+
+def quantize(lat: float, lng: float) -> tuple:
+    return round(lat * server.TRACK_PRECISION), round(lng * server.TRACK_PRECISION)
+
+
+async def test_stale_anchor_requeues_and_reencodes(db, tracks):
+    first, theirs, ours = quantize(45.0, -64.0), quantize(45.001, -64.0), quantize(45.002, -64.001)
+    await insert_walk(db, "w1", "owner")
+    await db.friend_walks.update_one({"id": "w1"}, {"$set": {
+        "track": {"polyline": server.encode_polyline([first]), "last": list(first), "points": 1},
+    }})
+    tracks.put("friend_walks", "w1", "owner", 45.002, -64.001)
+    await tracks._load_anchors(list(tracks._dirty))
+
+    # Another worker appends between our anchor read and our write
+    await db.friend_walks.update_one({"id": "w1"}, {"$set": {
+        "track.polyline": server.encode_polyline([first, theirs]), "track.last": list(theirs), "track.points": 2,
+    }})
+    await tracks.flush()
+    assert tracks.stats()["conflicts"] == 1
+    assert tracks.pending("friend_walks", "w1", "owner")["path"] == [ours]
+    assert tracks._anchors[("friend_walks", "w1")] == theirs
+
+    await tracks.flush()
+    stored = await db.friend_walks.find_one({"id": "w1"}, {"_id": 0})
+    assert server.decode_polyline(stored["track"]["polyline"]) == [
+        (lat / server.TRACK_PRECISION, lng / server.TRACK_PRECISION) for lat, lng in (first, theirs, ours)
+    ]
+    assert stored["track"]["last"] == list(ours)
+    assert stored["current_lat"] == 45.002
+
+
+async def test_pings_for_a_closed_escort_are_discarded(db, tracks):
+    await db.escort_requests.insert_one({"id": "e1", "user_id": "owner", "status": "cancelled"})
+    tracks.put("escort_requests", "e1", "owner", 45.0875, -64.3665)
+    await tracks.flush()
+    stored = await db.escort_requests.find_one({"id": "e1"}, {"_id": 0})
+    assert "current_lat" not in stored and "track" not in stored
+    assert tracks.stats()["dirty"] == 0
+
+
+async def test_cancelling_an_escort_forgets_its_anchor(client, make_user, monkeypatch, tracks):
+    monkeypatch.setattr(server, "location_tracks", tracks)
+    _, headers = await make_user()
+    created = await client.post("/api/escorts", json={
+        "pickup_lat": 45.0875, "pickup_lng": -64.3665, "destination_lat": 45.0882, "destination_lng": -64.3658,
+    }, headers=headers)
+    escort_id = created.json()["id"]
+    assert (await client.put(f"/api/escorts/{escort_id}/location", json={
+        "location_lat": 45.0876, "location_lng": -64.3664,
+    }, headers=headers)).status_code == 200
+    await tracks.flush()
+    assert ("escort_requests", escort_id) in tracks._anchors
+
+    assert (await client.put(f"/api/escorts/{escort_id}/cancel", headers=headers)).status_code == 200
+    assert ("escort_requests", escort_id) not in tracks._anchors
@@ -0,0 +1,52 @@
+import httpx
+import pytest
+
+import server
+
+pytestmark = pytest.mark.anyio
+
+CONTACTS = [{"id": "c1", "name": "Parent", "phone": "9025550111", "relationship": "parent"}]
+
+
+@pytest.fixture
+def dispatcher():
+    transport = server.MemoryTransport()
+    return server.NotificationDispatcher(
+        transports={"sms": transport}, concurrency=4, max_attempts=3, poll_interval=60,
+        base_backoff=1, max_backoff=10, lease=60,
+    )
+
+
+async def test_cancelled_sos_is_not_sent_to_contacts(client, make_user, dispatcher):
+    _, headers = await make_user(trusted_contacts=CONTACTS)
+    created = await client.post("/api/sos", json={"location_lat": 45.0875, "location_lng": -64.3665}, headers=headers)
+    assert created.status_code == 200
+    sos_id = created.json()["id"]
+
+    cancelled = await client.put(f"/api/sos/{sos_id}/cancel", headers=headers)
+    assert cancelled.status_code == 200
+    assert await dispatcher._claim() is None
+    assert dispatcher.transports["sms"].sent == []
+
+
+async def test_active_sos_is_still_claimed(client, make_user, dispatcher):
+    _, headers = await make_user(trusted_contacts=CONTACTS)
+    created = await client.post("/api/sos", json={"location_lat": 45.0875, "location_lng": -64.3665}, headers=headers)
+    collection, doc = await dispatcher._claim()
+    assert (collection, doc["id"]) == ("sos_alerts", created.json()["id"])
+
+
+def test_transport_must_implement_send():
+    class Silent(server.NotificationTransport):
+        pass
+
+    with pytest.raises(TypeError):
+        Silent()
+
+
+async def test_webhook_transport_closes_its_client():
+    transport = server.WebhookTransport("http://gateway.invalid/send")
+    await transport.close()
+    assert transport._client.is_closed
+    with pytest.raises(RuntimeError):
+        await transport.send("9025550111", "hello")
@@ -0,0 +1,65 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+import server
+
+pytestmark = pytest.mark.anyio
+
+CONTACTS = [{"id": "c1", "name": "Parent", "phone": "9025550111", "relationship": "parent"}]
+WALK = {"contact_ids": ["c1"], "duration_minutes": 30, "location_lat": 45.0875, "location_lng": -64.3665}
+
+
+@pytest.fixture
+def scheduler(monkeypatch):
+    scheduler = server.OverdueWalkScheduler(grace=60, max_sleep=60, retry_interval=30)
+    monkeypatch.setattr(server, "walk_scheduler", scheduler)
+    return scheduler
+
+
+@pytest.fixture
+def dispatcher():
+    return server.NotificationDispatcher(
+        transports={"sms": server.MemoryTransport()}, concurrency=4, max_attempts=3, poll_interval=60,
+        base_backoff=1, max_backoff=10, lease=60,
+    )
+
+
+@pytest.fixture
+async def overdue_walk(client, db, make_user, scheduler):
+    _, headers = await make_user(trusted_contacts=CONTACTS)
+    walk_id = (await client.post("/api/friend-walk", json=WALK, headers=headers)).json()["id"]
+    end_time = datetime.utcnow() - timedelta(minutes=5)
+    await db.friend_walks.update_one({"id": walk_id}, {"$set": {"end_time": end_time}})
+    assert await scheduler.escalate(walk_id)
+    return walk_id, end_time, headers
+
+
+async def test_overdue_walk_is_escalated_to_its_contacts(db, overdue_walk, scheduler, dispatcher):
+    walk_id, _, _ = overdue_walk
+    walk = await db.friend_walks.find_one({"id": walk_id})
+    assert walk["overdue_at"] is not None
+    assert [entry["contact_id"] for entry in walk["notifications"]] == ["c1"]
+    collection, doc = await dispatcher._claim()
+    assert (collection, doc["id"]) == ("friend_walks", walk_id)
+    assert "have not checked in" in doc["notify"]["message"]
+    # Already escalated, so a second pass changes nothing
+    assert not await scheduler.escalate(walk_id)
+
+
+async def test_extending_an_overdue_walk_stops_the_messages_and_rearms(client, overdue_walk, scheduler, dispatcher):
+    walk_id, end_time, headers = overdue_walk
+    response = await client.put(f"/api/friend-walk/{walk_id}/extend?minutes=60", headers=headers)
+    assert response.status_code == 200
+    assert await dispatcher._claim() is None
+
+    new_end = end_time + timedelta(minutes=60)
+    assert abs(scheduler._deadlines[walk_id] - (new_end + scheduler.grace)) < timedelta(milliseconds=1)
+
+
+async def test_completing_an_overdue_walk_stops_the_messages(client, overdue_walk, scheduler, dispatcher):
+    walk_id, _, headers = overdue_walk
+    response = await client.put(f"/api/friend-walk/{walk_id}/complete", headers=headers)
+    assert response.status_code == 200
+    assert await dispatcher._claim() is None
+    assert walk_id not in scheduler._deadlines
@@ -0,0 +1,79 @@
+import pytest
+
+import server
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(server.time, "monotonic", clock)
+    return clock
+
+
+def test_entries_expire_after_the_ttl(clock):
+    cache = server.TTLCache(max_entries=10, ttl_seconds=60)
+    cache.put("u1", {"id": "u1"})
+    clock.now += 59
+    assert cache.get("u1") == {"id": "u1"}
+    clock.now += 1
+    assert cache.get("u1") is None
+    assert cache.stats()["size"] == 0
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_least_recently_used_entry_is_evicted(clock):
+    cache = server.TTLCache(max_entries=2, ttl_seconds=60)
+    cache.put("u1", {"id": "u1"})
+    cache.put("u2", {"id": "u2"})
+    cache.get("u1")
+    cache.put("u3", {"id": "u3"})
+    assert cache.get("u2") is None
+    assert cache.get("u1") is not None and cache.get("u3") is not None
+    assert cache.evictions == 1
+
+
+def test_invalidate_drops_the_entry(clock):
+    cache = server.TTLCache(max_entries=10, ttl_seconds=60)
+    cache.put("u1", {"id": "u1"})
+    cache.invalidate("u1")
+    cache.invalidate("missing")
+    assert cache.get("u1") is None
+
+
+@pytest.fixture
+def principal_cache(monkeypatch):
+    cache = server.TTLCache(max_entries=100, ttl_seconds=3600)
+    monkeypatch.setattr(server, "principal_cache", cache)
+    return cache
+
+
+@pytest.mark.anyio
+async def test_trusted_contact_changes_are_not_served_stale(client, make_user, principal_cache):
+    user, headers = await make_user()
+    assert (await client.get("/api/contacts", headers=headers)).json() == []
+    assert principal_cache.get(user["id"]) is not None
+
+    added = (await client.post("/api/contacts", json={"name": "Parent", "phone": "9025550111"}, headers=headers)).json()
+    contacts = (await client.get("/api/contacts", headers=headers)).json()
+    assert [contact["id"] for contact in contacts] == [added["id"]]
+
+    await client.delete(f"/api/contacts/{added['id']}", headers=headers)
+    assert (await client.get("/api/contacts", headers=headers)).json() == []
+
+
+@pytest.mark.anyio
+async def test_profile_update_refills_the_cache(client, make_user, principal_cache):
+    user, headers = await make_user()
+    await client.get("/api/auth/me", headers=headers)
+    response = await client.put("/api/auth/profile", json={"emergency_contact_name": "Guardian"}, headers=headers)
+    assert response.status_code == 200
+    assert principal_cache.get(user["id"])["emergency_contact_name"] == "Guardian"
+    assert (await client.get("/api/auth/me", headers=headers)).json()["emergency_contact_name"] == "Guardian"
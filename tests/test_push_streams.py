@@ -0,0 +1,71 @@
+import asyncio
+
+import httpx
+import pytest
+from fastapi import HTTPException, WebSocketDisconnect
+
+import server
+
+USER = {"id": "stream-user", "full_name": "Stream User", "email": "stream@acadiau.ca", "phone": "1"}
+
+
+@pytest.fixture
+def cached_user():
+    server.principal_cache.put(USER["id"], USER)
+    yield USER
+    server.principal_cache.invalidate(USER["id"])
+
+
+def call(coro):
+    return asyncio.run(coro)
+
+
+def test_stream_ticket_opens_streams_but_is_not_an_access_token(cached_user):
+    access = server.create_access_token({"sub": USER["id"]})
+
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=server.app), base_url="http://t") as c:
+            issued = await c.post("/api/events/ticket", headers={"Authorization": f"Bearer {access}"})
+            ticket = issued.json()["ticket"]
+            as_bearer = await c.get("/api/auth/me", headers={"Authorization": f"Bearer {ticket}"})
+            return issued, ticket, as_bearer
+
+    issued, ticket, as_bearer = call(run())
+    assert issued.status_code == 200
+    assert issued.json()["expires_in"] == server.STREAM_TICKET_SECONDS
+    assert as_bearer.status_code == 401
+    assert call(server.get_stream_user(ticket=ticket, credentials=None))["id"] == USER["id"]
+
+
+def test_access_token_is_not_accepted_in_the_url(cached_user):
+    access = server.create_access_token({"sub": USER["id"]})
+    with pytest.raises(HTTPException) as error:
+        call(server.get_stream_user(ticket=access, credentials=None))
+    assert error.value.status_code == 401
+
+
+def test_expired_stream_ticket_is_rejected(cached_user, monkeypatch):
+    monkeypatch.setattr(server, "STREAM_TICKET_SECONDS", -1)
+    ticket = server.create_stream_ticket(USER["id"])
+    with pytest.raises(HTTPException):
+        call(server.get_stream_user(ticket=ticket, credentials=None))
+
+
+def test_stopping_a_reader_waits_for_it_and_swallows_its_outcome():
+    async def run():
+        async def failed():
+            raise WebSocketDisconnect(1000)
+
+        async def idle():
+            await asyncio.Event().wait()
+
+        finished = asyncio.create_task(failed())
+        running = asyncio.create_task(idle())
+        await asyncio.sleep(0)
+        await server._stop_reader(finished)
+        await server._stop_reader(running)
+        return finished, running
+
+    finished, running = call(run())
+    assert isinstance(finished.exception(), WebSocketDisconnect)
+    assert running.cancelled()
@@ -0,0 +1,119 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+from bson import ObjectId
+from pymongo.errors import OperationFailure
+from starlette.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+
+import server
+
+KEY = "desk-secret"
+
+
+class FakeBoardStream:
+    """Change stream stand-in: replays queued events, then idles."""
+
+    def __init__(self, changes=()):
+        self.changes = list(changes)
+        self.resume_token = {"_data": "live"}
+        self.closed = False
+
+    async def try_next(self):
+        if self.changes:
+            change = self.changes.pop(0)
+            self.resume_token = change["_id"]
+            return change
+        await asyncio.sleep(0.01)
+        return None
+
+    async def close(self):
+        self.closed = True
+
+
+def alert_doc(sos_id: str, status: str = "active") -> dict:
+    return {
+        "_id": ObjectId(), "id": sos_id, "user_id": "u1", "user_name": "Student", "user_phone": "1",
+        "location_lat": 45.0875, "location_lng": -64.3665, "alert_type": None,
+        "status": status, "created_at": datetime(2024, 1, 1, 12, 0),
+    }
+
+
+@pytest.fixture
+def board(db, monkeypatch):
+    monkeypatch.setattr(server, "RESPONDER_API_KEY", KEY)
+    board = server.ResponderBoard(snapshot_limit=100, max_await_ms=10, heartbeat_interval=60)
+    monkeypatch.setattr(server, "responder_board", board)
+    return board
+
+
+@pytest.fixture
+def http(board):
+    return TestClient(server.app)
+
+
+def serve(board, monkeypatch, streams):
+    """Hand out ``streams`` in order; an exception entry is raised instead."""
+    opened = []
+
+    async def open_stream(resume_token=None):
+        opened.append(resume_token)
+        stream = streams.pop(0)
+        if isinstance(stream, Exception):
+            raise stream
+        return stream, await stream.try_next()
+
+    monkeypatch.setattr(board, "open", open_stream)
+    return opened
+
+
+def test_board_reads_the_key_from_the_header_only(http, db):
+    asyncio.run(db.sos_alerts.insert_many([alert_doc("a"), alert_doc("b", status="cancelled")]))
+    assert http.get("/api/responders/sos", params={"key": KEY}).status_code == 401
+    response = http.get("/api/responders/sos", headers={"X-Responder-Key": KEY})
+    assert response.status_code == 200
+    assert [alert["id"] for alert in response.json()] == ["a"]
+
+
+def test_board_socket_rejects_a_key_in_the_url(http, board, monkeypatch):
+    serve(board, monkeypatch, [FakeBoardStream()])
+    with pytest.raises(WebSocketDisconnect) as closed:
+        with http.websocket_connect(f"/api/responders/sos/ws?key={KEY}") as ws:
+            ws.receive_json()
+    assert closed.value.code == 4401
+
+
+def test_board_socket_sends_a_snapshot_then_deltas(http, board, db, monkeypatch):
+    asyncio.run(db.sos_alerts.insert_one(alert_doc("a")))
+    new = alert_doc("b")
+    stream = FakeBoardStream()
+    serve(board, monkeypatch, [stream])
+    with http.websocket_connect("/api/responders/sos/ws", headers={"X-Responder-Key": KEY}) as ws:
+        snapshot = ws.receive_json()
+        assert snapshot["type"] == "snapshot"
+        assert [alert["id"] for alert in snapshot["alerts"]] == ["a"]
+        stream.changes.append({
+            "_id": {"_data": "t1"}, "operationType": "insert", "documentKey": {"_id": new["_id"]}, "fullDocument": new,
+        })
+        delta = ws.receive_json()
+    assert (delta["type"], delta["alert"]["id"], delta["resume_token"]) == ("upsert", "b", "t1")
+
+
+def test_board_socket_falls_back_to_a_snapshot_when_resume_fails(http, board, db, monkeypatch):
+    asyncio.run(db.sos_alerts.insert_one(alert_doc("a")))
+    opened = serve(board, monkeypatch, [OperationFailure("resume point no longer in oplog"), FakeBoardStream()])
+    with http.websocket_connect("/api/responders/sos/ws?resume_token=stale", headers={"X-Responder-Key": KEY}) as ws:
+        snapshot = ws.receive_json()
+    assert opened == ["stale", None]
+    assert snapshot["type"] == "snapshot"
+    assert [alert["id"] for alert in snapshot["alerts"]] == ["a"]
+    assert board.resume_failures == 1
+
+
+def test_board_socket_closes_without_change_streams(http, board, monkeypatch):
+    serve(board, monkeypatch, [OperationFailure("The $changeStream stage is only supported on replica sets")])
+    with pytest.raises(WebSocketDisconnect) as closed:
+        with http.websocket_connect("/api/responders/sos/ws", headers={"X-Responder-Key": KEY}) as ws:
+            ws.receive_json()
+    assert closed.value.code == 1011
@@ -0,0 +1,119 @@
+import math
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+import server
+
+pytestmark = pytest.mark.anyio
+
+ROUTE = '{"start_lat": %s, "start_lng": -64.3665, "end_lat": 45.0882, "end_lng": -64.3658}'
+
+
+@pytest.mark.parametrize("start_lat", ["100", "-90.5"])
+async def test_route_rejects_latitude_out_of_range(client, make_user, start_lat):
+    _, headers = await make_user()
+    response = await client.post(
+        "/api/route/safety", content=ROUTE % start_lat,
+        headers={**headers, "Content-Type": "application/json"},
+    )
+    assert response.status_code == 422
+    assert response.json()["detail"][0]["loc"] == ["body", "start_lat"]
+
+
+async def test_route_rejects_non_finite_coordinates(client, make_user):
+    _, headers = await make_user()
+    response = await client.post(
+        "/api/route/safety", content=ROUTE % "1e999",
+        headers={**headers, "Content-Type": "application/json"},
+    )
+    assert response.status_code == 422
+    assert response.json()["detail"][0]["input"] == "inf"
+
+
+@pytest.fixture
+async def campus(db, monkeypatch):
+    catalog = server.LocationCatalog(cell_deg=0.002, max_in_memory=100, list_limit=10, refresh_interval=60)
+    index = server.IncidentPointIndex(window_days=90, refresh_interval=300)
+    monkeypatch.setattr(server, "location_catalog", catalog)
+    monkeypatch.setattr(server, "incident_points", index)
+    await db.campus_locations.insert_one({
+        "id": "phone-1", "name": "Blue light", "location_type": "emergency_phone", "lat": 45.1000, "lng": -64.3675,
+    })
+    now = datetime.utcnow()
+    await db.incidents.insert_many([
+        {"id": f"i{n}", "incident_type": "theft", "location_lat": 45.0800, "location_lng": -64.3675, "created_at": now}
+        for n in range(3)
+    ])
+
+
+def east_west(lat):
+    return {"start_lat": lat, "start_lng": -64.3700, "end_lat": lat, "end_lng": -64.3650}
+
+
+async def score(client, headers, body):
+    response = await client.post("/api/route/safety", json=body, headers=headers)
+    assert response.status_code == 200
+    return response.json()
+
+
+async def test_route_past_a_blue_light_outscores_one_past_incidents(client, make_user, campus):
+    _, headers = await make_user()
+    near_incidents = await score(client, headers, east_west(45.0800))
+    near_phone = await score(client, headers, east_west(45.1000))
+    bare = await score(client, headers, east_west(45.0900))
+
+    assert near_incidents["score"] < bare["score"] == 50.0 < near_phone["score"]
+    assert near_incidents["min_score"] < 50.0
+    middle = near_incidents["segments"][2]
+    assert middle["incidents_nearby"] == 3 and middle["nearest_phone_m"] is None
+    assert min(segment["nearest_phone_m"] for segment in near_phone["segments"]) < 20
+    assert all(segment["incidents_nearby"] == 0 for segment in near_phone["segments"])
+
+
+async def test_segments_tile_the_route_without_gaps(client, make_user, campus):
+    _, headers = await make_user()
+    result = await score(client, headers, {**east_west(45.0900), "segment_length_m": 100})
+    segments = result["segments"]
+
+    assert len(segments) == math.ceil(result["length_m"] / 100)
+    for before, after in zip(segments, segments[1:]):
+        assert before["end"] == after["start"]
+    spacing = result["length_m"] / (result["samples"] - 1)
+    assert all(abs(segment["length_m"] - 100) <= spacing for segment in segments[:-1])
+    assert sum(segment["length_m"] for segment in segments) == pytest.approx(result["length_m"], abs=0.5)
+
+
+async def test_route_of_exactly_whole_segments_has_no_empty_tail(client, make_user, campus):
+    _, headers = await make_user()
+    body = east_west(45.0900)
+    lats = np.array([body["start_lat"], body["end_lat"]])
+    lngs = np.array([body["start_lng"], body["end_lng"]])
+    total = server.sample_route(lats, lngs, 20.0, 2000)[2][-1]
+    result = await score(client, headers, {**body, "segment_length_m": total / 2})
+    assert len(result["segments"]) == 2
+    assert result["segments"][-1]["end"] == {"lat": body["end_lat"], "lng": body["end_lng"]}
+
+
+def test_haversine_matrix_matches_known_distances():
+    points = np.array([[46.0, -64.0], [45.0, -63.0]])
+    distances = server.haversine_matrix_m(np.array([45.0, 46.0]), np.array([-64.0, -64.0]), points)
+    assert distances.shape == (2, 2)
+    one_degree = math.radians(1) * server.EARTH_RADIUS_M
+    assert distances[0, 0] == pytest.approx(one_degree)
+    assert distances[1, 0] == pytest.approx(0.0, abs=1e-6)
+    assert distances[0, 1] == pytest.approx(one_degree * math.cos(math.radians(45.0)), rel=1e-3)
+
+
+def test_sample_route_spaces_samples_evenly_and_skips_repeated_vertices():
+    lats = np.array([45.0, 45.0, 45.001, 45.002])
+    lngs = np.array([-64.0, -64.0, -64.0, -64.0])
+    sample_lats, sample_lngs, along = server.sample_route(lats, lngs, 10.0, 2000)
+    assert (sample_lats[0], sample_lats[-1]) == (45.0, 45.002)
+    assert np.allclose(np.diff(along), along[-1] / (len(along) - 1))
+    assert np.diff(along).max() <= 10.0
+    assert np.all(sample_lngs == -64.0)
+
+    capped = server.sample_route(lats, lngs, 10.0, 5)
+    assert len(capped[2]) == 5 and capped[2][-1] == along[-1]
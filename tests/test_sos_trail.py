@@ -0,0 +1,93 @@
+from datetime import datetime, timedelta
+
+import pytest
+from pymongo.errors import BulkWriteError
+
+import server
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def trail(db):
+    return server.SOSTrailBuffer(
+        flush_interval=60, batch_size=1000, max_buffered=5,
+        min_interval=0, mirror_interval=60, owner_ttl=30, idle_ttl=60,
+    )
+
+
+def ping(lat: float, seconds_ago: float = 0) -> server.SOSLocationPing:
+    return server.SOSLocationPing(
+        location_lat=lat, location_lng=-64.3665,
+        recorded_at=datetime.utcnow() - timedelta(seconds=seconds_ago),
+    )
+
+
+def failing_bulk_write(monkeypatch, db, error):
+    async def bulk_write(*args, **kwargs):
+        raise error
+
+    monkeypatch.setattr(type(db.sos_trail), "bulk_write", bulk_write)
+    return bulk_write
+
+
+async def test_failed_flush_requeues_points(db, trail, monkeypatch):
+    for i in range(3):
+        trail.add("sos-1", "user-1", ping(45.0 + i / 1000, seconds_ago=30 - i))
+    with monkeypatch.context() as patch:
+        failing_bulk_write(patch, db, ConnectionError("primary stepped down"))
+        with pytest.raises(ConnectionError):
+            await trail.flush()
+    assert trail.stats()["buffered"] == 3
+
+    trail.add("sos-1", "user-1", ping(45.5))
+    assert await trail.flush() == 4
+    rows = await db.sos_trail.find({}, {"_id": 0, "location_lat": 1}).sort("ts", 1).to_list(None)
+    assert [row["location_lat"] for row in rows] == [45.0, 45.001, 45.002, 45.5]
+
+
+async def test_requeue_keeps_newest_points_within_cap(db, trail, monkeypatch):
+    for i in range(4):
+        trail.add("sos-1", "user-1", ping(45.0 + i / 1000, seconds_ago=30 - i))
+
+    async def pings_arrive_then_fail(*args, **kwargs):
+        for i in range(3):
+            trail.add("sos-1", "user-1", ping(46.0 + i / 1000, seconds_ago=10 - i))
+        raise ConnectionError("timeout")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(type(db.sos_trail), "bulk_write", pings_arrive_then_fail)
+        with pytest.raises(ConnectionError):
+            await trail.flush()
+
+    assert trail.stats()["buffered"] == 5
+    assert trail.stats()["dropped"] == 2
+    await trail.flush()
+    rows = await db.sos_trail.find({}, {"_id": 0, "location_lat": 1}).sort("ts", 1).to_list(None)
+    assert [row["location_lat"] for row in rows] == [45.002, 45.003, 46.0, 46.001, 46.002]
+
+
+async def test_partial_bulk_failure_requeues_only_failed_rows(db, trail, monkeypatch):
+    for i in range(3):
+        trail.add("sos-1", "user-1", ping(45.0 + i / 1000, seconds_ago=30 - i))
+    error = BulkWriteError({"writeErrors": [{"index": 1, "code": 91, "errmsg": "shutdown"}], "nInserted": 2})
+    with monkeypatch.context() as patch:
+        failing_bulk_write(patch, db, error)
+        with pytest.raises(BulkWriteError):
+            await trail.flush()
+    assert [point["location_lat"] for point in trail._points["sos-1"]] == [45.001]
+
+
+async def test_sweep_forgets_idle_alerts(trail):
+    trail.add("old", "user-1", ping(45.0, seconds_ago=120))
+    trail.add("live", "user-2", ping(45.0))
+    trail._owners["old"] = ("user-1", 0)
+    trail._mirrored_at["old"] = datetime.utcnow()
+
+    trail.sweep()
+    assert "old" in trail.latest  # still buffered, so not yet written
+
+    await trail.flush()
+    trail.sweep()
+    assert set(trail.latest) == {"live"}
+    assert "old" not in trail._owners and "old" not in trail._mirrored_at
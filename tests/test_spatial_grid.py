@@ -0,0 +1,50 @@
+import random
+import time
+
+import pytest
+
+import server
+
+
+def brute_force(points, lat, lng, k):
+    ranked = sorted((server.haversine_m(lat, lng, p_lat, p_lng), name) for p_lat, p_lng, name in points)
+    return ranked[:k]
+
+
+@pytest.fixture(scope="module")
+def campus():
+    rng = random.Random(7)
+    points = [
+        (45.085 + rng.uniform(-0.01, 0.01), -64.366 + rng.uniform(-0.015, 0.015), f"p{i}")
+        for i in range(400)
+    ]
+    return points, server.SpatialGrid(points, cell_deg=0.0005)
+
+
+def nearest_names(grid, lat, lng, k):
+    return [(round(distance, 6), name) for distance, name in grid.nearest(lat, lng, k)]
+
+
+@pytest.mark.parametrize("lat,lng", [(43.65, -79.38), (44.0, -66.0), (-45.0, 120.0)])
+def test_far_away_query_is_fast_and_exact(campus, lat, lng):
+    points, grid = campus
+    start = time.perf_counter()
+    found = nearest_names(grid, lat, lng, 3)
+    assert time.perf_counter() - start < 0.2
+    assert found == [(round(distance, 6), name) for distance, name in brute_force(points, lat, lng, 3)]
+
+
+def test_on_campus_queries_match_brute_force(campus):
+    points, grid = campus
+    rng = random.Random(11)
+    for _ in range(50):
+        lat, lng = 45.085 + rng.uniform(-0.02, 0.02), -64.366 + rng.uniform(-0.03, 0.03)
+        k = rng.randint(1, 10)
+        expected = [(round(distance, 6), name) for distance, name in brute_force(points, lat, lng, k)]
+        assert nearest_names(grid, lat, lng, k) == expected
+
+
+def test_empty_grid_and_k_larger_than_points():
+    assert server.SpatialGrid([], cell_deg=0.001).nearest(45.0, -64.0, 3) == []
+    grid = server.SpatialGrid([(45.0, -64.0, "a"), (45.001, -64.0, "b")], cell_deg=0.001)
+    assert [name for _, name in grid.nearest(45.0, -64.0, 5)] == ["a", "b"]
@@ -0,0 +1,100 @@
+import asyncio
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+import server
+
+pytestmark = pytest.mark.anyio
+
+ESCORT = {"pickup_lat": 45.0875, "pickup_lng": -64.3665, "destination_lat": 45.0882, "destination_lng": -64.3658}
+WALK = {"contact_ids": [], "duration_minutes": 30, "location_lat": 45.0875, "location_lng": -64.3665}
+
+
+@pytest.fixture(autouse=True)
+def quiet_workers(monkeypatch):
+    # Transitions reschedule deadlines and wake the outbox; keep both off the loop
+    monkeypatch.setattr(server.walk_scheduler, "schedule", lambda *args: None)
+    monkeypatch.setattr(server.walk_scheduler, "cancel", lambda *args: None)
+    monkeypatch.setattr(server.dashboard_outbox, "wake", lambda: None)
+
+
+async def test_second_escort_cancel_conflicts(client, make_user):
+    _, headers = await make_user()
+    escort_id = (await client.post("/api/escorts", json=ESCORT, headers=headers)).json()["id"]
+    assert (await client.put(f"/api/escorts/{escort_id}/cancel", headers=headers)).status_code == 200
+    again = await client.put(f"/api/escorts/{escort_id}/cancel", headers=headers)
+    assert again.status_code == 409
+    assert again.json()["detail"] == "Escort request is already cancelled"
+
+
+async def test_second_sos_cancel_conflicts(client, make_user):
+    _, headers = await make_user()
+    sos_id = (await client.post("/api/sos", json={"location_lat": 45.0875, "location_lng": -64.3665}, headers=headers)).json()["id"]
+    assert (await client.put(f"/api/sos/{sos_id}/cancel", headers=headers)).status_code == 200
+    assert (await client.put(f"/api/sos/{sos_id}/cancel", headers=headers)).status_code == 409
+
+
+async def test_completed_walk_cannot_be_extended_or_completed_again(client, make_user):
+    _, headers = await make_user()
+    walk_id = (await client.post("/api/friend-walk", json=WALK, headers=headers)).json()["id"]
+    assert (await client.put(f"/api/friend-walk/{walk_id}/complete", headers=headers)).status_code == 200
+    assert (await client.put(f"/api/friend-walk/{walk_id}/complete", headers=headers)).status_code == 409
+    assert (await client.put(f"/api/friend-walk/{walk_id}/extend", headers=headers)).status_code == 409
+
+
+@pytest.mark.parametrize("path", [
+    "/api/escorts/{id}/cancel",
+    "/api/sos/{id}/cancel",
+    "/api/friend-walk/{id}/complete",
+    "/api/friend-walk/{id}/extend",
+])
+async def test_unknown_id_is_not_found(client, make_user, path):
+    _, headers = await make_user()
+    response = await client.put(path.format(id="does-not-exist"), headers=headers)
+    assert response.status_code == 404
+
+
+async def test_another_users_walk_is_not_found(client, make_user):
+    _, owner = await make_user()
+    _, other = await make_user()
+    walk_id = (await client.post("/api/friend-walk", json=WALK, headers=owner)).json()["id"]
+    assert (await client.put(f"/api/friend-walk/{walk_id}/extend", headers=other)).status_code == 404
+    assert (await client.put(f"/api/friend-walk/{walk_id}/complete", headers=other)).status_code == 404
+
+
+async def test_concurrent_extends_add_up(client, db, make_user):
+    _, headers = await make_user()
+    walk = (await client.post("/api/friend-walk", json=WALK, headers=headers)).json()
+    responses = await asyncio.gather(*(
+        client.put(f"/api/friend-walk/{walk['id']}/extend?minutes={minutes}", headers=headers)
+        for minutes in (5, 10, 15, 20)
+    ))
+    assert [response.status_code for response in responses] == [200] * 4
+
+    stored = await db.friend_walks.find_one({"id": walk["id"]}, {"_id": 0})
+    assert stored["duration_minutes"] == 30 + 50
+    # Stored dates keep millisecond precision
+    extended_by = stored["end_time"] - datetime.fromisoformat(walk["end_time"])
+    assert abs(extended_by - timedelta(minutes=50)) < timedelta(milliseconds=1)
+
+
+async def test_escort_assigned_event_carries_only_the_assignment(client, db, make_user):
+    user, headers = await make_user()
+    escort_id = (await client.post("/api/escorts", json=ESCORT, headers=headers)).json()["id"]
+    await db.escort_requests.update_one({"id": escort_id}, {"$set": {"track": {"path": [[1, 2]]}}})
+    subscriber = server.push_hub.subscribe([f"user:{user['id']}"])
+    try:
+        assert (await client.put(f"/api/escorts/{escort_id}/assign")).status_code == 200
+        event = json.loads(subscriber.queue.get_nowait())
+    finally:
+        server.push_hub.unsubscribe(subscriber)
+    assert event["type"] == "escort.assigned"
+    assert event["data"] == {
+        "id": escort_id,
+        "status": "assigned",
+        "officer_name": "Officer John",
+        "officer_photo": None,
+        "estimated_wait": 5,
+    }
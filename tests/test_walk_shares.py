@@ -0,0 +1,100 @@
+import asyncio
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+import server
+
+pytestmark = pytest.mark.anyio
+
+WALK = {"contact_ids": [], "duration_minutes": 30, "location_lat": 45.0875, "location_lng": -64.3665}
+
+
+@pytest.fixture(autouse=True)
+def isolated(monkeypatch, db):
+    monkeypatch.setattr(server.walk_scheduler, "schedule", lambda *args: None)
+    monkeypatch.setattr(server.walk_scheduler, "cancel", lambda *args: None)
+    monkeypatch.setattr(server, "location_tracks", server.LocationTrackBuffer(
+        flush_interval=60, max_dirty=1000, tolerance_m=1, max_pending_points=100,
+    ))
+    monkeypatch.setattr(server, "walk_shares", server.WalkShareFeed(grace=3600))
+
+
+async def start_walk(client, headers) -> tuple:
+    walk = (await client.post("/api/friend-walk", json=WALK, headers=headers)).json()
+    link = (await client.post(f"/api/friend-walk/{walk['id']}/share", headers=headers)).json()
+    return walk, link
+
+
+def events(body: str) -> list:
+    return [json.loads(line[len("data: "):]) for line in body.splitlines() if line.startswith("data: ")]
+
+
+async def watching(walk_id: str):
+    while not server.push_hub.has_subscribers(server.WalkShareFeed.topic(walk_id)):
+        await asyncio.sleep(0.01)
+
+
+async def test_share_token_is_not_an_access_token(client, make_user):
+    _, headers = await make_user()
+    _, link = await start_walk(client, headers)
+    response = await client.get("/api/auth/me", headers={"Authorization": f"Bearer {link['token']}"})
+    assert response.status_code == 401
+
+
+async def test_access_token_and_stream_ticket_do_not_open_a_share(client, make_user):
+    user, headers = await make_user()
+    walk, _ = await start_walk(client, headers)
+    for token in (server.create_access_token({"sub": user["id"]}), server.create_stream_ticket(user["id"])):
+        response = await client.get(f"/api/share/walks/{token}/events")
+        assert response.status_code == 401
+
+
+async def test_finished_walk_link_is_gone(client, make_user):
+    _, headers = await make_user()
+    walk, link = await start_walk(client, headers)
+    await client.put(f"/api/friend-walk/{walk['id']}/complete", headers=headers)
+    response = await client.get(link["url"])
+    assert response.status_code == 410
+
+
+async def test_revoked_link_stops_working_and_a_new_one_is_issued(client, make_user):
+    _, headers = await make_user()
+    walk, old = await start_walk(client, headers)
+    assert (await client.delete(f"/api/friend-walk/{walk['id']}/share", headers=headers)).status_code == 200
+    assert (await client.get(old["url"])).status_code == 401
+
+    new = (await client.post(f"/api/friend-walk/{walk['id']}/share", headers=headers)).json()
+    assert new["token"] != old["token"]
+    stream = asyncio.create_task(client.get(new["url"]))
+    await watching(walk["id"])
+    await client.delete(f"/api/friend-walk/{walk['id']}/share", headers=headers)
+    body = (await asyncio.wait_for(stream, 5)).text
+    assert [event["type"] for event in events(body)] == ["snapshot", "walk.share_revoked"]
+
+
+async def test_stream_relays_positions_then_closes_on_completion(client, make_user):
+    _, headers = await make_user()
+    walk, link = await start_walk(client, headers)
+    stream = asyncio.create_task(client.get(link["url"]))
+    await watching(walk["id"])
+
+    await client.put(f"/api/friend-walk/{walk['id']}/update", json={"location_lat": 45.09, "location_lng": -64.37}, headers=headers)
+    await client.put(f"/api/friend-walk/{walk['id']}/complete", headers=headers)
+    received = events((await asyncio.wait_for(stream, 5)).text)
+
+    assert [event["type"] for event in received] == ["snapshot", "walk.position", "walk.completed"]
+    assert received[1]["data"]["current_lat"] == 45.09
+    assert received[2]["data"]["status"] == "completed"
+
+
+async def test_stream_closes_when_the_walk_expires(client, db, make_user, monkeypatch):
+    monkeypatch.setattr(server, "walk_shares", server.WalkShareFeed(grace=0))
+    user, headers = await make_user()
+    walk, link = await start_walk(client, headers)
+    await db.friend_walks.update_one(
+        {"id": walk["id"]}, {"$set": {"end_time": datetime.utcnow() + timedelta(milliseconds=200)}}
+    )
+    received = events((await asyncio.wait_for(client.get(link["url"]), 5)).text)
+    assert [event["type"] for event in received] == ["snapshot", "walk.expired"]